@@ -0,0 +1,113 @@
+"""Batched convolution of mass isotopomer distributions.
+
+The MID of an EMU made by combining several smaller EMUs is the convolution
+of their MIDs. The functions here convolve arrays of MIDs along their last
+axis, broadcasting the others, so whole batches of draws and EMUs are
+convolved in one call. Short MIDs are convolved directly and long ones with
+real FFTs, whose cost grows more slowly with the length.
+"""
+
+from typing import Literal, Mapping, Sequence
+
+import numpy as np
+from scipy import fft
+
+type ConvolutionMethod = Literal["auto", "direct", "fft"]
+
+FFT_MIN_LENGTH = 10
+
+
+def _convolve_direct(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Convolve by adding shifted copies of the longer operand."""
+    if a.shape[-1] < b.shape[-1]:
+        a, b = b, a
+    shape = np.broadcast_shapes(a.shape[:-1], b.shape[:-1])
+    out = np.zeros(shape + (a.shape[-1] + b.shape[-1] - 1,))
+    for i in range(b.shape[-1]):
+        out[..., i : i + a.shape[-1]] += a * b[..., i : i + 1]
+    return out
+
+
+def _convolve_fft(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Convolve by multiplying real FFTs of a fast length."""
+    n = a.shape[-1] + b.shape[-1] - 1
+    m = fft.next_fast_len(n, real=True)
+    return fft.irfft(fft.rfft(a, m) * fft.rfft(b, m), m)[..., :n]
+
+
+def convolve(
+    a: np.ndarray, b: np.ndarray, method: ConvolutionMethod = "auto"
+) -> np.ndarray:
+    """
+    Convolve two arrays of MIDs along the last axis.
+
+    Parameters
+    ----------
+    a : np.ndarray
+        MIDs along the last axis, such as a draws by EMUs by mass
+        isotopomers array.
+    b : np.ndarray
+        MIDs whose other axes broadcast against those of a.
+    method : ConvolutionMethod
+        "direct", "fft", or "auto" to use FFTs when both MIDs have at least
+        FFT_MIN_LENGTH entries.
+
+    Returns
+    -------
+    np.ndarray
+        The convolved MIDs, with a.shape[-1] + b.shape[-1] - 1 entries.
+    """
+    if method == "auto":
+        short = min(a.shape[-1], b.shape[-1])
+        method = "fft" if short >= FFT_MIN_LENGTH else "direct"
+    if method == "fft":
+        return _convolve_fft(a, b)
+    if method == "direct":
+        return _convolve_direct(a, b)
+    raise ValueError(f"Unknown convolution method {method}.")
+
+
+def convolve_all(
+    mids: Sequence[np.ndarray], method: ConvolutionMethod = "auto"
+) -> np.ndarray:
+    """Convolve a sequence of arrays of MIDs along the last axis, in order."""
+    out = mids[0]
+    for other in mids[1:]:
+        out = convolve(out, other, method)
+    return out
+
+
+def convolve_indexed(
+    stores: Mapping[int, np.ndarray],
+    sizes: Sequence[int],
+    slots: Sequence[np.ndarray],
+    method: ConvolutionMethod = "auto",
+) -> np.ndarray:
+    """
+    Convolve the MIDs of precomputed groups of EMUs held in per-size stores.
+
+    This gives every product EMU of a group of EMU reactions with the same
+    reactant sizes in one vectorized call. The reactants of reaction i are
+    the EMUs at slots[j][i] of stores[sizes[j]].
+
+    Parameters
+    ----------
+    stores : Mapping[int, np.ndarray]
+        For each EMU size, an array of MIDs with EMUs along the second to
+        last axis, such as a draws by EMUs by mass isotopomers array.
+    sizes : Sequence[int]
+        The size of each reactant.
+    slots : Sequence[np.ndarray]
+        The store positions of each reactant, one array per reactant.
+    method : ConvolutionMethod
+        As for convolve.
+
+    Returns
+    -------
+    np.ndarray
+        The product MIDs, with the reactions along the second to last axis.
+    """
+    return convolve_all(
+        [np.take(stores[size], s, axis=-2) for size, s in zip(sizes, slots)],
+        method,
+    )
@@ -4,26 +4,69 @@ These functions should take in a dataframe of measurements and return a
 PreparedData object.
 """
 
+import functools
+import itertools
 import json
 import logging
+import mmap
+import os
 import re
+import sqlite3
+import tempfile
 import warnings
 from pathlib import Path
-from typing import Dict, List, Set, Tuple
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
+import numpy as np
 import pandas as pd
 
 from cmfa.fluxomics_data.compound import Compound
-from cmfa.fluxomics_data.flux_measurement import FluxMeasurement
+from cmfa.fluxomics_data.flux_measurement import (
+    FluxMeasurement,
+    FluxMeasurementArray,
+)
 from cmfa.fluxomics_data.fluxomics_dataset import FluxomicsDataset
 from cmfa.fluxomics_data.mid_measurement import (
     MIDMeasurement,
+    MIDMeasurementArray,
     MIDMeasurementComponent,
 )
 from cmfa.fluxomics_data.reaction import Reaction
 from cmfa.fluxomics_data.reaction_network import ReactionNetwork
 from cmfa.fluxomics_data.tracer import Tracer, TracerExperiment
 
+MID_KEY_COLUMNS = ("experiment_id", "met_id", "ms_id")
+
+REACTION_EQUATION_CACHE_SIZE = 65536
+BINARY_DATASET_MAGIC = b"CMFADS01"
+BINARY_DATASET_ALIGNMENT = 64
+FLUXOMICS_DATASET_SECTIONS = (
+    "reaction_network",
+    "tracers",
+    "tracer_experiments",
+    "flux_measurements",
+    "mid_measurements",
+)
+
+type MIDKey = Tuple[str, str, str]
+
+_DIRECTION_PATTERN = re.compile(r"<->|->")
+_JSON_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_JSON_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_JSON_STRUCTURE = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[\[\]{}]', re.DOTALL)
+_JSON_SCALAR = re.compile(rb"[^ \t\n\r,\]}]*")
+_COMPOUND_PATTERN = re.compile(r"(\d*\.*\d*)\**([A-Za-z0-9]+)(\(([^)]*)\))*")
+
 
 def parse_tracer_table(
     tracer_table: pd.DataFrame,
@@ -31,6 +74,9 @@ def parse_tracer_table(
     """
     Read tracer data from a CSV file.
 
+    Tracers are deduplicated by isotope with a dictionary, so each tracer is
+    built from the first row that mentions it.
+
     Parameters
     ----------
     tracer_table : pd.DataFrame
@@ -44,25 +90,33 @@ def parse_tracer_table(
     List[TracerExperiment]
         A list of TracerExperiment objects loaded from the file.
     """
-    te_dict = dict()
-    tracers = []
-    for _, row in tracer_table.iterrows():
-        if not any(t.isotope == row["tracer_id"] for t in tracers):
-            new_tracer = Tracer(
-                isotope=row["tracer_id"],
-                compound=row["met_id"],
-                labelled_atom_positions=set(json.loads(row["atom_ids"])),
-                purity=row["ratio"],
-            )
-            tracers.append(new_tracer)
-        if row["experiment_id"] not in te_dict.keys():
-            te_dict[row["experiment_id"]] = dict()
-        te_dict[row["experiment_id"]][row["tracer_id"]] = row["enrichment"]
+    tracer_rows = tracer_table.drop_duplicates("tracer_id", keep="first")
+    tracers: Dict[str, Tracer] = {
+        isotope: Tracer(
+            isotope=isotope,
+            compound=compound,
+            labelled_atom_positions=set(json.loads(atom_ids)),
+            purity=purity,
+        )
+        for isotope, compound, atom_ids, purity in zip(
+            tracer_rows["tracer_id"],
+            tracer_rows["met_id"],
+            tracer_rows["atom_ids"],
+            tracer_rows["ratio"],
+        )
+    }
+    te_dict: Dict[str, Dict[str, float]] = dict()
+    for experiment_id, tracer_id, enrichment in zip(
+        tracer_table["experiment_id"],
+        tracer_table["tracer_id"],
+        tracer_table["enrichment"],
+    ):
+        te_dict.setdefault(experiment_id, dict())[tracer_id] = enrichment
     tracer_experiments = [
         TracerExperiment(experiment_id=k, tracer_enrichments=v)
         for k, v in te_dict.items()
     ]
-    return tracers, tracer_experiments
+    return list(tracers.values()), tracer_experiments
 
 
 def parse_flux_measurements(
@@ -82,17 +136,107 @@ def parse_flux_measurements(
     List[FluxMeasurement]
         A list of FluxMeasurement objects loaded from the file.
     """
-    flux_measurements = []
-    for _, row in measurement_table.iterrows():
-        flux_measurement = FluxMeasurement(
-            experiment_id=row["experiment_id"],
-            reaction_id=row["rxn_id"],
-            replicate=row["replicate"],
-            measured_flux=float(row["flux"]),
-            measurement_error=float(row["flux_std_error"]),
+    return [
+        FluxMeasurement(
+            experiment_id=experiment_id,
+            reaction_id=reaction_id,
+            replicate=replicate,
+            measured_flux=flux,
+            measurement_error=flux_std_error,
+        )
+        for experiment_id, reaction_id, replicate, flux, flux_std_error in zip(
+            measurement_table["experiment_id"],
+            measurement_table["rxn_id"],
+            measurement_table["replicate"],
+            measurement_table["flux"].astype(float),
+            measurement_table["flux_std_error"].astype(float),
+        )
+    ]
+
+
+def group_mid_measurement_table(
+    measurements_table: pd.DataFrame,
+) -> Tuple[List[MIDKey], np.ndarray, pd.DataFrame]:
+    """
+    Sort a table of MID measurements into contiguous measurement groups.
+
+    A group is all rows sharing an (experiment_id, met_id, ms_id) key. Groups
+    are ordered by first appearance and rows keep their original order within
+    each group, so the result matches reading the table row by row.
+
+    Parameters
+    ----------
+    measurements_table : pd.DataFrame
+        A table with the columns of ms_measurements.csv.
+
+    Returns
+    -------
+    List[MIDKey]
+        The key of each group.
+    np.ndarray
+        Offsets of the groups in the sorted table: group i is made of rows
+        offsets[i] to offsets[i + 1].
+    pd.DataFrame
+        The sorted table.
+    """
+    codes = measurements_table.groupby(
+        list(MID_KEY_COLUMNS), sort=False, dropna=False
+    ).ngroup()
+    order = np.argsort(codes.to_numpy(), kind="stable")
+    sorted_table = measurements_table.iloc[order]
+    sizes = np.bincount(codes.to_numpy())
+    offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    first_rows = sorted_table.iloc[offsets[:-1]]
+    keys = list(
+        zip(*(first_rows[column].tolist() for column in MID_KEY_COLUMNS))
+    )
+    return keys, offsets, sorted_table
+
+
+def mid_measurements_from_groups(
+    keys: List[MIDKey], offsets: np.ndarray, sorted_table: pd.DataFrame
+) -> Iterator[MIDMeasurement]:
+    """
+    Build one MIDMeasurement per group of a grouped measurement table.
+
+    Parameters
+    ----------
+    keys : List[MIDKey]
+        The (experiment_id, met_id, ms_id) key of each group.
+    offsets : np.ndarray
+        Group offsets as returned by group_mid_measurement_table.
+    sorted_table : pd.DataFrame
+        The table sorted by group, as returned by group_mid_measurement_table.
+
+    Returns
+    -------
+    Iterator[MIDMeasurement]
+        The MID measurement made of each group's rows.
+    """
+    mass_isotopomer_ids = sorted_table["mass_isotope"].astype(str).tolist()
+    intensities = sorted_table["intensity"].astype(float).tolist()
+    std_devs = sorted_table["intensity_std_error"].astype(float).tolist()
+    for (experiment_id, compound_id, fragment_id), start, end in zip(
+        keys, offsets[:-1].tolist(), offsets[1:].tolist()
+    ):
+        yield MIDMeasurement(
+            experiment_id=experiment_id,
+            compound_id=compound_id,
+            fragment_id=fragment_id,
+            measured_components=[
+                MIDMeasurementComponent(
+                    mass_isotopomer_id=mass_isotopomer_id,
+                    measured_intensity=intensity,
+                    measured_std_dev=std_dev,
+                )
+                for mass_isotopomer_id, intensity, std_dev in zip(
+                    mass_isotopomer_ids[start:end],
+                    intensities[start:end],
+                    std_devs[start:end],
+                )
+            ],
         )
-        flux_measurements.append(flux_measurement)
-    return flux_measurements
 
 
 def parse_mid_measurements(
@@ -103,7 +247,7 @@ def parse_mid_measurements(
 
     Parameters
     ----------
-    file_path : pd.DataFrame
+    measurements_table : pd.DataFrame
         Result of running pd.read_csv against a suitable table, e.g.
         https://github.com/biosustain/cmfa/blob/main/data/test_data/ms_measurements.csv
 
@@ -112,30 +256,303 @@ def parse_mid_measurements(
     List[MIDMeasurement]
         A list of MIDMeasurement objects loaded from the file.
     """
-    out = list()
-    measurements_dict = dict()
-    for _, row in measurements_table.iterrows():
-        experiment_id = row["experiment_id"]
-        compound_id = row["met_id"]
-        fragment_id = row["ms_id"]
-        key = (experiment_id, compound_id, fragment_id)
-        if key not in measurements_dict.keys():
-            measurements_dict[key] = {
-                "experiment_id": experiment_id,
-                "compound_id": compound_id,
-                "fragment_id": fragment_id,
-                "measured_components": [],
-            }
-        measurements_dict[key]["measured_components"].append(
-            MIDMeasurementComponent(
-                mass_isotopomer_id=str(row["mass_isotope"]),
-                measured_intensity=float(row["intensity"]),
-                measured_std_dev=float(row["intensity_std_error"]),
+    return list(
+        mid_measurements_from_groups(
+            *group_mid_measurement_table(measurements_table)
+        )
+    )
+
+
+def parse_mid_measurement_array(
+    measurements_table: pd.DataFrame,
+) -> MIDMeasurementArray:
+    """
+    Load MID measurements from a CSV file into a columnar store.
+
+    No MIDMeasurement objects are created, so this is much faster and uses
+    much less memory than parse_mid_measurements for large tables.
+
+    Parameters
+    ----------
+    measurements_table : pd.DataFrame
+        Result of running pd.read_csv against a suitable table, e.g.
+        https://github.com/biosustain/cmfa/blob/main/data/test_data/ms_measurements.csv
+
+    Returns
+    -------
+    MIDMeasurementArray
+        The measurements in the same order as parse_mid_measurements.
+    """
+    keys, offsets, sorted_table = group_mid_measurement_table(
+        measurements_table
+    )
+    experiment_id, compound_id, fragment_id = (
+        [key[i] for key in keys] for i in range(3)
+    )
+    return MIDMeasurementArray.from_columns(
+        experiment_id=experiment_id,
+        compound_id=compound_id,
+        fragment_id=fragment_id,
+        offsets=offsets,
+        mass_isotopomer_id=sorted_table["mass_isotope"].astype(str).tolist(),
+        measured_intensity=sorted_table["intensity"].to_numpy(dtype=float),
+        measured_std_dev=sorted_table["intensity_std_error"].to_numpy(
+            dtype=float
+        ),
+    )
+
+
+def parse_flux_measurement_array(
+    measurement_table: pd.DataFrame,
+) -> FluxMeasurementArray:
+    """
+    Load flux measurements from a CSV file into a columnar store.
+
+    Parameters
+    ----------
+    measurement_table : pd.DataFrame
+        Result of running pd.read_csv against a suitable table, e.g.
+        https://github.com/biosustain/cmfa/blob/main/data/test_data/flux.csv
+
+    Returns
+    -------
+    FluxMeasurementArray
+        The measurements in the same order as parse_flux_measurements.
+    """
+    return FluxMeasurementArray.from_columns(
+        experiment_id=measurement_table["experiment_id"].tolist(),
+        reaction_id=measurement_table["rxn_id"].tolist(),
+        replicate=measurement_table["replicate"].to_numpy(),
+        measured_flux=measurement_table["flux"].to_numpy(dtype=float),
+        measurement_error=measurement_table["flux_std_error"].to_numpy(
+            dtype=float
+        ),
+    )
+
+
+def iter_mid_measurements(
+    mid_measurement_file: Path,
+    chunksize: int = 100_000,
+    presorted: bool = True,
+    temp_dir: Optional[Path] = None,
+) -> Iterator[MIDMeasurement]:
+    """
+    Stream MID measurements from a CSV file in bounded memory.
+
+    The file is read in chunks of rows, and each MIDMeasurement is yielded as
+    soon as all of its rows have been read.
+
+    With presorted=True the rows of each (experiment_id, met_id, ms_id) key
+    must be contiguous in the file, which is how ms_measurements.csv files
+    are normally written. Only the current chunk and the rows of the last,
+    possibly unfinished, group are held in memory. A ValueError is raised if
+    the rows of a key are split within a chunk or across the boundary with
+    the previous chunk. Only the previous key is remembered, so a key that
+    turns up again more than a chunk after its group has been finished is
+    not detected and gives a second measurement.
+
+    With presorted=False the rows can be in any order. Each chunk is spilled
+    to a temporary SQLite database and the measurements are yielded once the
+    whole file has been read. Measurements come out in the same order as
+    parse_mid_measurements would return them.
+
+    In both cases a ValueError is raised if a row has no experiment_id,
+    met_id or ms_id.
+
+    Parameters
+    ----------
+    mid_measurement_file : Path
+        A file like
+        https://github.com/biosustain/cmfa/blob/main/data/test_data/ms_measurements.csv
+    chunksize : int
+        Number of rows to read at a time.
+    presorted : bool
+        Whether the rows of each measurement are contiguous in the file.
+    temp_dir : Optional[Path]
+        Directory for the temporary database used when presorted is False.
+        Defaults to the system temporary directory.
+
+    Returns
+    -------
+    Iterator[MIDMeasurement]
+        The MID measurements in the file.
+    """
+    chunks = map(
+        _check_mid_keys, pd.read_csv(mid_measurement_file, chunksize=chunksize)
+    )
+    if presorted:
+        return _iter_presorted_mid_chunks(chunks)
+    return _iter_spilled_mid_chunks(chunks, temp_dir)
+
+
+def _check_mid_keys(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Raise a ValueError if any row of a chunk is missing part of its key."""
+    missing = chunk[list(MID_KEY_COLUMNS)].isna().any(axis=1)
+    if missing.any():
+        rows = (chunk.index[missing.to_numpy()] + 1).tolist()
+        raise ValueError(
+            f"MID measurement rows {rows} are missing one of "
+            f"{MID_KEY_COLUMNS}."
+        )
+    return chunk
+
+
+def _iter_presorted_mid_chunks(
+    chunks: Iterable[pd.DataFrame],
+) -> Iterator[MIDMeasurement]:
+    """Yield the measurements in chunks whose groups are contiguous.
+
+    The rows of the last group of each chunk are carried into the next one,
+    so a group split across the boundary shows up as non-contiguous rows.
+    """
+    carry: Optional[pd.DataFrame] = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk])
+        keys, offsets, sorted_table = group_mid_measurement_table(chunk)
+        if len(keys) == 0:
+            continue
+        if not sorted_table.index.is_monotonic_increasing:
+            raise ValueError(
+                "MID measurement rows are not grouped by "
+                f"{MID_KEY_COLUMNS}; use presorted=False for unsorted files."
             )
+        yield from mid_measurements_from_groups(
+            keys[:-1], offsets[:-1], sorted_table
         )
-    for m in measurements_dict.values():
-        out.append(MIDMeasurement.model_validate(m))
-    return out
+        carry = sorted_table.iloc[offsets[-2] :]
+    if carry is not None:
+        keys, offsets, sorted_table = group_mid_measurement_table(carry)
+        yield from mid_measurements_from_groups(keys, offsets, sorted_table)
+
+
+def _iter_spilled_mid_chunks(
+    chunks: Iterable[pd.DataFrame], temp_dir: Optional[Path]
+) -> Iterator[MIDMeasurement]:
+    """Spill chunks to a temporary database, then yield whole measurements."""
+    with tempfile.TemporaryDirectory(dir=temp_dir) as tmp:
+        connection = sqlite3.connect(Path(tmp) / "mid_measurements.sqlite")
+        try:
+            connection.executescript("""
+                CREATE TABLE keys (
+                    id INTEGER PRIMARY KEY,
+                    experiment_id, met_id, ms_id,
+                    UNIQUE (experiment_id, met_id, ms_id)
+                );
+                CREATE TABLE rows (
+                    id INTEGER PRIMARY KEY,
+                    key_id INTEGER,
+                    mass_isotope TEXT,
+                    intensity REAL,
+                    intensity_std_error REAL
+                );
+                """)
+            for chunk in chunks:
+                key_columns = [chunk[c].tolist() for c in MID_KEY_COLUMNS]
+                connection.executemany(
+                    "INSERT OR IGNORE INTO keys "
+                    "(experiment_id, met_id, ms_id) VALUES (?, ?, ?)",
+                    zip(*key_columns),
+                )
+                connection.executemany(
+                    "INSERT INTO rows "
+                    "(key_id, mass_isotope, intensity, intensity_std_error) "
+                    "SELECT id, ?, ?, ? FROM keys "
+                    "WHERE experiment_id = ? AND met_id = ? AND ms_id = ?",
+                    zip(
+                        chunk["mass_isotope"].astype(str).tolist(),
+                        chunk["intensity"].astype(float).tolist(),
+                        chunk["intensity_std_error"].astype(float).tolist(),
+                        *key_columns,
+                    ),
+                )
+            connection.execute("CREATE INDEX rows_by_key ON rows (key_id, id)")
+            cursor = connection.execute(
+                "SELECT k.experiment_id, k.met_id, k.ms_id, r.mass_isotope, "
+                "r.intensity, r.intensity_std_error "
+                "FROM rows r JOIN keys k ON r.key_id = k.id "
+                "ORDER BY r.key_id, r.id"
+            )
+            grouped = itertools.groupby(cursor, key=lambda row: row[:3])
+            for (experiment_id, compound_id, fragment_id), rows in grouped:
+                yield MIDMeasurement(
+                    experiment_id=experiment_id,
+                    compound_id=compound_id,
+                    fragment_id=fragment_id,
+                    measured_components=[
+                        MIDMeasurementComponent(
+                            mass_isotopomer_id=mass_isotopomer_id,
+                            measured_intensity=intensity,
+                            measured_std_dev=std_dev,
+                        )
+                        for *_, mass_isotopomer_id, intensity, std_dev in rows
+                    ],
+                )
+        finally:
+            connection.close()
+
+
+def _reaction_equation_error(
+    equation: str, offset: int, reason: str
+) -> ValueError:
+    """Make an error pointing at a character of a reaction equation."""
+    return ValueError(
+        f"Invalid reaction equation {equation!r} at character {offset}: "
+        f"{reason}"
+    )
+
+
+@functools.lru_cache(maxsize=REACTION_EQUATION_CACHE_SIZE)
+def _tokenize_reaction_equation(
+    equation: str,
+) -> Tuple[Tuple[Tuple[str, Optional[str], float], ...], bool]:
+    """
+    Split a reaction equation into signed (compound, atom pattern) terms.
+
+    The result is immutable so that it can be shared between all the rows
+    with the same equation.
+    """
+    # Offsets in error messages refer to the equation as written, so keep
+    # track of where each non-space character came from.
+    positions = [i for i, char in enumerate(equation) if char != " "]
+    positions.append(len(equation))
+    stripped = equation.replace(" ", "")
+    arrows = list(_DIRECTION_PATTERN.finditer(stripped))
+    if len(arrows) == 0:
+        raise _reaction_equation_error(
+            equation, len(equation), "direction is missing"
+        )
+    if len(arrows) > 1:
+        raise _reaction_equation_error(
+            equation,
+            positions[arrows[1].start()],
+            "found more than one direction",
+        )
+    arrow = arrows[0]
+    terms = []
+    for sign, side_start, side_end in (
+        (-1, 0, arrow.start()),
+        (1, arrow.end(), len(stripped)),
+    ):
+        pos = side_start
+        while True:
+            match = _COMPOUND_PATTERN.match(stripped, pos, side_end)
+            if match is None:
+                raise _reaction_equation_error(
+                    equation, positions[pos], "expected a compound"
+                )
+            coeff_str, compound_id, _, atom_transition = match.groups()
+            coeff = float(coeff_str) if coeff_str else 1.0
+            terms.append((compound_id, atom_transition, coeff * sign))
+            pos = match.end()
+            if pos == side_end:
+                break
+            if stripped[pos] != "+":
+                raise _reaction_equation_error(
+                    equation, positions[pos], "expected '+' or a direction"
+                )
+            pos += 1
+    return tuple(terms), arrow.group() == "<->"
 
 
 def parse_reaction_equation(
@@ -144,60 +561,67 @@ def parse_reaction_equation(
     """
     Parse a reaction equation into a dictionary combining stoichiometry and atom transitions.
 
+    Equations are tokenized with precompiled regular expressions and the
+    tokens are memoized, so repeated equations are only tokenized once.
+
     Parameters
     ----------
     equation : str
-        The reaction equation string.
+        The reaction equation string, e.g. "B (abc) + C (de) -> D (bcd) + E (a)".
 
     Returns
     -------
-    Tuple[Dict[str, Dict[Tuple[int, ...], float]], bool]
+    Tuple[Dict[str, Dict[str, float]], bool]
         A tuple containing:
-        - A dictionary mapping compounds to another dictionary with tuples of atom transitions
-          and stoichiometric coefficients.
+        - A dictionary mapping compounds to another dictionary with atom
+          patterns and stoichiometric coefficients.
         - A boolean indicating if the reaction is reversible.
+
+    Raises
+    ------
+    ValueError
+        If the equation is malformed. The message gives the offset of the
+        offending character.
     """
-    # Remove spaces and identify the reaction direction
-    equation = equation.replace(" ", "")
-    if "<->" in equation:
-        lhs, rhs = equation.split("<->")
-        reversible = True
-    elif "->" in equation:
-        lhs, rhs = equation.split("->")
-        reversible = False
-    else:
-        raise ValueError(
-            "Invalid reaction equation format, direction is missing"
+    terms, reversible = _tokenize_reaction_equation(equation)
+    stoichiometry: Dict[str, Dict[str, float]] = {}
+    for compound_id, atom_transition, coeff in terms:
+        compound_stoichiometry = stoichiometry.setdefault(compound_id, {})
+        compound_stoichiometry[atom_transition] = (
+            compound_stoichiometry.get(atom_transition, 0) + coeff
         )
+    return stoichiometry, reversible
 
-    stoichiometry = {}
-    # Define the regex pattern for parsing
-    pattern = r"(\d*\.*\d*)\**([A-Za-z0-9]+)(\(([^)]*)\))*"
-    lhs, rhs = re.split("<->|->", equation)
-
-    # Function to parse each side of the equation
-    def parse_side(side: str, sign: int):
-        for match in re.finditer(pattern, side):
-            coeff_str, compound_id, _, atom_transition = match.groups()
-            coeff = float(coeff_str) if coeff_str else 1.0
-
-            if compound_id not in stoichiometry:
-                stoichiometry[compound_id] = {}
 
-            if atom_transition not in stoichiometry[compound_id]:
-                stoichiometry[compound_id][atom_transition] = 0
-            elif atom_transition == ():
-                if atom_transition == None:
-                    atom_transition = ""
-                stoichiometry[compound_id][atom_transition] = 0
+def parse_reaction_equations(
+    equations: Iterable[str],
+) -> List[Tuple[Dict[str, Dict[str, float]], bool]]:
+    """
+    Parse a batch of reaction equations, e.g. a whole rxn_eqn column.
 
-            stoichiometry[compound_id][atom_transition] += coeff * sign
+    Parameters
+    ----------
+    equations : Iterable[str]
+        The reaction equation strings.
 
-    # Parse left-hand side and right-hand side
-    parse_side(lhs, -1)  # Negative coefficients for LHS
-    parse_side(rhs, 1)  # Positive coefficients for RHS
+    Returns
+    -------
+    List[Tuple[Dict[str, Dict[str, float]], bool]]
+        The result of parse_reaction_equation for each equation.
 
-    return stoichiometry, reversible
+    Raises
+    ------
+    ValueError
+        If any equation is malformed. The message gives the row number,
+        counting from 0, and the offset of the offending character.
+    """
+    out = []
+    for row, equation in enumerate(equations):
+        try:
+            out.append(parse_reaction_equation(str(equation)))
+        except ValueError as e:
+            raise ValueError(f"Row {row}: {e}") from e
+    return out
 
 
 def parse_reaction_table(
@@ -219,17 +643,18 @@ def parse_reaction_table(
     ReactionNetwork
         A reaction network that consists of reactions and compounds.
     """
-    reactions_set: Set[Reaction] = set()
-
-    for _, row in reaction_table.iterrows():
-        stoichiometry, reversible = parse_reaction_equation(str(row["rxn_eqn"]))
-        reaction = Reaction(
-            id=str(row["rxn_id"]),
-            name=str(row["rxn_id"]),
+    parsed_equations = parse_reaction_equations(reaction_table["rxn_eqn"])
+    reactions_set: Set[Reaction] = {
+        Reaction(
+            id=str(rxn_id),
+            name=str(rxn_id),
             stoichiometry_input=stoichiometry,
             reversible=reversible,
         )
-        reactions_set.add(reaction)
+        for rxn_id, (stoichiometry, reversible) in zip(
+            reaction_table["rxn_id"], parsed_equations
+        )
+    }
     return ReactionNetwork(
         id=network_id,
         name=network_name,
@@ -242,14 +667,31 @@ def load_dataset_from_csv(
     flux_measurement_file: Path,
     mid_measurement_file: Path,
     reaction_file: Path,
+    mid_chunksize: Optional[int] = None,
+    mid_presorted: bool = True,
+    columnar: bool = False,
 ) -> FluxomicsDataset:
     """
     Load all existing data in a single model.
 
     Parameters
     ----------
-    data_id : str
-        The id for the dataset.
+    tracer_file : Path
+        A file like data/test_data/tracers.csv
+    flux_measurement_file : Path
+        A file like data/test_data/flux.csv
+    mid_measurement_file : Path
+        A file like data/test_data/ms_measurements.csv
+    reaction_file : Path
+        A file like data/test_data/reactions.csv
+    mid_chunksize : Optional[int]
+        If given, stream the MID measurement file in chunks of this many rows
+        with iter_mid_measurements instead of reading it all at once.
+    mid_presorted : bool
+        Passed to iter_mid_measurements when mid_chunksize is given.
+    columnar : bool
+        Whether to store the measurements in columnar FluxMeasurementArray and
+        MIDMeasurementArray stores instead of lists.
 
     Returns
     -------
@@ -260,12 +702,33 @@ def load_dataset_from_csv(
     logging.info("Reading raw data...")
     tracer_table = pd.read_csv(tracer_file)
     flux_measurements_table = pd.read_csv(flux_measurement_file)
-    mid_measurements_table = pd.read_csv(mid_measurement_file)
     reactions_table = pd.read_csv(reaction_file)
     logging.info("Parsing tables...")
     tracers, tracer_experiments = parse_tracer_table(tracer_table)
-    flux_measurements = parse_flux_measurements(flux_measurements_table)
-    mid_measurements = parse_mid_measurements(mid_measurements_table)
+    if columnar:
+        flux_measurements = parse_flux_measurement_array(
+            flux_measurements_table
+        )
+    else:
+        flux_measurements = parse_flux_measurements(flux_measurements_table)
+    if mid_chunksize is not None:
+        mid_stream = iter_mid_measurements(
+            mid_measurement_file,
+            chunksize=mid_chunksize,
+            presorted=mid_presorted,
+        )
+        if columnar:
+            mid_measurements = MIDMeasurementArray.from_measurements(mid_stream)
+        else:
+            mid_measurements = list(mid_stream)
+    elif columnar:
+        mid_measurements = parse_mid_measurement_array(
+            pd.read_csv(mid_measurement_file)
+        )
+    else:
+        mid_measurements = parse_mid_measurements(
+            pd.read_csv(mid_measurement_file)
+        )
     reaction_network = parse_reaction_table(reactions_table, "a")
     logging.info("Aggregating...")
     FD = FluxomicsDataset(
@@ -313,3 +776,369 @@ def import_fluxomics_dataset_from_json(filename: Path) -> FluxomicsDataset:
         json_data = file.read()
         dataset = FluxomicsDataset.model_validate_json(json_data)
         return dataset
+
+
+def _skip_json_whitespace(buffer: bytes, pos: int) -> int:
+    """Get the position of the next non-whitespace byte."""
+    return _JSON_WHITESPACE.match(buffer, pos).end()
+
+
+def _expect_json_character(buffer: bytes, pos: int, expected: bytes) -> int:
+    """Check for a structural character and get the position after it."""
+    pos = _skip_json_whitespace(buffer, pos)
+    if pos >= len(buffer) or buffer[pos : pos + 1] not in expected:
+        raise ValueError(
+            f"Invalid JSON at byte {pos}: expected one of {expected!r}"
+        )
+    return pos + 1
+
+
+def _skip_json_value(buffer: bytes, pos: int) -> int:
+    """Get the position just after the JSON value at pos, without decoding it.
+
+    Objects and arrays are skipped by counting brackets, ignoring any inside
+    strings, so the value is never decoded. The value itself is only
+    checked as far as is needed to find its end.
+    """
+    pos = _skip_json_whitespace(buffer, pos)
+    opening = buffer[pos : pos + 1]
+    if opening == b'"':
+        match = _JSON_STRING.match(buffer, pos)
+        if match is None:
+            raise ValueError(f"Unterminated JSON string at byte {pos}")
+        return match.end()
+    if opening not in (b"[", b"{"):
+        return _JSON_SCALAR.match(buffer, pos).end()
+    depth = 0
+    for match in _JSON_STRUCTURE.finditer(buffer, pos):
+        token = match.group()
+        if token[:1] == b'"':
+            continue
+        depth += 1 if token in (b"[", b"{") else -1
+        if depth == 0:
+            return match.end()
+    raise ValueError(f"Unterminated JSON value at byte {pos}")
+
+
+def _iter_json_array(buffer: bytes, pos: int) -> Iterator[Tuple[Any, int]]:
+    """Decode the elements of the JSON array at pos one at a time.
+
+    Yields each element with the position just after it, so that only one
+    element needs to be in memory at a time.
+    """
+    pos = _expect_json_character(buffer, pos, b"[")
+    if buffer[_skip_json_whitespace(buffer, pos)] == ord("]"):
+        return
+    while True:
+        start = _skip_json_whitespace(buffer, pos)
+        pos = _skip_json_value(buffer, start)
+        yield json.loads(buffer[start:pos]), pos
+        pos = _skip_json_whitespace(buffer, pos)
+        if buffer[pos] == ord("]"):
+            return
+        pos = _expect_json_character(buffer, pos, b",")
+
+
+class LazyFluxomicsDataset:
+    """
+    A fluxomics dataset JSON file whose sections are loaded on first access.
+
+    The file is memory-mapped rather than read, so only the pages that are
+    scanned or decoded are brought into memory, and the operating system
+    can drop them again. Each top-level section of the file
+    (reaction_network, tracers, tracer_experiments, flux_measurements and
+    mid_measurements) is decoded and validated only when the matching
+    attribute is first used.
+
+    Sections are located by scanning the top-level object no further than
+    needed. Sections before the one wanted are skipped by counting brackets
+    outside of strings, which reads their bytes but does not decode them,
+    so a job that only uses the reaction network never decodes the
+    measurements.
+
+    If experiment_ids is given, the tracer experiments and measurements are
+    filtered while their arrays are decoded one element at a time, so
+    measurements of other experiments are never validated or kept.
+
+    Parameters
+    ----------
+    filename : Path
+        A JSON file written by export_fluxomics_dataset_to_json.
+    experiment_ids : Optional[Iterable[str]]
+        If given, only keep tracer experiments and measurements of these
+        experiments.
+
+    Methods
+    -------
+    to_fluxomics_dataset()
+        Load every section into a FluxomicsDataset.
+    """
+
+    def __init__(
+        self, filename: Path, experiment_ids: Optional[Iterable[str]] = None
+    ):
+        with open(filename, "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                raise ValueError(f"Dataset file {filename} is empty.")
+            self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.experiment_ids = (
+            None if experiment_ids is None else set(experiment_ids)
+        )
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._scan_position = _expect_json_character(self._buffer, 0, b"{")
+        self._scan_finished = False
+
+    def __repr__(self):
+        """Return a string representation of the lazy dataset."""
+        loaded = [s for s in FLUXOMICS_DATASET_SECTIONS if s in self.__dict__]
+        return f"<LazyFluxomicsDataset loaded_sections={loaded}>"
+
+    def _locate(self, section: str) -> Tuple[int, int]:
+        """Find where a top-level section's value starts and ends."""
+        buffer = self._buffer
+        while section not in self._spans and not self._scan_finished:
+            pos = _skip_json_whitespace(buffer, self._scan_position)
+            if buffer[pos : pos + 1] == b"}":
+                self._scan_finished = True
+                break
+            key_end = _skip_json_value(buffer, pos)
+            key = json.loads(buffer[pos:key_end])
+            start = _skip_json_whitespace(
+                buffer, _expect_json_character(buffer, key_end, b":")
+            )
+            end = _skip_json_value(buffer, start)
+            self._spans[key] = (start, end)
+            self._scan_position = _expect_json_character(buffer, end, b",}")
+            self._scan_finished = buffer[self._scan_position - 1] == ord("}")
+        if section not in self._spans:
+            raise ValueError(f"Section {section} not found in dataset file.")
+        return self._spans[section]
+
+    def _iter_section(self, section: str) -> Iterator[Dict[str, Any]]:
+        """Decode the elements of a list section one at a time."""
+        start, _ = self._locate(section)
+        for element, _ in _iter_json_array(self._buffer, start):
+            if (
+                self.experiment_ids is None
+                or element["experiment_id"] in self.experiment_ids
+            ):
+                yield element
+
+    @functools.cached_property
+    def reaction_network(self) -> ReactionNetwork:
+        """Get the reaction network."""
+        start, end = self._locate("reaction_network")
+        return ReactionNetwork.model_validate_json(self._buffer[start:end])
+
+    @functools.cached_property
+    def tracers(self) -> List[Tracer]:
+        """Get the tracers."""
+        start, _ = self._locate("tracers")
+        return [
+            Tracer.model_validate(t)
+            for t, _ in _iter_json_array(self._buffer, start)
+        ]
+
+    @functools.cached_property
+    def tracer_experiments(self) -> List[TracerExperiment]:
+        """Get the tracer experiments."""
+        return [
+            TracerExperiment.model_validate(t)
+            for t in self._iter_section("tracer_experiments")
+        ]
+
+    @functools.cached_property
+    def flux_measurements(self) -> List[FluxMeasurement]:
+        """Get the flux measurements."""
+        return [
+            FluxMeasurement.model_validate(m)
+            for m in self._iter_section("flux_measurements")
+        ]
+
+    @functools.cached_property
+    def mid_measurements(self) -> List[MIDMeasurement]:
+        """Get the MID measurements."""
+        return [
+            MIDMeasurement.model_validate(m)
+            for m in self._iter_section("mid_measurements")
+        ]
+
+    def to_fluxomics_dataset(self) -> FluxomicsDataset:
+        """Load every section into a FluxomicsDataset."""
+        return FluxomicsDataset(
+            **{s: getattr(self, s) for s in FLUXOMICS_DATASET_SECTIONS}
+        )
+
+
+def import_fluxomics_dataset_sections(
+    filename: Path,
+    sections: Iterable[str] = FLUXOMICS_DATASET_SECTIONS,
+    experiment_ids: Optional[Iterable[str]] = None,
+) -> LazyFluxomicsDataset:
+    """
+    Import only some sections of a FluxomicsDataset JSON file.
+
+    Parameters
+    ----------
+    filename : Path
+        The path of the JSON file to be imported.
+    sections : Iterable[str]
+        The top-level sections to load now, e.g. ["reaction_network"]. Other
+        sections are loaded if and when they are accessed.
+    experiment_ids : Optional[Iterable[str]]
+        If given, only keep tracer experiments and measurements of these
+        experiments.
+
+    Returns
+    -------
+    LazyFluxomicsDataset
+        The dataset, with the requested sections loaded.
+    """
+    dataset = LazyFluxomicsDataset(filename, experiment_ids=experiment_ids)
+    for section in sections:
+        if section not in FLUXOMICS_DATASET_SECTIONS:
+            raise ValueError(f"Unknown fluxomics dataset section {section}.")
+        getattr(dataset, section)
+    return dataset
+
+
+def _align(n: int) -> int:
+    """Round n up to a multiple of the binary dataset alignment."""
+    return -(-n // BINARY_DATASET_ALIGNMENT) * BINARY_DATASET_ALIGNMENT
+
+
+def _measurement_store_parts(
+    store: Union[FluxMeasurementArray, MIDMeasurementArray],
+) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """Split a columnar store into its id tables and its numeric arrays."""
+    tables, arrays = {}, {}
+    for name in type(store).model_fields:
+        value = getattr(store, name)
+        if isinstance(value, np.ndarray):
+            arrays[name] = value
+        else:
+            tables[name] = value
+    return tables, arrays
+
+
+def export_fluxomics_dataset_to_binary(
+    dataset: FluxomicsDataset, filename: Path
+):
+    """
+    Export a FluxomicsDataset instance to a memory-mappable binary file.
+
+    The file starts with BINARY_DATASET_MAGIC, the length of a JSON header as
+    a little-endian uint64, and the header itself. The header holds the
+    reaction network, tracers, tracer experiments, the id tables of the
+    measurements and a directory of the numeric measurement arrays. The
+    arrays follow as raw buffers, each starting on a 64 byte boundary, so
+    that they can be opened with numpy.memmap.
+
+    Parameters
+    ----------
+    dataset : FluxomicsDataset
+        The FluxomicsDataset instance to be exported.
+    filename : Path
+        The path of the file where the data will be saved.
+    """
+    columnar = dataset.to_columnar()
+    header = columnar.model_dump(
+        mode="json",
+        include={"reaction_network", "tracers", "tracer_experiments"},
+    )
+    header["arrays"] = {}
+    buffers = []
+    position = 0
+    for field in ["flux_measurements", "mid_measurements"]:
+        tables, arrays = _measurement_store_parts(getattr(columnar, field))
+        header[field] = tables
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            header["arrays"][f"{field}.{name}"] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": position,
+            }
+            buffers.append((position, array))
+            position = _align(position + array.nbytes)
+    header_bytes = json.dumps(header).encode("utf-8")
+    data_start = _align(len(BINARY_DATASET_MAGIC) + 8 + len(header_bytes))
+    with open(filename, "wb") as file:
+        file.write(BINARY_DATASET_MAGIC)
+        file.write(np.uint64(len(header_bytes)).astype("<u8").tobytes())
+        file.write(header_bytes)
+        for offset, array in buffers:
+            file.seek(data_start + offset)
+            file.write(array.tobytes())
+        file.truncate(data_start + position)
+
+
+def import_fluxomics_dataset_from_binary(
+    filename: Path, mmap: bool = True
+) -> FluxomicsDataset:
+    """
+    Import a FluxomicsDataset instance from a binary file.
+
+    The numeric measurement arrays are not copied or validated: with
+    mmap=True they are read-only numpy.memmap views of the file, so opening
+    a large dataset is nearly instant.
+
+    Parameters
+    ----------
+    filename : Path
+        The path of a file written by export_fluxomics_dataset_to_binary.
+    mmap : bool
+        Whether to memory-map the measurement arrays rather than read them
+        into memory.
+
+    Returns
+    -------
+    FluxomicsDataset
+        The imported FluxomicsDataset instance, with columnar measurement
+        stores.
+    """
+    with open(filename, "rb") as file:
+        magic = file.read(len(BINARY_DATASET_MAGIC))
+        if magic != BINARY_DATASET_MAGIC:
+            raise ValueError(f"{filename} is not a binary fluxomics dataset.")
+        header_length = int(np.frombuffer(file.read(8), dtype="<u8")[0])
+        header = json.loads(file.read(header_length).decode("utf-8"))
+    data_start = _align(len(BINARY_DATASET_MAGIC) + 8 + header_length)
+    stores: Dict[str, Dict[str, Any]] = {
+        "flux_measurements": dict(header["flux_measurements"]),
+        "mid_measurements": dict(header["mid_measurements"]),
+    }
+    for key, spec in header["arrays"].items():
+        field, name = key.split(".")
+        dtype, shape = np.dtype(spec["dtype"]), tuple(spec["shape"])
+        if int(np.prod(shape)) == 0:
+            array = np.empty(shape, dtype=dtype)
+        elif mmap:
+            array = np.memmap(
+                filename,
+                dtype=dtype,
+                mode="r",
+                offset=data_start + spec["offset"],
+                shape=shape,
+            )
+        else:
+            array = np.fromfile(
+                filename,
+                dtype=dtype,
+                count=int(np.prod(shape)),
+                offset=data_start + spec["offset"],
+            ).reshape(shape)
+        stores[field][name] = array
+    return FluxomicsDataset(
+        reaction_network=ReactionNetwork.model_validate(
+            header["reaction_network"]
+        ),
+        tracers=header["tracers"],
+        tracer_experiments=header["tracer_experiments"],
+        flux_measurements=FluxMeasurementArray.model_construct(
+            **stores["flux_measurements"]
+        ),
+        mid_measurements=MIDMeasurementArray.model_construct(
+            **stores["mid_measurements"]
+        ),
+    )
@@ -21,19 +21,28 @@ PROBS = [
     (0.8, 0.2),
     (0.3, 0.5, 0.2),
 ]
-y = []
-
-for p_i in PROBS:
-    trans_i = clr(p_i)
-    y_trans_i = np.random.normal(trans_i, scale=SIGMA)
-    y_i = list(clr_inv(y_trans_i))
-    y += y_i
+y_sizes = np.array([len(p_i) for p_i in PROBS])
+y_end = np.cumsum(y_sizes)
+y_start = y_end - y_sizes + 1
+y = np.concatenate(
+    [clr_inv(np.random.normal(clr(p_i), scale=SIGMA)) for p_i in PROBS]
+)
 
 data = {
     "N": len(y),
     "N_measurement": N_MEASUREMENT,
-    "y_sizes": [len(p_i) for p_i in PROBS],
-    "stacked_y": y,
+    "y_sizes": y_sizes.tolist(),
+    "y_start": y_start.tolist(),
+    "y_end": y_end.tolist(),
+    "stacked_y": y.tolist(),
+    "N_test": 0,
+    "N_measurement_test": 0,
+    "y_start_test": [],
+    "y_end_test": [],
+    "stacked_y_test": [],
+    "y_pred_test": [],
+    "likelihood": 1,
+    "yhat_prior": 0,
 }
 print(HERE)
 model = CmdStanModel(stan_file=HERE / "stan" / "ragged_comp_demo.stan")
@@ -9,25 +9,97 @@ For the original paper see here:
 
 """
 
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Mapping, Tuple, Union
 
+import numpy as np
 import pandas as pd
+from numpy.typing import ArrayLike
+from scipy import sparse
+from scipy.linalg import lu_factor, lu_solve
+from scipy.sparse.linalg import splu
 
-from cmfa.fluxomics_data.emu_map import EMUMap, EMUReaction
-from cmfa.fluxomics_data.fluxomics_dataset import FluxomicsDataset
-from cmfa.fluxomics_data.reaction import Reaction
+from cmfa.convolution import convolve, convolve_indexed
+from cmfa.fluxomics_data.atom_transition import ReactionAtomMap
+from cmfa.fluxomics_data.emu_map import EMU, EMUMap, EMUReaction
 from cmfa.fluxomics_data.reaction_network import ReactionNetwork
 
+type EMUKey = Tuple[str, Tuple[int, ...]]
+type EMUSource = Tuple[Tuple[EMUKey, ...], float]
+
+SPARSE_LEVEL_SIZE = 64
+DENSE_BATCH_ENTRIES = 2**22
+
+
+class _AtomMapLists:
+    """The arrays of a ReactionAtomMap as lists, for fast scalar lookups."""
+
+    def __init__(self, atom_map: ReactionAtomMap):
+        self.reaction_id = atom_map.reaction_id
+        self.reactant_ids = atom_map.reactant_ids
+        self.product_ids = atom_map.product_ids
+        self.product_coefficients = atom_map.product_coefficients.tolist()
+        self.product_offsets = atom_map.product_offsets.tolist()
+        self.variants = list(
+            zip(
+                atom_map.variant_weights.tolist(),
+                atom_map.reactant_index.tolist(),
+                atom_map.reactant_position.tolist(),
+            )
+        )
+
+
+def _emu_sources(
+    atom_map: _AtomMapLists, product: int, atoms: Tuple[int, ...]
+) -> List[EMUSource]:
+    """Get the reactant EMUs and coefficient of each way to make an EMU.
+
+    There is one way per variant of the atom map. The atoms of the EMU are
+    1-based positions in the given product of the atom map.
+    """
+    offset = atom_map.product_offsets[product]
+    size = atom_map.product_offsets[product + 1] - offset
+    if atoms[-1] > size:
+        raise ValueError(
+            f"Atom {atoms[-1]} is out of range for the {size} atoms of "
+            f"{atom_map.product_ids[product]} in reaction "
+            f"{atom_map.reaction_id}."
+        )
+    coefficient = atom_map.product_coefficients[product]
+    sources = []
+    for weight, reactant_index, reactant_position in atom_map.variants:
+        parts: Dict[int, List[int]] = {}
+        for atom in atoms:
+            j = offset + atom - 1
+            parts.setdefault(reactant_index[j], []).append(
+                reactant_position[j] + 1
+            )
+        reactants = tuple(
+            sorted(
+                (atom_map.reactant_ids[i], tuple(sorted(positions)))
+                for i, positions in parts.items()
+            )
+        )
+        sources.append((reactants, coefficient * weight))
+    return sources
+
 
 def decompose_network(
-    initial_emu: Dict[str, list[int]], reaction_network: ReactionNetwork
-):
+    measured_emus: Iterable[EMU], reaction_network: ReactionNetwork
+) -> EMUMap:
     """
-    Decompose the Reaction network based on an initial EMU.
+    Decompose the Reaction network based on the measured EMUs.
+
+    Starting from the measured EMUs, the network is walked backwards: each
+    EMU is decomposed into the reactant EMUs of every reaction direction
+    that produces it, and each reactant EMU is decomposed in turn unless it
+    has already been visited. The cost is therefore proportional to the
+    number of reachable EMUs. Identical EMU reactions, for example from the
+    orientations of a symmetric compound, are merged by adding their
+    coefficients.
 
     Parameters
     ----------
-    initial_emu : Dict[str]
+    measured_emus : Iterable[EMU]
         The starting point of decomposing network for EMUs.
 
     reaction_network : ReactionNetwork
@@ -36,54 +108,689 @@ def decompose_network(
     Returns
     -------
     EMUMap
+        The EMU reactions grouped by EMU size.
     """
-    return []
+    atom_maps = reaction_network.atom_transition_network.atom_maps
+    producers: Dict[str, List[Tuple[_AtomMapLists, int]]] = {}
+    for atom_map in map(_AtomMapLists, atom_maps):
+        for product, compound in enumerate(atom_map.product_ids):
+            producers.setdefault(compound, []).append((atom_map, product))
+    measured = list(
+        dict.fromkeys((e.compound_id, e.atoms) for e in measured_emus)
+    )
+    seen = set(measured)
+    stack = list(measured)
+    inputs = set()
+    merged: Dict[Tuple[str, EMUKey, Tuple[EMUKey, ...]], float] = {}
+    while stack:
+        key = stack.pop()
+        compound, atoms = key
+        if compound not in producers:
+            inputs.add(key)
+            continue
+        for atom_map, product in producers[compound]:
+            for reactants, coefficient in _emu_sources(
+                atom_map, product, atoms
+            ):
+                reaction_key = (atom_map.reaction_id, key, reactants)
+                merged[reaction_key] = (
+                    merged.get(reaction_key, 0.0) + coefficient
+                )
+                for reactant in reactants:
+                    if reactant not in seen:
+                        seen.add(reactant)
+                        stack.append(reactant)
+    emus = {
+        key: EMU(compound_id=key[0], atoms=key[1])
+        for key in sorted(seen, key=lambda k: (len(k[1]), k))
+    }
+    emu_reactions = [
+        EMUReaction(
+            reaction_id=reaction_id,
+            emu_size=len(product[1]),
+            product=emus[product],
+            reactants=tuple(emus[r] for r in reactants),
+            coefficient=coefficient,
+        )
+        for (reaction_id, product, reactants), coefficient in sorted(
+            merged.items(),
+            key=lambda item: (len(item[0][1][1]), item[0][1:], item[0][0]),
+        )
+    ]
+    return EMUMap(
+        emu_reactions=emu_reactions,
+        measured_emus=[emus[key] for key in measured],
+        input_emus=[emu for key, emu in emus.items() if key in inputs],
+    )
 
 
-def determine_emus(reaction: Reaction) -> List:
+def determine_emus(
+    atom_map: ReactionAtomMap, emu: EMU
+) -> List[Tuple[Tuple[EMU, ...], float]]:
     """
-    Determine the EMUs in a given reaction.
+    Determine the reactant EMUs that make an EMU in one reaction direction.
 
     Parameters
     ----------
-    reaction : Reaction
-        The reaction to analyze.
+    atom_map : ReactionAtomMap
+        The atom map of the reaction direction to analyze.
+    emu : EMU
+        The product EMU.
 
     Returns
     -------
-    List
-        A list of EMUs involved in the reaction.
+    List[Tuple[Tuple[EMU, ...], float]]
+        The reactant EMUs and coefficient of each way that the reaction
+        direction makes the EMU.
     """
-    return []
+    lists = _AtomMapLists(atom_map)
+    return [
+        (tuple(EMU(compound_id=c, atoms=a) for c, a in reactants), coefficient)
+        for product, compound in enumerate(lists.product_ids)
+        if compound == emu.compound_id
+        for reactants, coefficient in _emu_sources(lists, product, emu.atoms)
+    ]
 
 
-def create_emu_reaction(reaction: Reaction, emu) -> EMUReaction:
+def create_emu_reaction(
+    atom_map: ReactionAtomMap, emu: EMU
+) -> List[EMUReaction]:
     """
-    Create an EMUReaction based on a reaction and an EMU.
+    Create the EMUReactions of a reaction direction that make an EMU.
 
     Parameters
     ----------
-    reaction : Reaction
-        The reaction from which the EMUReaction is derived.
-    emu
-        The EMU for which the EMUReaction is created.
+    atom_map : ReactionAtomMap
+        The atom map of the reaction direction.
+    emu : EMU
+        The EMU for which the EMUReactions are created.
 
     Returns
     -------
-    EMUReaction
-        The created EMUReaction.
+    List[EMUReaction]
+        The created EMUReactions, one per distinct set of reactant EMUs.
+    """
+    merged: Dict[Tuple[EMU, ...], float] = {}
+    for reactants, coefficient in determine_emus(atom_map, emu):
+        merged[reactants] = merged.get(reactants, 0.0) + coefficient
+    return [
+        EMUReaction(
+            reaction_id=atom_map.reaction_id,
+            emu_size=emu.size,
+            product=emu,
+            reactants=reactants,
+            coefficient=coefficient,
+        )
+        for reactants, coefficient in merged.items()
+    ]
+
+
+def _fill_reducing_order(
+    num_emus: int, rows: np.ndarray, cols: np.ndarray
+) -> np.ndarray:
+    """Get an order of a block's EMUs that reduces fill-in during LU.
+
+    The order only depends on the sparsity pattern of the block's matrix, so
+    it is computed once from a diagonally dominant matrix with that pattern.
+    """
+    sample = sparse.csc_matrix(
+        (-np.ones(len(rows)), (rows, cols)), shape=(num_emus, num_emus)
+    )
+    sample.setdiag(np.bincount(rows, minlength=num_emus) + 1.0)
+    lu = splu(sample, permc_spec="MMD_AT_PLUS_A", diag_pivot_thresh=0.0)
+    return np.argsort(lu.perm_c)
+
+
+class _LevelPlan:
+    """The compiled assembly plan of one EMU size level's system A X = B Y.
+
+    X holds the MIDs of the level's produced EMUs, which occupy the first
+    num_emus slots of the level's store. They are ordered block by block in
+    solve order, and within each block in a fill-reducing order, so A is
+    block lower triangular and its LU factorization only fills in within
+    the blocks.
+
+    The nonzero entries of A are stored in compressed sparse column order at
+    positions data of the plan's matrix data. The external EMU reactions,
+    whose reactants are input EMUs or several smaller EMUs, make up B Y.
+    Their weights are at positions external of the plan's external weights,
+    the ones with an input EMU reactant first and then the convolutions,
+    grouped by reactant sizes.
+
+    For flux sensitivities, the plan also records which entries of A and of
+    B Y the derivative with respect to each flux touches.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        num_emus: int,
+        data_start: int,
+        indices: np.ndarray,
+        indptr: np.ndarray,
+        external_start: int,
+        external_rows: List[int],
+        input_slots: List[int],
+        conv_groups: Dict[Tuple[int, ...], List[List[int]]],
+    ):
+        m = num_emus
+        self.size = size
+        self.num_emus = m
+        self.data = slice(data_start, data_start + len(indices))
+        self.indices = indices
+        self.indptr = indptr
+        self.columns = np.repeat(np.arange(m), np.diff(indptr))
+        self.dense_index = indices * m + self.columns
+        self.external = slice(
+            external_start, external_start + len(external_rows)
+        )
+        self.external_rows = np.asarray(external_rows, dtype=np.int64)
+        self.input_slots = np.asarray(input_slots, dtype=np.int64)
+        self.conv_groups = [
+            (sizes, [np.asarray(s, dtype=np.int64) for s in reactant_slots])
+            for sizes, reactant_slots in conv_groups.items()
+        ]
+        width = size + 1
+        self.rhs_index = (
+            self.external_rows[:, None] * width + np.arange(width)
+        ).ravel()
+
+    def add_flux_derivatives(
+        self,
+        matrix_entries: sparse.coo_matrix,
+        external_entries: sparse.coo_matrix,
+    ):
+        """Record the derivatives of A and of the external weights.
+
+        The entries are the level's rows of the plan's matrix map and
+        external map. Each derivative is stored as the flux-major row of the
+        derivative system it goes to, the column of X or row of Y it
+        multiplies, and its value.
+        """
+        m = self.num_emus
+        self.matrix_derivatives = (
+            matrix_entries.col.astype(np.int64) * m
+            + self.indices[matrix_entries.row],
+            self.columns[matrix_entries.row],
+            matrix_entries.data,
+        )
+        self.external_derivatives = (
+            external_entries.col.astype(np.int64) * m
+            + self.external_rows[external_entries.row],
+            external_entries.row.astype(np.int64),
+            external_entries.data,
+        )
+
+
+class _SimulationPlan:
+    """The assembly plan for simulating the MIDs of an EMU map.
+
+    The plan is compiled once per EMU map, so that simulating a flux vector
+    does not rediscover any sparsity pattern. The matrix data of every
+    level's A is matrix_map @ fluxes and the weights of the EMU reactions
+    that make up the right hand sides are external_map @ fluxes, so
+    assembling all the systems costs two sparse products. The EMUs are put
+    in a fill-reducing order at compile time, so that each flux vector only
+    needs a numeric LU factorization per level.
+
+    The MIDs of the EMUs of each size are kept in one array per size, with
+    a slot per EMU: first the produced EMUs, in the order of their level's
+    system, and then the input EMUs.
+    """
+
+    def __init__(self, emu_map: EMUMap):
+        slot: Dict[EMU, int] = {}
+        self.store_sizes: Dict[int, int] = {}
+        for block in emu_map.blocks:
+            order = np.arange(len(block.emus))
+            if len(block.emus) > 2:
+                local = {emu: i for i, emu in enumerate(block.emus)}
+                internal = [
+                    emu_map.emu_reactions[i]
+                    for i in block.reaction_indices
+                    if emu_map.emu_reactions[i].reactants[0] in local
+                ]
+                order = _fill_reducing_order(
+                    len(block.emus),
+                    np.array([local[r.product] for r in internal]),
+                    np.array([local[r.reactants[0]] for r in internal]),
+                )
+            for i in order:
+                emu = block.emus[i]
+                slot[emu] = self.store_sizes.get(emu.size, 0)
+                self.store_sizes[emu.size] = slot[emu] + 1
+        num_produced = dict(self.store_sizes)
+        inputs = set(emu_map.input_emus)
+        for emu in emu_map.input_emus:
+            slot[emu] = self.store_sizes.get(emu.size, 0)
+            self.store_sizes[emu.size] = slot[emu] + 1
+        flux_position = {f: i for i, f in enumerate(emu_map.flux_ids)}
+        num_data = 0
+        matrix_coo: Tuple[List, List, List] = ([], [], [])
+        external_coo: Tuple[List, List, List] = ([], [], [])
+        self.levels: List[_LevelPlan] = []
+        for size in emu_map.sizes:
+            m = num_produced[size]
+            emu_reactions = emu_map.levels[size]
+            internal = [
+                r
+                for r in emu_reactions
+                if len(r.reactants) == 1 and r.reactants[0] not in inputs
+            ]
+            external = [
+                r
+                for r in emu_reactions
+                if len(r.reactants) > 1 or r.reactants[0] in inputs
+            ]
+            external.sort(
+                key=lambda r: (len(r.reactants), [e.size for e in r.reactants])
+            )
+            # A has the inflow of each EMU on its diagonal, minus the
+            # weights of the internal EMU reactions off the diagonal
+            entries = [
+                (slot[r.product], slot[r.product], 1.0, r)
+                for r in emu_reactions
+            ] + [
+                (slot[r.product], slot[r.reactants[0]], -1.0, r)
+                for r in internal
+            ]
+            pattern = sparse.csc_matrix(
+                (
+                    np.ones(len(entries)),
+                    ([e[0] for e in entries], [e[1] for e in entries]),
+                ),
+                shape=(m, m),
+            )
+            pattern.sum_duplicates()
+            pattern.sort_indices()
+            data_start = num_data
+            num_data += pattern.nnz
+            column_of = np.repeat(np.arange(m), np.diff(pattern.indptr))
+            data_slot = {
+                entry: data_start + k
+                for k, entry in enumerate(
+                    zip(pattern.indices.tolist(), column_of.tolist())
+                )
+            }
+            for row, col, sign, emu_reaction in entries:
+                matrix_coo[0].append(data_slot[(row, col)])
+                matrix_coo[1].append(flux_position[emu_reaction.reaction_id])
+                matrix_coo[2].append(sign * emu_reaction.coefficient)
+            external_start = len(external_coo[0])
+            conv_groups: Dict[Tuple[int, ...], List[List[int]]] = {}
+            for emu_reaction in external:
+                external_coo[0].append(len(external_coo[0]))
+                external_coo[1].append(flux_position[emu_reaction.reaction_id])
+                external_coo[2].append(emu_reaction.coefficient)
+                reactants = emu_reaction.reactants
+                if len(reactants) > 1:
+                    group = conv_groups.setdefault(
+                        tuple(e.size for e in reactants),
+                        [[] for _ in reactants],
+                    )
+                    for reactant_slots, reactant in zip(group, reactants):
+                        reactant_slots.append(slot[reactant])
+            self.levels.append(
+                _LevelPlan(
+                    size=size,
+                    num_emus=m,
+                    data_start=data_start,
+                    indices=pattern.indices.astype(np.int64),
+                    indptr=pattern.indptr.astype(np.int64),
+                    external_start=external_start,
+                    external_rows=[slot[r.product] for r in external],
+                    input_slots=[
+                        slot[r.reactants[0]]
+                        for r in external
+                        if len(r.reactants) == 1
+                    ],
+                    conv_groups=conv_groups,
+                )
+            )
+        num_fluxes = len(emu_map.flux_ids)
+        self.matrix_map = sparse.csr_matrix(
+            (matrix_coo[2], (matrix_coo[0], matrix_coo[1])),
+            shape=(num_data, num_fluxes),
+        )
+        self.external_map = sparse.csr_matrix(
+            (external_coo[2], (external_coo[0], external_coo[1])),
+            shape=(len(external_coo[0]), num_fluxes),
+        )
+        for level in self.levels:
+            level.add_flux_derivatives(
+                self.matrix_map[level.data].tocoo(),
+                self.external_map[level.external].tocoo(),
+            )
+        self.input_slots = [
+            (emu, emu.size, slot[emu]) for emu in emu_map.input_emus
+        ]
+        self.measured: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        for row, emu in enumerate(emu_map.measured_emus):
+            rows, slots = self.measured.setdefault(emu.size, ([], []))
+            rows.append(row)
+            slots.append(slot[emu])
+        self.measured = {
+            size: (np.asarray(rows), np.asarray(slots))
+            for size, (rows, slots) in self.measured.items()
+        }
+        self.num_measured = len(emu_map.measured_emus)
+        self.max_measured_size = max(
+            (e.size for e in emu_map.measured_emus), default=0
+        )
+
+
+def _flux_matrix(
+    fluxes: Union[Mapping[str, float], ArrayLike], emu_map: EMUMap
+) -> np.ndarray:
+    """Get fluxes as a 2D array with columns aligned to the map's flux ids.
+
+    A mapping or a 1D array gives a single row.
+    """
+    if isinstance(fluxes, Mapping):
+        fluxes = [fluxes[f] for f in emu_map.flux_ids]
+    elif isinstance(fluxes, pd.DataFrame):
+        fluxes = fluxes[emu_map.flux_ids]
+    fluxes = np.atleast_2d(np.asarray(fluxes, dtype=np.float64))
+    if fluxes.ndim != 2 or fluxes.shape[1] != len(emu_map.flux_ids):
+        raise ValueError(
+            f"Expected {len(emu_map.flux_ids)} fluxes per row, got shape "
+            f"{fluxes.shape}."
+        )
+    return fluxes
+
+
+def _scatter_add(
+    index: np.ndarray, values: np.ndarray, size: int
+) -> np.ndarray:
+    """Sum each draw's values into an array of a size, by position in index.
+
+    The values have a leading draw dimension and the same number of entries
+    per draw as index.
+    """
+    n = len(values)
+    if n > 1:
+        index = (np.arange(n)[:, None] * size + index).ravel()
+    return np.bincount(index, values.ravel(), minlength=n * size).reshape(
+        n, size
+    )
+
+
+def _solve_level(
+    level: _LevelPlan, data: np.ndarray, rhs: np.ndarray
+) -> np.ndarray:
+    """Solve a level's balance equations for the MIDs of its EMUs.
+
+    The matrix data and right hand sides have a leading draw dimension.
+    Small levels are solved with stacked dense solves and large ones with a
+    sparse LU factorization per draw, in a Python loop. SuperLU cannot reuse
+    a symbolic factorization, so only the plan's fill-reducing EMU order is
+    shared between the draws of a large level.
+    """
+    m = level.num_emus
+    out = np.empty_like(rhs)
+    if m <= SPARSE_LEVEL_SIZE:
+        step = max(1, DENSE_BATCH_ENTRIES // (m * m))
+        for start in range(0, len(data), step):
+            chunk = slice(start, start + step)
+            a = np.zeros((len(data[chunk]), m * m))
+            a[:, level.dense_index] = data[chunk]
+            out[chunk] = np.linalg.solve(a.reshape(-1, m, m), rhs[chunk])
+        return out
+    for draw in range(len(data)):
+        out[draw] = _factorize_level(level, data[draw])(rhs[draw])
+    return out
+
+
+def _factorize_level(
+    level: _LevelPlan, data: np.ndarray
+) -> Callable[[np.ndarray], np.ndarray]:
+    """Factorize one draw's A of a level and get a function that solves it.
+
+    The returned function solves for any 2D right hand side, so the same
+    factorization serves the MIDs and all their flux derivatives.
     """
-    return EMUReaction(...)
+    m = level.num_emus
+    if m <= SPARSE_LEVEL_SIZE:
+        a = np.zeros(m * m)
+        a[level.dense_index] = data
+        lu = lu_factor(a.reshape(m, m), check_finite=False)
+        return lambda b: lu_solve(lu, b, check_finite=False)
+    a = sparse.csc_matrix((data, level.indices, level.indptr), shape=(m, m))
+    # the EMUs are already in a fill-reducing order and A is diagonally
+    # dominant, so pivoting on the diagonal keeps that order
+    return splu(a, permc_spec="NATURAL", diag_pivot_thresh=0.0).solve
+
+
+def _simulate_chunk(
+    fluxes: np.ndarray,
+    plan: _SimulationPlan,
+    input_mids: Mapping[EMU, ArrayLike],
+) -> np.ndarray:
+    """Simulate the measured MIDs for each row of a 2D array of fluxes."""
+    n = len(fluxes)
+    matrix_data = np.ascontiguousarray((plan.matrix_map @ fluxes.T).T)
+    external_weights = np.ascontiguousarray((plan.external_map @ fluxes.T).T)
+    stores = {
+        size: np.empty((n, num_slots, size + 1))
+        for size, num_slots in plan.store_sizes.items()
+    }
+    for emu, size, slot in plan.input_slots:
+        stores[size][:, slot] = input_mids[emu]
+    for level in plan.levels:
+        store = stores[level.size]
+        width = level.size + 1
+        external = [store[:, level.input_slots]]
+        for sizes, reactant_slots in level.conv_groups:
+            external.append(convolve_indexed(stores, sizes, reactant_slots))
+        external = np.concatenate(external, axis=1)
+        external *= external_weights[:, level.external, None]
+        rhs = _scatter_add(
+            level.rhs_index, external, level.num_emus * width
+        ).reshape(n, level.num_emus, width)
+        store[:, : level.num_emus] = _solve_level(
+            level, matrix_data[:, level.data], rhs
+        )
+    out = np.zeros((n, plan.num_measured, plan.max_measured_size + 1))
+    for size, (rows, slots) in plan.measured.items():
+        out[:, rows, : size + 1] = stores[size][:, slots]
+    return out
+
 
+def _simulation_plan(emu_map: EMUMap) -> _SimulationPlan:
+    """Get the cached simulation plan of an EMU map."""
+    return emu_map._cached("simulation_plan", lambda: _SimulationPlan(emu_map))
 
-def emu_simulate(df: FluxomicsDataset):
+
+def emu_simulate(
+    fluxes: Union[Mapping[str, float], ArrayLike],
+    emu_map: EMUMap,
+    input_mids: Mapping[EMU, ArrayLike],
+) -> np.ndarray:
     """Perform the second part of the EMU algorithm.
 
-    Specifically, given a set of fluxes, a list of EMU reactions, and a set of
+    Specifically, given a set of fluxes, a map of EMU reactions, and a set of
     known mass isotopomer distributions (i.e. tracers), find the steady state
-    mass isotopomer distribution vector for any EMU.
+    mass isotopomer distribution vector of every measured EMU.
+
+    The size levels of the EMU map are solved in order. The MID of each EMU
+    is the average of the MIDs that its EMU reactions make, weighted by
+    their fluxes, which gives one linear system A X = B Y per level, where Y
+    holds the input EMUs' MIDs and the convolutions of smaller EMUs' MIDs.
+    The plan for assembling the systems is compiled once per EMU map. It
+    orders each level's EMUs by strongly connected block, so that A is block
+    triangular, and within each block in a fill-reducing order. Small levels
+    are solved densely and large ones with a sparse LU factorization.
+
+    Parameters
+    ----------
+    fluxes : Union[Mapping[str, float], ArrayLike]
+        The flux of each reaction direction, either by id or as an array
+        aligned to emu_map.flux_ids. Reverse directions end with "_rev".
+    emu_map : EMUMap
+        The EMU map.
+    input_mids : Mapping[EMU, ArrayLike]
+        The MID of each of the map's input EMUs.
+
+    Returns
+    -------
+    np.ndarray
+        The simulated MID of each measured EMU, in the order of
+        emu_map.measured_emus, padded with zeros to the largest size.
+    """
+    fluxes = _flux_matrix(fluxes, emu_map)
+    if len(fluxes) != 1:
+        raise ValueError("Use emu_simulate_batch for several flux vectors.")
+    return _simulate_chunk(fluxes, _simulation_plan(emu_map), input_mids)[0]
 
-    Questions:
 
-     - what should the return value be?
+def emu_simulate_batch(
+    fluxes: Union[pd.DataFrame, ArrayLike],
+    emu_map: EMUMap,
+    input_mids: Mapping[EMU, ArrayLike],
+    chunk_size: int = 1000,
+) -> np.ndarray:
+    """Simulate the measured MIDs for many flux vectors at once.
+
+    This is equivalent to calling emu_simulate for each flux vector, but the
+    linear systems of all the draws in a chunk are assembled together, and
+    those of levels with at most SPARSE_LEVEL_SIZE EMUs are solved together
+    with stacked dense linear algebra. Larger levels are factorized once
+    per draw, so for maps where they dominate the cost this is little
+    faster than calling emu_simulate repeatedly. Only one chunk of
+    intermediate MIDs is in memory at a time.
+
+    Parameters
+    ----------
+    fluxes : Union[pd.DataFrame, ArrayLike]
+        A draws by reaction directions array of fluxes, with columns aligned
+        to emu_map.flux_ids, or a DataFrame with a column per flux id.
+    emu_map : EMUMap
+        The EMU map.
+    input_mids : Mapping[EMU, ArrayLike]
+        The MID of each of the map's input EMUs.
+    chunk_size : int
+        The number of draws to simulate together.
+
+    Returns
+    -------
+    np.ndarray
+        A draws by measured EMUs by mass isotopomers array of simulated MIDs,
+        padded with zeros to the largest size.
+    """
+    fluxes = _flux_matrix(fluxes, emu_map)
+    plan = _simulation_plan(emu_map)
+    out = np.empty((len(fluxes), plan.num_measured, plan.max_measured_size + 1))
+    for start in range(0, len(fluxes), chunk_size):
+        chunk = slice(start, start + chunk_size)
+        out[chunk] = _simulate_chunk(fluxes[chunk], plan, input_mids)
+    return out
+
+
+def emu_simulate_with_jacobian(
+    fluxes: Union[Mapping[str, float], ArrayLike],
+    emu_map: EMUMap,
+    input_mids: Mapping[EMU, ArrayLike],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Simulate the measured MIDs and their derivatives with respect to fluxes.
+
+    The derivatives are propagated forwards through the size levels. Taking
+    the derivative of a level's system A X = B Y with respect to flux j gives
+
+        A dX/dv_j = dB/dv_j Y + B dY/dv_j - dA/dv_j X,
+
+    where dY/dv_j comes from the derivatives of smaller EMUs by the product
+    rule for convolutions. A is the same for every flux, so the derivative
+    systems of all the fluxes are solved together as extra right hand side
+    columns, reusing the factorization of A that gives the MIDs. The cost is
+    therefore about one extra solve per level rather than one simulation
+    per flux.
+
+    Parameters
+    ----------
+    fluxes : Union[Mapping[str, float], ArrayLike]
+        The flux of each reaction direction, either by id or as an array
+        aligned to emu_map.flux_ids. Reverse directions end with "_rev".
+    emu_map : EMUMap
+        The EMU map.
+    input_mids : Mapping[EMU, ArrayLike]
+        The MID of each of the map's input EMUs.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        The simulated MIDs as returned by emu_simulate, and a measured EMUs
+        by mass isotopomers by fluxes array of their derivatives, with
+        fluxes in the order of emu_map.flux_ids.
     """
+    fluxes = _flux_matrix(fluxes, emu_map)
+    if len(fluxes) != 1:
+        raise ValueError("Expected a single flux vector.")
+    plan = _simulation_plan(emu_map)
+    k = fluxes.shape[1]
+    matrix_data = plan.matrix_map @ fluxes[0]
+    external_weights = plan.external_map @ fluxes[0]
+    stores = {
+        size: np.empty((num_slots, size + 1))
+        for size, num_slots in plan.store_sizes.items()
+    }
+    # derivatives are flux-major, so that convolutions broadcast over fluxes
+    derivatives = {
+        size: np.zeros((k, num_slots, size + 1))
+        for size, num_slots in plan.store_sizes.items()
+    }
+    for emu, size, slot in plan.input_slots:
+        stores[size][slot] = input_mids[emu]
+    for level in plan.levels:
+        m = level.num_emus
+        width = level.size + 1
+        store = stores[level.size]
+        external = [store[level.input_slots]]
+        d_external = [np.zeros((k, len(level.input_slots), width))]
+        for sizes, reactant_slots in level.conv_groups:
+            mids = stores[sizes[0]][reactant_slots[0]]
+            d_mids = derivatives[sizes[0]][:, reactant_slots[0]]
+            for size, slots in zip(sizes[1:], reactant_slots[1:]):
+                other = stores[size][slots]
+                d_other = derivatives[size][:, slots]
+                d_mids = convolve(d_mids, other) + convolve(mids, d_other)
+                mids = convolve(mids, other)
+            external.append(mids)
+            d_external.append(d_mids)
+        external = np.concatenate(external)
+        d_external = np.concatenate(d_external, axis=1)
+        weights = external_weights[level.external]
+        rhs = _scatter_add(
+            level.rhs_index, (external * weights[:, None])[None], m * width
+        ).reshape(m, width)
+        solve = _factorize_level(level, matrix_data[level.data])
+        x = solve(rhs)
+        store[:m] = x
+        # the derivative right hand sides of all fluxes, stacked flux-major
+        d_rhs = _scatter_add(
+            level.rhs_index, d_external * weights[:, None], m * width
+        ).reshape(k * m, width)
+        targets = np.concatenate(
+            [level.external_derivatives[0], level.matrix_derivatives[0]]
+        )
+        values = np.concatenate(
+            [
+                level.external_derivatives[2][:, None]
+                * external[level.external_derivatives[1]],
+                -level.matrix_derivatives[2][:, None]
+                * x[level.matrix_derivatives[1]],
+            ]
+        )
+        d_rhs += np.bincount(
+            (targets[:, None] * width + np.arange(width)).ravel(),
+            values.ravel(),
+            minlength=k * m * width,
+        ).reshape(k * m, width)
+        d_rhs = d_rhs.reshape(k, m, width).transpose(1, 0, 2)
+        d_x = solve(d_rhs.reshape(m, k * width)).reshape(m, k, width)
+        derivatives[level.size][:, :m] = d_x.transpose(1, 0, 2)
+    mids = np.zeros((plan.num_measured, plan.max_measured_size + 1))
+    jacobian = np.zeros((k, plan.num_measured, plan.max_measured_size + 1))
+    for size, (rows, slots) in plan.measured.items():
+        mids[rows, : size + 1] = stores[size][slots]
+        jacobian[:, rows, : size + 1] = derivatives[size][:, slots]
+    return mids, jacobian.transpose(1, 2, 0)
@@ -0,0 +1,214 @@
+"""atom_pattern_graph.py includes a sparse graph of atom pattern transitions."""
+
+from functools import cached_property
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ConfigDict
+from scipy import sparse
+
+from cmfa.fluxomics_data.reaction import Reaction
+
+type AtomPatternNode = Tuple[str, str]
+
+
+class AtomPatternGraph(BaseModel):
+    """
+    A sparse graph of the atom pattern transitions in a reaction network.
+
+    The nodes are (compound id, atom pattern) pairs, sorted. There is an edge
+    from a substrate node to a product node for every reaction that moves at
+    least one atom from the substrate pattern to the product pattern, and an
+    edge in the opposite direction labelled "<reaction id>_rev" if the
+    reaction is reversible.
+
+    Edges are stored sorted by source and then target node, so the target
+    array doubles as the column indices of a CSR matrix with row pointers
+    indptr. Each edge's label is an integer code into edge_labels.
+
+    Attributes
+    ----------
+    nodes : List[Tuple[str, str]]
+        The (compound id, atom pattern) pair of each node.
+    edge_labels : List[str]
+        Unique edge labels, i.e. reaction ids with or without "_rev".
+    indptr : np.ndarray
+        Position of the first edge out of each node, plus the number of edges.
+    source : np.ndarray
+        Source node of each edge.
+    target : np.ndarray
+        Target node of each edge.
+    edge_label : np.ndarray
+        Position of each edge's label in edge_labels.
+
+    Methods
+    -------
+    from_reactions(reactions)
+        Build the graph of some reactions.
+
+    to_coo()
+        Get the number of edges between each pair of nodes as a COO matrix.
+
+    to_csr()
+        Get the number of edges between each pair of nodes as a CSR matrix.
+
+    to_dataframe()
+        Get the graph as a dense DataFrame of edge label lists.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    nodes: List[Tuple[str, str]]
+    edge_labels: List[str]
+    indptr: np.ndarray
+    source: np.ndarray
+    target: np.ndarray
+    edge_label: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the graph."""
+        return (
+            f"<AtomPatternGraph num_nodes={len(self.nodes)}, "
+            f"num_edges={len(self.target)}>"
+        )
+
+    @cached_property
+    def node_index(self) -> Dict[AtomPatternNode, int]:
+        """Get a map from nodes to their positions."""
+        return {node: i for i, node in enumerate(self.nodes)}
+
+    def edges_from(
+        self, node: AtomPatternNode
+    ) -> List[Tuple[AtomPatternNode, str]]:
+        """Get the target node and label of every edge out of a node."""
+        i = self.node_index[node]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return [
+            (self.nodes[t], self.edge_labels[label])
+            for t, label in zip(
+                self.target[start:end].tolist(),
+                self.edge_label[start:end].tolist(),
+            )
+        ]
+
+    def edges_between(
+        self, source: AtomPatternNode, target: AtomPatternNode
+    ) -> List[str]:
+        """Get the labels of every edge from one node to another."""
+        return [
+            label for node, label in self.edges_from(source) if node == target
+        ]
+
+    def to_coo(self) -> sparse.coo_matrix:
+        """Get the number of edges between each pair of nodes as a COO matrix.
+
+        Parallel edges are kept as duplicate entries.
+        """
+        n = len(self.nodes)
+        return sparse.coo_matrix(
+            (
+                np.ones(len(self.target), dtype=np.int64),
+                (self.source, self.target),
+            ),
+            shape=(n, n),
+        )
+
+    def to_csr(self) -> sparse.csr_matrix:
+        """Get the number of edges between each pair of nodes as a CSR matrix."""
+        return self.to_coo().tocsr()
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Get the graph as a dense DataFrame of edge label lists.
+
+        Rows are sources, columns are targets and each cell is the list of
+        labels of the edges between them. The size of the DataFrame grows
+        with the square of the number of nodes, so this is only suitable for
+        small networks.
+        """
+        n = len(self.nodes)
+        cells = np.empty((n, n), dtype=object)
+        for i in range(n):
+            for j in range(n):
+                cells[i, j] = []
+        for s, t, label in zip(
+            self.source.tolist(), self.target.tolist(), self.edge_label.tolist()
+        ):
+            cells[s, t].append(self.edge_labels[label])
+        ix = pd.MultiIndex.from_tuples(self.nodes)
+        return pd.DataFrame(cells, index=ix, columns=ix)
+
+    @classmethod
+    def from_reactions(
+        cls, reactions: Iterable[Reaction]
+    ) -> "AtomPatternGraph":
+        """
+        Build the atom pattern graph of some reactions.
+
+        The cost is proportional to the number of substrate/product pattern
+        pairs of each reaction, i.e. to the number of candidate edges.
+
+        Parameters
+        ----------
+        reactions : Iterable[Reaction]
+            The reactions.
+
+        Returns
+        -------
+        AtomPatternGraph
+            The graph.
+        """
+        reactions = sorted(reactions, key=lambda r: r.id)
+        nodes = sorted(
+            {
+                (compound, pattern)
+                for r in reactions
+                for compound, pattern in r.atom_map
+            }
+        )
+        node_index = {node: i for i, node in enumerate(nodes)}
+        edge_labels: List[str] = []
+        source, target, edge_label = [], [], []
+        for reaction in reactions:
+            forward = len(edge_labels)
+            edge_labels.append(reaction.id)
+            if reaction.reversible:
+                edge_labels.append(reaction.id + "_rev")
+            stoich = reaction.stoichiometry_input
+            substrate_nodes = [
+                (compound, pattern)
+                for compound in reaction.substrates
+                for pattern in stoich[compound]
+            ]
+            product_nodes = [
+                (compound, pattern)
+                for compound in reaction.products
+                for pattern in stoich[compound]
+            ]
+            for sub in substrate_nodes:
+                sub_atoms = set(sub[1])
+                for prod in product_nodes:
+                    if sub_atoms.isdisjoint(prod[1]):
+                        continue
+                    s, t = node_index[sub], node_index[prod]
+                    source.append(s)
+                    target.append(t)
+                    edge_label.append(forward)
+                    if reaction.reversible:
+                        source.append(t)
+                        target.append(s)
+                        edge_label.append(forward + 1)
+        source = np.asarray(source, dtype=np.int64)
+        target = np.asarray(target, dtype=np.int64)
+        edge_label = np.asarray(edge_label, dtype=np.int64)
+        order = np.lexsort((target, source))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=len(nodes)), out=indptr[1:])
+        return cls(
+            nodes=nodes,
+            edge_labels=edge_labels,
+            indptr=indptr,
+            source=source[order],
+            target=target[order],
+            edge_label=edge_label[order],
+        )
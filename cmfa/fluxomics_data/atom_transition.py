@@ -0,0 +1,347 @@
+"""atom_transition.py includes integer atom maps and the atom transition network."""
+
+from functools import cached_property
+from itertools import product
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from scipy import sparse
+
+from cmfa.fluxomics_data.reaction import Reaction
+
+type AtomNode = Tuple[str, int]
+
+
+class ReactionAtomMap(BaseModel):
+    """
+    Where each product atom of one direction of a reaction comes from.
+
+    The reactants of the reaction are grouped into molecules: the patterns of
+    a compound that share the same set of atoms, such as "abc" and "cba" for a
+    symmetric compound, are alternative orientations of one molecule. Each
+    combination of orientations is a variant of the atom map, weighted by the
+    product of the orientations' shares of their molecule's coefficient.
+    Reactions without symmetric reactants have a single variant with weight 1.
+
+    Each product pattern is a separate product with its own coefficient.
+    The atoms of all products are concatenated, so that the atoms of product
+    i are at positions product_offsets[i] to product_offsets[i + 1]. For
+    variant k, the atom at position j comes from position
+    reactant_position[k, j] of reactant molecule reactant_index[k, j]. All
+    positions are 0-based.
+
+    Attributes
+    ----------
+    reaction_id : str
+        The reaction id, with "_rev" for the reverse direction.
+    reactant_ids : List[str]
+        The compound of each reactant molecule.
+    reactant_coefficients : np.ndarray
+        The number of each reactant molecule consumed.
+    product_ids : List[str]
+        The compound of each product.
+    product_coefficients : np.ndarray
+        The number of each product produced.
+    product_offsets : np.ndarray
+        Position of each product's first atom, plus the number of atoms.
+    variant_weights : np.ndarray
+        The weight of each variant.
+    reactant_index : np.ndarray
+        The reactant molecule of each product atom in each variant.
+    reactant_position : np.ndarray
+        The reactant atom position of each product atom in each variant.
+
+    Methods
+    -------
+    from_reaction(reaction, reverse=False)
+        Build the atom map of one direction of a reaction.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    reaction_id: str
+    reactant_ids: List[str]
+    reactant_coefficients: np.ndarray
+    product_ids: List[str]
+    product_coefficients: np.ndarray
+    product_offsets: np.ndarray
+    variant_weights: np.ndarray
+    reactant_index: np.ndarray
+    reactant_position: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the atom map."""
+        return (
+            f"<ReactionAtomMap reaction_id={self.reaction_id}, "
+            f"reactants={self.reactant_ids}, products={self.product_ids}, "
+            f"num_variants={len(self.variant_weights)}>"
+        )
+
+    def product_atoms(self, product: int) -> slice:
+        """Get the positions of a product's atoms in the concatenated atoms."""
+        return slice(
+            int(self.product_offsets[product]),
+            int(self.product_offsets[product + 1]),
+        )
+
+    @classmethod
+    def from_reaction(
+        cls, reaction: Reaction, reverse: bool = False
+    ) -> "ReactionAtomMap":
+        """
+        Build the atom map of one direction of a reaction.
+
+        Parameters
+        ----------
+        reaction : Reaction
+            The reaction.
+        reverse : bool
+            Whether to build the map of the reverse direction.
+
+        Returns
+        -------
+        ReactionAtomMap
+            The atom map.
+        """
+        sign = -1.0 if reverse else 1.0
+        molecules: Dict[Tuple[str, frozenset], List[Tuple[str, float]]] = {}
+        products: List[Tuple[str, str, float]] = []
+        for compound, patterns in reaction.stoichiometry_input.items():
+            for pattern, coef in patterns.items():
+                coef *= sign
+                if coef < 0:
+                    key = (compound, frozenset(pattern))
+                    molecules.setdefault(key, []).append((pattern, -coef))
+                elif coef > 0:
+                    products.append((compound, pattern, coef))
+        molecule_list = list(molecules.items())
+        reactant_coefficients = np.array(
+            [
+                sum(c for _, c in orientations)
+                for _, orientations in molecule_list
+            ]
+        )
+        product_offsets = np.zeros(len(products) + 1, dtype=np.int64)
+        np.cumsum([len(p) for _, p, _ in products], out=product_offsets[1:])
+        weights, reactant_index, reactant_position = [], [], []
+        for choice in product(
+            *(orientations for _, orientations in molecule_list)
+        ):
+            weight = 1.0
+            location: Dict[str, Tuple[int, int]] = {}
+            for i, (pattern, coef) in enumerate(choice):
+                weight *= coef / reactant_coefficients[i]
+                for position, atom in enumerate(pattern):
+                    if atom in location:
+                        raise ValueError(
+                            f"Atom {atom} of reaction {reaction.id} appears "
+                            "in more than one reactant."
+                        )
+                    location[atom] = (i, position)
+            try:
+                sources = [location[atom] for _, p, _ in products for atom in p]
+            except KeyError as e:
+                raise ValueError(
+                    f"Product atom {e.args[0]} of reaction {reaction.id} is "
+                    "not in any reactant."
+                ) from None
+            weights.append(weight)
+            reactant_index.append([i for i, _ in sources])
+            reactant_position.append([p for _, p in sources])
+        n_atoms = int(product_offsets[-1])
+        return cls(
+            reaction_id=reaction.id + "_rev" if reverse else reaction.id,
+            reactant_ids=[compound for (compound, _), _ in molecule_list],
+            reactant_coefficients=reactant_coefficients,
+            product_ids=[compound for compound, _, _ in products],
+            product_coefficients=np.array([c for _, _, c in products]),
+            product_offsets=product_offsets,
+            variant_weights=np.array(weights),
+            reactant_index=np.array(reactant_index, dtype=np.int64).reshape(
+                -1, n_atoms
+            ),
+            reactant_position=np.array(
+                reactant_position, dtype=np.int64
+            ).reshape(-1, n_atoms),
+        )
+
+
+class AtomTransitionNetwork(BaseModel):
+    """
+    A sparse graph of the atom transitions in a reaction network.
+
+    The nodes are (compound id, atom position) pairs, sorted, with 1-based
+    positions as in AtomPattern.pattern_tuple. There is an edge from a
+    reactant atom to a product atom for every atom map variant that moves the
+    atom, labelled with the reaction id or "<reaction id>_rev" for the
+    reverse direction of a reversible reaction. An edge's weight is the
+    product's coefficient times the variant's weight.
+
+    Edges are stored sorted by source and then target node, with row pointers
+    indptr as in a CSR matrix. Each edge's label is an integer code into
+    edge_labels, and the atom map of each label is in atom_maps.
+
+    Attributes
+    ----------
+    nodes : List[Tuple[str, int]]
+        The (compound id, atom position) pair of each node.
+    edge_labels : List[str]
+        Unique edge labels, i.e. reaction ids with or without "_rev".
+    atom_maps : List[ReactionAtomMap]
+        The atom map of each edge label.
+    indptr : np.ndarray
+        Position of the first edge out of each node, plus the number of edges.
+    source : np.ndarray
+        Source node of each edge.
+    target : np.ndarray
+        Target node of each edge.
+    edge_label : np.ndarray
+        Position of each edge's label in edge_labels.
+    weight : np.ndarray
+        Weight of each edge.
+
+    Methods
+    -------
+    from_reactions(reactions)
+        Build the atom transition network of some reactions.
+
+    to_csr()
+        Get the total edge weight between each pair of nodes.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    nodes: List[Tuple[str, int]]
+    edge_labels: List[str]
+    atom_maps: List[ReactionAtomMap]
+    indptr: np.ndarray
+    source: np.ndarray
+    target: np.ndarray
+    edge_label: np.ndarray
+    weight: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the network."""
+        return (
+            f"<AtomTransitionNetwork num_nodes={len(self.nodes)}, "
+            f"num_edges={len(self.target)}>"
+        )
+
+    @cached_property
+    def node_index(self) -> Dict[AtomNode, int]:
+        """Get a map from nodes to their positions."""
+        return {node: i for i, node in enumerate(self.nodes)}
+
+    @cached_property
+    def atom_map_index(self) -> Dict[str, ReactionAtomMap]:
+        """Get a map from edge labels to atom maps."""
+        return dict(zip(self.edge_labels, self.atom_maps))
+
+    @cached_property
+    def compound_sizes(self) -> Dict[str, int]:
+        """Get the number of atoms of each compound."""
+        sizes: Dict[str, int] = {}
+        for compound, position in self.nodes:
+            sizes[compound] = max(sizes.get(compound, 0), position)
+        return sizes
+
+    def edges_from(self, node: AtomNode) -> List[Tuple[AtomNode, str, float]]:
+        """Get the target node, label and weight of every edge out of a node."""
+        i = self.node_index[node]
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return [
+            (self.nodes[t], self.edge_labels[label], w)
+            for t, label, w in zip(
+                self.target[start:end].tolist(),
+                self.edge_label[start:end].tolist(),
+                self.weight[start:end].tolist(),
+            )
+        ]
+
+    def to_csr(self) -> sparse.csr_matrix:
+        """Get the total edge weight between each pair of nodes."""
+        n = len(self.nodes)
+        return sparse.csr_matrix(
+            (self.weight, (self.source, self.target)), shape=(n, n)
+        )
+
+    @classmethod
+    def from_reactions(
+        cls, reactions: Iterable[Reaction]
+    ) -> "AtomTransitionNetwork":
+        """
+        Build the atom transition network of some reactions.
+
+        Parameters
+        ----------
+        reactions : Iterable[Reaction]
+            The reactions.
+
+        Returns
+        -------
+        AtomTransitionNetwork
+            The network.
+        """
+        reactions = sorted(reactions, key=lambda r: r.id)
+        atom_maps = []
+        for reaction in reactions:
+            atom_maps.append(ReactionAtomMap.from_reaction(reaction))
+            if reaction.reversible:
+                atom_maps.append(
+                    ReactionAtomMap.from_reaction(reaction, reverse=True)
+                )
+        nodes = sorted(
+            {
+                (compound, position)
+                for r in reactions
+                for (compound, _), pattern in r.atom_map.items()
+                for position in range(1, len(pattern) + 1)
+            }
+        )
+        node_index = {node: i for i, node in enumerate(nodes)}
+        sources, targets, labels, weights = [], [], [], []
+        for label, atom_map in enumerate(atom_maps):
+            # nodes of one compound are contiguous, so the node of 0-based
+            # position p is the compound's first node plus p
+            reactant_nodes = np.array(
+                [node_index.get((c, 1), -1) for c in atom_map.reactant_ids],
+                dtype=np.int64,
+            )
+            sizes = np.diff(atom_map.product_offsets)
+            product_nodes = np.array(
+                [
+                    node_index[(compound, 1)] + position
+                    for compound, size in zip(atom_map.product_ids, sizes)
+                    for position in range(size)
+                ],
+                dtype=np.int64,
+            )
+            product_coefficients = np.repeat(
+                atom_map.product_coefficients, sizes
+            )
+            for k, variant_weight in enumerate(atom_map.variant_weights):
+                sources.append(
+                    reactant_nodes[atom_map.reactant_index[k]]
+                    + atom_map.reactant_position[k]
+                )
+                targets.append(product_nodes)
+                labels.append(np.full(len(product_nodes), label))
+                weights.append(variant_weight * product_coefficients)
+        source = np.concatenate(sources or [[]]).astype(np.int64)
+        target = np.concatenate(targets or [[]]).astype(np.int64)
+        edge_label = np.concatenate(labels or [[]]).astype(np.int64)
+        weight = np.concatenate(weights or [[]]).astype(np.float64)
+        order = np.lexsort((target, source))
+        indptr = np.zeros(len(nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=len(nodes)), out=indptr[1:])
+        return cls(
+            nodes=nodes,
+            edge_labels=[m.reaction_id for m in atom_maps],
+            atom_maps=atom_maps,
+            indptr=indptr,
+            source=source[order],
+            target=target[order],
+            edge_label=edge_label[order],
+            weight=weight[order],
+        )
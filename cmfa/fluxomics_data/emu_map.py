@@ -1,27 +1,83 @@
 """emu_map.py includes a class for maps that generated from EMU algorithm."""
 
-from typing import Dict, List, Optional
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel, PositiveInt, field_validator, model_validator
+import numpy as np
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    PositiveFloat,
+    PositiveInt,
+    PrivateAttr,
+    field_validator,
+    model_validator,
+)
+from scipy import sparse
+from scipy.sparse import csgraph
 
-from cmfa.fluxomics_data.compound import Compound
-from cmfa.fluxomics_data.reaction import Reaction
+
+class EMU(BaseModel):
+    """
+    An elementary metabolite unit, i.e. a subset of a compound's atoms.
+
+    Attributes
+    ----------
+    compound_id : str
+        The compound.
+    atoms : Tuple[int, ...]
+        The 1-based positions of the atoms, sorted.
+
+    EMUs are immutable and hashable.
+
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    compound_id: str
+    atoms: Tuple[int, ...]
+
+    @field_validator("atoms")
+    def check_atoms(cls, v: Tuple[int, ...]) -> Tuple[int, ...]:
+        """Check that the atoms are distinct positive positions and sort them."""
+        assert len(v) > 0, "An EMU must have at least one atom."
+        assert len(set(v)) == len(v), f"Found duplicate atoms in {v}."
+        assert min(v) > 0, f"Atom positions must be positive, found {v}."
+        return tuple(sorted(v))
+
+    @property
+    def size(self) -> int:
+        """Get the number of atoms in the EMU."""
+        return len(self.atoms)
+
+    def __repr__(self):
+        """Return a string representation of the EMU."""
+        return f"{self.compound_id}[{','.join(map(str, self.atoms))}]"
+
+    def __str__(self):
+        """Return a string representation of the EMU."""
+        return repr(self)
 
 
 class EMUReaction(BaseModel):
     """
     A class to represent a single EMU reaction.
 
+    The product EMU is made by combining the atoms of the reactant EMUs, so
+    its mass isotopomer distribution is the convolution of theirs.
+
     Attributes
     ----------
-    reaction : Reaction
-        Identifier of the reaction.
+    reaction_id : str
+        The reaction, with "_rev" for the reverse direction.
     emu_size: PositiveInt
-        The size of EMU map.
-    stoichiometry : Dict[Compound, PositiveInt]
-        A dictionary that representing the reaction stoichiometry.
-    atom_transition :  Dict[Compound, List]
-        A dictionary representing the atom transition in the reaction.
+        The size of the product EMU.
+    product : EMU
+        The EMU that the reaction produces.
+    reactants : Tuple[EMU, ...]
+        The EMUs that the product's atoms come from, sorted.
+    coefficient : PositiveFloat
+        The number of product EMUs made per unit of reaction flux.
 
     Methods
     -------
@@ -33,42 +89,90 @@ class EMUReaction(BaseModel):
 
     """
 
+    model_config = ConfigDict(frozen=True)
+
+    reaction_id: str
     emu_size: PositiveInt
-    reaction: Reaction
-    stoichiometry: Dict[Compound, PositiveInt]
-    atom_transition: Dict[Compound, List]
+    product: EMU
+    reactants: Tuple[EMU, ...]
+    coefficient: PositiveFloat = 1.0
 
     def __repr__(self):
         """Return a string representation of the EMU reaction."""
-        stoich_repr = ", ".join(
-            f"{k}: {v}" for k, v in self.stoichiometry.items()
-        )
-        atom_trans_repr = ", ".join(
-            f"{k}: {v}" for k, v in self.atom_transition.items()
-        )
+        reactants = " x ".join(map(repr, self.reactants))
         return (
-            f'EMUReaction(emu_size={self.emu_size}, reaction="{self.reaction}", '
-            f"stoichiometry={{{stoich_repr}}}, atom_transition={{{atom_trans_repr}}})"
+            f"EMUReaction({self.reaction_id}: {reactants} -> "
+            f"{self.coefficient} {self.product})"
         )
 
     @model_validator(mode="after")
     def check_emu_size_balance(self):
         """Check if the emu reaction is balanced."""
-        if self.stoichiometry.keys() != self.atom_transition.keys():
+        reactant_size = sum(r.size for r in self.reactants)
+        if not self.emu_size == self.product.size == reactant_size:
             raise ValueError(
-                "EMU stoichiometry and atom_transition must have the same keys"
+                f"Unbalanced EMU reaction {self.reaction_id}: emu_size "
+                f"{self.emu_size}, product size {self.product.size}, "
+                f"reactant size {reactant_size}."
             )
+        return self
 
-        total_sum = sum(
-            len(self.stoichiometry[key]) * self.atom_transition[key]
-            for key in self.stoichiometry
+
+class EMUBlock(BaseModel):
+    """
+    A strongly connected set of EMUs of one size, which are solved together.
+
+    Attributes
+    ----------
+    emu_size : PositiveInt
+        The size of the EMUs.
+    emus : List[EMU]
+        The EMUs in the block.
+    reaction_indices : List[int]
+        The positions in EMUMap.emu_reactions of the EMU reactions that
+        produce the block's EMUs.
+    upstream_blocks : List[int]
+        The positions in EMUMap.blocks of the other blocks with EMUs that
+        these reactions consume. They all come earlier in the solve order.
+
+    """
+
+    emu_size: PositiveInt
+    emus: List[EMU]
+    reaction_indices: List[int]
+    upstream_blocks: List[int]
+
+    def __repr__(self):
+        """Return a string representation of the EMU block."""
+        return (
+            f"<EMUBlock emu_size={self.emu_size}, emus={self.emus}, "
+            f"upstream_blocks={self.upstream_blocks}>"
         )
-        if total_sum != 0:
-            raise ValueError(
-                "The EMU size balance is not 0, check your EMU map again."
-            )
 
-        return self
+
+def _topological_order(
+    num_nodes: int, source: np.ndarray, target: np.ndarray
+) -> List[int]:
+    """Order the nodes of a directed acyclic graph so edges point forward.
+
+    Nodes without incoming edges are taken in increasing order, so the
+    order is deterministic.
+    """
+    successors: List[List[int]] = [[] for _ in range(num_nodes)]
+    in_degree = np.zeros(num_nodes, dtype=np.int64)
+    for s, t in zip(source.tolist(), target.tolist()):
+        successors[s].append(t)
+        in_degree[t] += 1
+    queue = deque(np.flatnonzero(in_degree == 0).tolist())
+    order = []
+    while queue:
+        node = queue.popleft()
+        order.append(node)
+        for successor in successors[node]:
+            in_degree[successor] -= 1
+            if in_degree[successor] == 0:
+                queue.append(successor)
+    return order
 
 
 class EMUMap(BaseModel):
@@ -77,28 +181,178 @@ class EMUMap(BaseModel):
 
     Attributes
     ----------
-    emu_map: List[EMUReaction]
-        A list of EMUReaction objects that make up the EMU map.
+    emu_reactions: Tuple[EMUReaction, ...]
+        The EMU reactions, sorted by EMU size and then product.
+    measured_emus : Tuple[EMU, ...]
+        The EMUs that the map was decomposed from.
+    input_emus : Tuple[EMU, ...]
+        The EMUs of compounds that no reaction produces, whose mass
+        isotopomer distributions must be given.
+
+    Each size level is split into blocks of strongly connected EMUs. Solving
+    the blocks in the order of the blocks attribute gives every block's
+    inputs before it is solved, so ordering a level's EMUs block by block
+    makes its linear system block triangular and the cost of solving it
+    that of solving the blocks.
+
+    Quantities derived from the map, such as the levels, the blocks and the
+    simulation plan, are built on first use and cached. The EMU reactions
+    and EMUs are tuples, so they cannot be changed in place, and the cache
+    is invalidated when any of them is replaced.
 
     Methods
     -------
     __repr__()
         Return a string representation of the EMU map.
 
-    calculate_mid()
-        calculate the mid for each EMU.
-
     """
 
-    emu_reactions: List[EMUReaction]
+    model_config = ConfigDict(validate_assignment=True)
+
+    emu_reactions: Tuple[EMUReaction, ...]
+    measured_emus: Tuple[EMU, ...]
+    input_emus: Tuple[EMU, ...]
+
+    _cache: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    _cache_key: Optional[Tuple[Any, ...]] = PrivateAttr(default=None)
 
     def __repr__(self):
         """Return a string representation of the EMU map."""
-        reactions_repr = ", ".join(
-            repr(reaction) for reaction in self.emu_reactions
+        return (
+            f"<EMUMap num_emu_reactions={len(self.emu_reactions)}, "
+            f"num_measured_emus={len(self.measured_emus)}, "
+            f"num_input_emus={len(self.input_emus)}, sizes={self.sizes}>"
         )
-        return f"EMUMap(emu_reactions=[{reactions_repr}])"
 
-    def calculate_mid(self):
-        """Calculate the mid for each EMU."""
-        return self
+    def _cached(self, name: str, build: Callable[[], Any]) -> Any:
+        """Get a cached quantity, building it if it is not cached yet.
+
+        As for ReactionNetwork, the key holds the map's fields, compared by
+        identity, and the map's own id so that copies get a cache of their
+        own.
+        """
+        fields = (self.emu_reactions, self.measured_emus, self.input_emus)
+        key = self._cache_key
+        if (
+            key is None
+            or key[0] != id(self)
+            or any(a is not b for a, b in zip(key[1:], fields))
+        ):
+            self._cache = {}
+            self._cache_key = (id(self), *fields)
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def flux_ids(self) -> List[str]:
+        """Get the sorted ids of the reaction directions in the map."""
+        return self._cached(
+            "flux_ids",
+            lambda: sorted({r.reaction_id for r in self.emu_reactions}),
+        )
+
+    @property
+    def levels(self) -> Dict[int, List[EMUReaction]]:
+        """Get the EMU reactions of each EMU size."""
+        return self._cached("levels", self._build_levels)
+
+    def _build_levels(self) -> Dict[int, List[EMUReaction]]:
+        """Group the EMU reactions by EMU size."""
+        levels: Dict[int, List[EMUReaction]] = {}
+        for emu_reaction in self.emu_reactions:
+            levels.setdefault(emu_reaction.emu_size, []).append(emu_reaction)
+        return levels
+
+    @property
+    def sizes(self) -> List[int]:
+        """Get the EMU sizes that have EMU reactions, in increasing order."""
+        return sorted(self.levels)
+
+    def produced_emus(self, size: int) -> List[EMU]:
+        """Get the sorted EMUs of a size that EMU reactions produce."""
+        return sorted(
+            {r.product for r in self.levels.get(size, [])},
+            key=lambda e: (e.compound_id, e.atoms),
+        )
+
+    @property
+    def blocks(self) -> List[EMUBlock]:
+        """Get the strongly connected blocks of EMUs, in solve order.
+
+        Blocks are ordered by EMU size, and topologically within each size.
+        """
+        return self._cached("blocks", self._build_blocks)
+
+    def _build_blocks(self) -> List[EMUBlock]:
+        """Split each size level into strongly connected blocks."""
+        blocks: List[EMUBlock] = []
+        block_of: Dict[EMU, int] = {}
+        reaction_indices: Dict[int, List[int]] = {}
+        for i, emu_reaction in enumerate(self.emu_reactions):
+            reaction_indices.setdefault(emu_reaction.emu_size, []).append(i)
+        for size in self.sizes:
+            emus = self.produced_emus(size)
+            index = {emu: i for i, emu in enumerate(emus)}
+            source, target = [], []
+            for i in reaction_indices[size]:
+                emu_reaction = self.emu_reactions[i]
+                # a reactant of the same size must be the only reactant
+                reactant = emu_reaction.reactants[0]
+                if reactant in index:
+                    source.append(index[reactant])
+                    target.append(index[emu_reaction.product])
+            source = np.asarray(source, dtype=np.int64)
+            target = np.asarray(target, dtype=np.int64)
+            graph = sparse.csr_matrix(
+                (np.ones(len(source)), (source, target)),
+                shape=(len(emus), len(emus)),
+            )
+            num_components, labels = csgraph.connected_components(
+                graph, directed=True, connection="strong"
+            )
+            between = labels[source] != labels[target]
+            order = _topological_order(
+                num_components,
+                labels[source[between]],
+                labels[target[between]],
+            )
+            members: List[List[EMU]] = [[] for _ in range(num_components)]
+            for emu, label in zip(emus, labels.tolist()):
+                members[label].append(emu)
+            producing: List[List[int]] = [[] for _ in range(num_components)]
+            for i in reaction_indices[size]:
+                product = self.emu_reactions[i].product
+                producing[labels[index[product]]].append(i)
+            for label in order:
+                position = len(blocks)
+                for emu in members[label]:
+                    block_of[emu] = position
+                upstream = {
+                    block_of[reactant]
+                    for i in producing[label]
+                    for reactant in self.emu_reactions[i].reactants
+                    if reactant in block_of
+                }
+                upstream.discard(position)
+                blocks.append(
+                    EMUBlock(
+                        emu_size=size,
+                        emus=members[label],
+                        reaction_indices=producing[label],
+                        upstream_blocks=sorted(upstream),
+                    )
+                )
+        return blocks
+
+    @property
+    def block_of(self) -> Dict[EMU, int]:
+        """Get the position in blocks of each produced EMU's block."""
+        return self._cached(
+            "block_of",
+            lambda: {
+                emu: position
+                for position, block in enumerate(self.blocks)
+                for emu in block.emus
+            },
+        )
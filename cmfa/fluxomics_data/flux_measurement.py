@@ -1,8 +1,11 @@
 """flux_measurement.py includes the tracer flux data coming out of experiments."""
 
-from typing import Optional
+from math import isnan
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
 
-from pydantic import BaseModel, PositiveFloat
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ConfigDict, PositiveFloat, model_validator
 
 
 class FluxMeasurement(BaseModel):
@@ -44,3 +47,180 @@ class FluxMeasurement(BaseModel):
             f"measured_flux={self.measured_flux}, "
             f"measurement_error={self.measurement_error}>"
         )
+
+
+class FluxMeasurementArray(BaseModel):
+    """
+    A columnar store of many flux measurements.
+
+    This class holds the same information as a list of FluxMeasurement
+    objects in NumPy arrays, with experiment and reaction ids stored as
+    integer codes into tables of unique ids. Missing measured fluxes and
+    measurement errors are stored as NaN.
+
+    Indexing or iterating over the store creates FluxMeasurement objects on
+    demand.
+
+    Parameters
+    ----------
+    experiment_ids : List[str]
+        Unique experiment ids.
+    reaction_ids : List[str]
+        Unique reaction ids.
+    experiment_code : np.ndarray
+        Position of each measurement's experiment id in experiment_ids.
+    reaction_code : np.ndarray
+        Position of each measurement's reaction id in reaction_ids.
+    replicate : np.ndarray
+        Replicate number of each measurement.
+    measured_flux : np.ndarray
+        Measured flux of each measurement.
+    measurement_error : np.ndarray
+        Measurement error of each measurement.
+
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    experiment_ids: List[str]
+    reaction_ids: List[str]
+    experiment_code: np.ndarray
+    reaction_code: np.ndarray
+    replicate: np.ndarray
+    measured_flux: np.ndarray
+    measurement_error: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the flux measurement array."""
+        return f"<FluxMeasurementArray num_measurements={len(self)}>"
+
+    def __len__(self) -> int:
+        """Get the number of measurements."""
+        return len(self.replicate)
+
+    def __getitem__(self, i: int) -> FluxMeasurement:
+        """Get a single measurement as a FluxMeasurement object."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("FluxMeasurementArray index out of range")
+        measured_flux = float(self.measured_flux[i])
+        measurement_error = float(self.measurement_error[i])
+        return FluxMeasurement(
+            experiment_id=self.experiment_ids[self.experiment_code[i]],
+            reaction_id=self.reaction_ids[self.reaction_code[i]],
+            replicate=int(self.replicate[i]),
+            measured_flux=None if isnan(measured_flux) else measured_flux,
+            measurement_error=(
+                None if isnan(measurement_error) else measurement_error
+            ),
+        )
+
+    def __iter__(self) -> Iterator[FluxMeasurement]:
+        """Iterate over the measurements as FluxMeasurement objects."""
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other):
+        """Check equality with another store or a list of measurements."""
+        if isinstance(other, FluxMeasurementArray):
+            return len(self) == len(other) and all(
+                np.array_equal(a, b, equal_nan=a.dtype.kind == "f")
+                for a, b in zip(self.decoded_columns(), other.decoded_columns())
+            )
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    @model_validator(mode="after")
+    def check_shapes(self) -> "FluxMeasurementArray":
+        """Check that the arrays fit together and errors are positive."""
+        for name in [
+            "experiment_code",
+            "reaction_code",
+            "measured_flux",
+            "measurement_error",
+        ]:
+            assert len(getattr(self, name)) == len(
+                self.replicate
+            ), f"{name} must have one entry per measurement."
+        assert not np.any(
+            self.measurement_error <= 0
+        ), "measurement_error must be positive."
+        return self
+
+    def experiment_id_column(self) -> np.ndarray:
+        """Get the experiment id of each measurement."""
+        return np.asarray(self.experiment_ids, dtype=object)[
+            self.experiment_code
+        ]
+
+    def reaction_id_column(self) -> np.ndarray:
+        """Get the reaction id of each measurement."""
+        return np.asarray(self.reaction_ids, dtype=object)[self.reaction_code]
+
+    def decoded_columns(self) -> Tuple[np.ndarray, ...]:
+        """Get every column with codes replaced by the ids they stand for."""
+        return (
+            self.experiment_id_column(),
+            self.reaction_id_column(),
+            self.replicate,
+            self.measured_flux,
+            self.measurement_error,
+        )
+
+    def take(self, indices: Sequence[int]) -> "FluxMeasurementArray":
+        """Get a store with only the measurements at the given positions."""
+        indices = np.asarray(indices, dtype=np.int64)
+        return self.model_copy(
+            update={
+                "experiment_code": self.experiment_code[indices],
+                "reaction_code": self.reaction_code[indices],
+                "replicate": self.replicate[indices],
+                "measured_flux": self.measured_flux[indices],
+                "measurement_error": self.measurement_error[indices],
+            }
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        experiment_id: Sequence[str],
+        reaction_id: Sequence[str],
+        replicate: Sequence[int],
+        measured_flux: Sequence[Optional[float]],
+        measurement_error: Sequence[Optional[float]],
+    ) -> "FluxMeasurementArray":
+        """Make a store from one value per measurement in each column."""
+        experiment_code, experiment_ids = pd.factorize(
+            pd.Series(experiment_id, dtype=object)
+        )
+        reaction_code, reaction_ids = pd.factorize(
+            pd.Series(reaction_id, dtype=object)
+        )
+        return cls(
+            experiment_ids=list(experiment_ids),
+            reaction_ids=list(reaction_ids),
+            experiment_code=experiment_code.astype(np.int32),
+            reaction_code=reaction_code.astype(np.int32),
+            replicate=np.asarray(replicate, dtype=np.int64),
+            measured_flux=np.asarray(
+                pd.Series(measured_flux, dtype=float), dtype=np.float64
+            ),
+            measurement_error=np.asarray(
+                pd.Series(measurement_error, dtype=float), dtype=np.float64
+            ),
+        )
+
+    @classmethod
+    def from_measurements(
+        cls, measurements: Iterable[FluxMeasurement]
+    ) -> "FluxMeasurementArray":
+        """Make a store from FluxMeasurement objects."""
+        measurements = list(measurements)
+        return cls.from_columns(
+            [m.experiment_id for m in measurements],
+            [m.reaction_id for m in measurements],
+            [m.replicate for m in measurements],
+            [m.measured_flux for m in measurements],
+            [m.measurement_error for m in measurements],
+        )
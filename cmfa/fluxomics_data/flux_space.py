@@ -0,0 +1,251 @@
+"""flux_space.py includes the free flux parametrization of a reaction network."""
+
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from numpy.typing import ArrayLike
+from pydantic import BaseModel, ConfigDict
+
+from cmfa.fluxomics_data.stoichiometric_matrix import StoichiometricMatrix
+
+
+def _rref(matrix: np.ndarray, tol: float) -> Tuple[np.ndarray, List[int]]:
+    """Get the reduced row echelon form of a matrix and its pivot columns.
+
+    Rows are chosen by partial pivoting and entries with absolute value at
+    most tol are treated as zero.
+    """
+    a = np.array(matrix, dtype=np.float64)
+    pivots: List[int] = []
+    row = 0
+    for col in range(a.shape[1]):
+        if row == a.shape[0]:
+            break
+        best = row + int(np.argmax(np.abs(a[row:, col])))
+        if abs(a[best, col]) <= tol:
+            a[row:, col] = 0.0
+            continue
+        a[[row, best]] = a[[best, row]]
+        a[row] /= a[row, col]
+        others = np.flatnonzero(np.arange(len(a)) != row)
+        a[others] -= np.outer(a[others, col], a[row])
+        pivots.append(col)
+        row += 1
+    return a[:row], pivots
+
+
+class FluxSpace(BaseModel):
+    """
+    The steady state fluxes of a reaction network in terms of free fluxes.
+
+    The net fluxes v of the reactions that keep the balanced compounds at
+    steady state, S v = 0, are the vectors kernel @ u for free fluxes u. The
+    kernel comes from the reduced row echelon form of the balanced rows of
+    the stoichiometric matrix, so each free flux is the net flux of one
+    reaction and the kernel's rows for the free reactions are the identity.
+    Measured reactions are placed last when the kernel is computed, so they
+    are free whenever the stoichiometry allows it. If measured reactions
+    depend on each other, the earlier ones in order of preference are free.
+
+    Each reversible reaction also has an exchange flux, the flux that goes
+    both ways. Its forward and reverse fluxes are
+
+        forward = exchange + max(net, 0)
+        reverse = exchange + max(-net, 0)
+
+    in the columns of the split stoichiometric matrix, where the reverse
+    direction is "<reaction id>_rev". Irreversible reactions must have
+    non-negative net fluxes, which is left to the sampler or optimizer.
+
+    All the maps accept a single vector or a leading draw dimension.
+
+    Attributes
+    ----------
+    reaction_ids : List[str]
+        The reactions, in the order of the stoichiometric matrix's columns.
+    free_reaction_ids : List[str]
+        The reactions whose net fluxes are the free fluxes.
+    exchange_reaction_ids : List[str]
+        The reversible reactions, which each have an exchange flux.
+    split_reaction_ids : List[str]
+        The reaction directions, as in the split stoichiometric matrix.
+    kernel : np.ndarray
+        The reactions by free fluxes map from free to net fluxes.
+
+    Methods
+    -------
+    from_stoichiometric_matrix(stoichiometric_matrix, ...)
+        Find the free fluxes of a stoichiometric matrix.
+
+    net_fluxes(free_fluxes)
+        Get the net flux of every reaction.
+
+    free_fluxes(net_fluxes)
+        Get the free fluxes of steady state net fluxes.
+
+    split_fluxes(free_fluxes, exchange_fluxes, flux_ids=None)
+        Get the flux of every reaction direction.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    reaction_ids: List[str]
+    free_reaction_ids: List[str]
+    exchange_reaction_ids: List[str]
+    split_reaction_ids: List[str]
+    kernel: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the flux space."""
+        return (
+            f"<FluxSpace num_reactions={len(self.reaction_ids)}, "
+            f"num_free_fluxes={len(self.free_reaction_ids)}, "
+            f"num_exchange_fluxes={len(self.exchange_reaction_ids)}>"
+        )
+
+    @cached_property
+    def split_index(self) -> Dict[str, int]:
+        """Get a map from reaction directions to split flux positions."""
+        return {r: i for i, r in enumerate(self.split_reaction_ids)}
+
+    @cached_property
+    def _positions(self) -> Tuple[np.ndarray, ...]:
+        """Get the index arrays that the maps use.
+
+        These are the positions of the free and the reversible reactions in
+        reaction_ids, and the split flux positions of every reaction's
+        forward direction and of the reversible reactions' two directions.
+        """
+        reaction_index = {r: i for i, r in enumerate(self.reaction_ids)}
+        free = [reaction_index[r] for r in self.free_reaction_ids]
+        reversible = [reaction_index[r] for r in self.exchange_reaction_ids]
+        forward = [self.split_index[r] for r in self.reaction_ids]
+        reversible_forward = [
+            self.split_index[r] for r in self.exchange_reaction_ids
+        ]
+        reverse = [
+            self.split_index[r + "_rev"] for r in self.exchange_reaction_ids
+        ]
+        return tuple(
+            np.asarray(p, dtype=np.int64)
+            for p in (free, reversible, forward, reversible_forward, reverse)
+        )
+
+    def net_fluxes(self, free_fluxes: ArrayLike) -> np.ndarray:
+        """Get the net flux of every reaction, in the order of reaction_ids."""
+        return np.asarray(free_fluxes, dtype=np.float64) @ self.kernel.T
+
+    def free_fluxes(self, net_fluxes: ArrayLike) -> np.ndarray:
+        """Get the free fluxes of net fluxes that are at steady state."""
+        free = self._positions[0]
+        return np.asarray(net_fluxes, dtype=np.float64)[..., free]
+
+    def split_fluxes(
+        self,
+        free_fluxes: ArrayLike,
+        exchange_fluxes: ArrayLike,
+        flux_ids: Optional[Iterable[str]] = None,
+    ) -> np.ndarray:
+        """
+        Get the flux of every reaction direction.
+
+        Parameters
+        ----------
+        free_fluxes : ArrayLike
+            The free fluxes, in the order of free_reaction_ids.
+        exchange_fluxes : ArrayLike
+            The exchange fluxes, in the order of exchange_reaction_ids.
+        flux_ids : Optional[Iterable[str]]
+            The reaction directions to return, such as EMUMap.flux_ids.
+            Defaults to split_reaction_ids.
+
+        Returns
+        -------
+        np.ndarray
+            The flux of each reaction direction, with the free fluxes'
+            leading draw dimension if they have one.
+        """
+        _, reversible, forward, reversible_forward, reverse = self._positions
+        net = self.net_fluxes(free_fluxes)
+        exchange = np.asarray(exchange_fluxes, dtype=np.float64)
+        out = np.empty(net.shape[:-1] + (len(self.split_reaction_ids),))
+        out[..., forward] = net
+        reversible_net = net[..., reversible]
+        out[..., reversible_forward] = exchange + np.maximum(reversible_net, 0)
+        out[..., reverse] = exchange + np.maximum(-reversible_net, 0)
+        if flux_ids is not None:
+            out = out[..., [self.split_index[f] for f in flux_ids]]
+        return out
+
+    @classmethod
+    def from_stoichiometric_matrix(
+        cls,
+        stoichiometric_matrix: StoichiometricMatrix,
+        reversible_reaction_ids: Iterable[str],
+        measured_reaction_ids: Iterable[str] = (),
+        tol: float = 1e-10,
+    ) -> "FluxSpace":
+        """
+        Find the free fluxes of a stoichiometric matrix.
+
+        Parameters
+        ----------
+        stoichiometric_matrix : StoichiometricMatrix
+            The stoichiometric matrix, without split reversible reactions.
+        reversible_reaction_ids : Iterable[str]
+            The reactions that can carry flux in both directions.
+        measured_reaction_ids : Iterable[str]
+            The reactions to make free fluxes if possible, in order of
+            preference.
+        tol : float
+            Entries of the reduced matrix with absolute value at most tol
+            times the largest coefficient count as zero.
+
+        Returns
+        -------
+        FluxSpace
+            The flux space.
+        """
+        reaction_ids = stoichiometric_matrix.reaction_ids
+        reaction_index = stoichiometric_matrix.reaction_index
+        measured = list(dict.fromkeys(measured_reaction_ids))
+        unknown = [r for r in measured if r not in reaction_index]
+        if unknown:
+            raise ValueError(f"Measured reactions {unknown} are not reactions.")
+        # pivots are taken as early as possible, so the measured reactions
+        # at the end are left free whenever they can be, and the most
+        # preferred ones go last so they win over later ones they depend on
+        measured_set = set(measured)
+        order = [
+            i for i, r in enumerate(reaction_ids) if r not in measured_set
+        ] + [reaction_index[r] for r in reversed(measured)]
+        balanced = stoichiometric_matrix.balanced.toarray()[:, order]
+        scale = np.abs(balanced).max(initial=1.0)
+        reduced, pivots = _rref(balanced, tol * scale)
+        pivot_set = set(pivots)
+        free = [i for i in range(len(order)) if i not in pivot_set]
+        kernel = np.zeros((len(order), len(free)))
+        kernel[free, np.arange(len(free))] = 1.0
+        kernel[pivots] = -reduced[:, free]
+        kernel[np.abs(kernel) <= tol * scale] = 0.0
+        original = np.empty_like(kernel)
+        original[order] = kernel
+        # keep the free fluxes in the order of the reactions
+        free_positions = sorted(order[i] for i in free)
+        column = {order[i]: j for j, i in enumerate(free)}
+        original = original[:, [column[p] for p in free_positions]]
+        reversible = set(reversible_reaction_ids)
+        exchange_reaction_ids = [r for r in reaction_ids if r in reversible]
+        split_reaction_ids: List[str] = []
+        for r in reaction_ids:
+            split_reaction_ids.append(r)
+            if r in reversible:
+                split_reaction_ids.append(r + "_rev")
+        return cls(
+            reaction_ids=list(reaction_ids),
+            free_reaction_ids=[reaction_ids[p] for p in free_positions],
+            exchange_reaction_ids=exchange_reaction_ids,
+            split_reaction_ids=split_reaction_ids,
+            kernel=original,
+        )
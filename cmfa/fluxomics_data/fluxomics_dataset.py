@@ -1,11 +1,18 @@
 """fluxomics_dataset.py includes the classes of a fluxomics dataset."""
 
-from typing import List
+from typing import List, Union
 
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, field_serializer, field_validator
 
-from cmfa.fluxomics_data.flux_measurement import FluxMeasurement
-from cmfa.fluxomics_data.mid_measurement import MIDMeasurement
+from cmfa.fluxomics_data.flux_measurement import (
+    FluxMeasurement,
+    FluxMeasurementArray,
+)
+from cmfa.fluxomics_data.flux_space import FluxSpace
+from cmfa.fluxomics_data.mid_measurement import (
+    MIDMeasurement,
+    MIDMeasurementArray,
+)
 from cmfa.fluxomics_data.reaction_network import ReactionNetwork
 from cmfa.fluxomics_data.tracer import Tracer, TracerExperiment
 
@@ -33,14 +40,16 @@ class FluxomicsDataset(BaseModel):
         A list of tracer experiments performed. Each experiment includes
         details about the experiment ID and the tracers used with their
         corresponding enrichments.
-    flux_measurements : List[FluxMeasurement]
+    flux_measurements : Union[FluxMeasurementArray, List[FluxMeasurement]]
         A list of flux measurements. Each entry in the list represents a
         measured flux value in the metabolic network, typically obtained
-        from experimental data.
-    mid_measurements : List[MIDMeasurement]
+        from experimental data. Large datasets can store the measurements in
+        a columnar FluxMeasurementArray instead.
+    mid_measurements : Union[MIDMeasurementArray, List[MIDMeasurement]]
         A list of Metabolite Isotopomer Distribution (MID) measurements.
         Each MID measurement includes details about the metabolite, sample
-        source, and isotopomer distribution.
+        source, and isotopomer distribution. Large datasets can store the
+        measurements in a columnar MIDMeasurementArray instead.
 
     Methods
     -------
@@ -49,13 +58,19 @@ class FluxomicsDataset(BaseModel):
 
     load_data()
         Given a set of data in csv or xlsx, read it into fluxomics data class.
+
+    to_columnar()
+        Get a copy of the dataset with columnar measurement stores.
+
+    flux_space()
+        Get the free flux parametrization with measured reactions free.
     """
 
     reaction_network: ReactionNetwork
     tracers: List[Tracer]
     tracer_experiments: List[TracerExperiment]
-    flux_measurements: List[FluxMeasurement]
-    mid_measurements: List[MIDMeasurement]
+    flux_measurements: Union[FluxMeasurementArray, List[FluxMeasurement]]
+    mid_measurements: Union[MIDMeasurementArray, List[MIDMeasurement]]
 
     def __repr__(self):
         """Return a string representation of the fluxomics data."""
@@ -83,24 +98,61 @@ class FluxomicsDataset(BaseModel):
         )
 
     @field_validator("flux_measurements")
-    def check_unique_replicates(cls, v) -> List[FluxMeasurement]:
+    def check_unique_replicates(
+        cls, v
+    ) -> Union[FluxMeasurementArray, List[FluxMeasurement]]:
         """Check flux measurement ids are unique for each experiment."""
+        if isinstance(v, FluxMeasurementArray):
+            pairs = zip(v.experiment_id_column().tolist(), v.replicate.tolist())
+        else:
+            pairs = ((m.experiment_id, m.replicate) for m in v)
         experiment_replicates = {}
-        for measurement in v:
-            if measurement.experiment_id in experiment_replicates:
-                if (
-                    measurement.replicate
-                    in experiment_replicates[measurement.experiment_id]
-                ):
+        for experiment_id, replicate in pairs:
+            if experiment_id in experiment_replicates:
+                if replicate in experiment_replicates[experiment_id]:
                     raise ValueError(
-                        f"Duplicate replicate {measurement.replicate} found for experiment_id {measurement.experiment_id}"
+                        f"Duplicate replicate {replicate} found for experiment_id {experiment_id}"
                     )
-                experiment_replicates[measurement.experiment_id].add(
-                    measurement.replicate
-                )
+                experiment_replicates[experiment_id].add(replicate)
             else:
-                experiment_replicates[measurement.experiment_id] = {
-                    measurement.replicate
-                }
+                experiment_replicates[experiment_id] = {replicate}
 
         return v
+
+    @field_serializer("flux_measurements", "mid_measurements", mode="wrap")
+    def serialize_measurements(self, v, handler):
+        """Serialize columnar measurement stores as lists of measurements."""
+        if isinstance(v, (FluxMeasurementArray, MIDMeasurementArray)):
+            v = list(v)
+        return handler(v)
+
+    def to_columnar(self) -> "FluxomicsDataset":
+        """Get a copy of the dataset with columnar measurement stores."""
+        flux_measurements = self.flux_measurements
+        if not isinstance(flux_measurements, FluxMeasurementArray):
+            flux_measurements = FluxMeasurementArray.from_measurements(
+                flux_measurements
+            )
+        mid_measurements = self.mid_measurements
+        if not isinstance(mid_measurements, MIDMeasurementArray):
+            mid_measurements = MIDMeasurementArray.from_measurements(
+                mid_measurements
+            )
+        return self.model_copy(
+            update={
+                "flux_measurements": flux_measurements,
+                "mid_measurements": mid_measurements,
+            }
+        )
+
+    def flux_space(self) -> FluxSpace:
+        """Get the free flux parametrization with measured reactions free.
+
+        The reactions of the flux measurements are made free fluxes wherever
+        the stoichiometry allows, in order of first measurement.
+        """
+        if isinstance(self.flux_measurements, FluxMeasurementArray):
+            measured = self.flux_measurements.reaction_id_column().tolist()
+        else:
+            measured = [m.reaction_id for m in self.flux_measurements]
+        return self.reaction_network.flux_space(measured_reaction_ids=measured)
@@ -1,14 +1,18 @@
 """mid_measurement.py includes MID data from mass spectrometry for isotopomer fragments."""
 
 import hashlib
-from typing import List, Optional, Set
+from typing import Iterable, Iterator, List, Optional, Sequence, Set, Tuple
 
+import numpy as np
+import pandas as pd
 from pydantic import (
     BaseModel,
+    ConfigDict,
     Field,
     NonNegativeFloat,
     PositiveFloat,
     field_validator,
+    model_validator,
 )
 
 
@@ -120,3 +124,300 @@ class MIDMeasurement(BaseModel):
         for comp in v:
             comp.normalized_intensity = comp.measured_intensity / total
         return v
+
+
+def ragged_indices(starts: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    """Get the concatenated ranges start:start + size as one index array.
+
+    For example starts [0, 5] and sizes [2, 3] give [0, 1, 5, 6, 7].
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    total = int(sizes.sum())
+    segment_ends = np.cumsum(sizes)
+    within = np.arange(total, dtype=np.int64) - np.repeat(
+        segment_ends - sizes, sizes
+    )
+    return np.repeat(np.asarray(starts, dtype=np.int64), sizes) + within
+
+
+class MIDMeasurementArray(BaseModel):
+    """
+    A columnar store of many MID measurements.
+
+    This class holds the same information as a list of MIDMeasurement
+    objects, but keeps the components of all the measurements in contiguous
+    NumPy arrays. The ids of each measurement are stored as integer codes
+    into tables of unique ids, and the ragged components are delimited by
+    offsets: the components of measurement i are at positions offsets[i] to
+    offsets[i + 1] of the component arrays.
+
+    Indexing or iterating over the store creates MIDMeasurement objects on
+    demand, so code that expects a list of MID measurements keeps working.
+
+    Parameters
+    ----------
+    experiment_ids : List[str]
+        Unique experiment ids.
+    compound_ids : List[str]
+        Unique compound ids.
+    fragment_ids : List[str]
+        Unique fragment ids.
+    mass_isotopomer_ids : List[str]
+        Unique mass isotopomer ids.
+    experiment_code : np.ndarray
+        Position of each measurement's experiment id in experiment_ids.
+    compound_code : np.ndarray
+        Position of each measurement's compound id in compound_ids.
+    fragment_code : np.ndarray
+        Position of each measurement's fragment id in fragment_ids.
+    offsets : np.ndarray
+        Component offsets, one longer than the number of measurements.
+    mass_isotopomer_code : np.ndarray
+        Position of each component's mass isotopomer id in
+        mass_isotopomer_ids.
+    measured_intensity : np.ndarray
+        Measured intensity of each component.
+    measured_std_dev : np.ndarray
+        Standard deviation of each component's measured intensity.
+    normalized_intensity : np.ndarray
+        Intensity of each component divided by the total intensity of its
+        measurement.
+
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    experiment_ids: List[str]
+    compound_ids: List[str]
+    fragment_ids: List[str]
+    mass_isotopomer_ids: List[str]
+    experiment_code: np.ndarray
+    compound_code: np.ndarray
+    fragment_code: np.ndarray
+    offsets: np.ndarray
+    mass_isotopomer_code: np.ndarray
+    measured_intensity: np.ndarray
+    measured_std_dev: np.ndarray
+    normalized_intensity: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the MID measurement array."""
+        return (
+            f"<MIDMeasurementArray num_measurements={len(self)}, "
+            f"num_components={len(self.measured_intensity)}>"
+        )
+
+    def __len__(self) -> int:
+        """Get the number of measurements."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> MIDMeasurement:
+        """Get a single measurement as a MIDMeasurement object."""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("MIDMeasurementArray index out of range")
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return MIDMeasurement(
+            experiment_id=self.experiment_ids[self.experiment_code[i]],
+            compound_id=self.compound_ids[self.compound_code[i]],
+            fragment_id=self.fragment_ids[self.fragment_code[i]],
+            measured_components=[
+                MIDMeasurementComponent(
+                    mass_isotopomer_id=self.mass_isotopomer_ids[code],
+                    measured_intensity=intensity,
+                    measured_std_dev=std_dev,
+                )
+                for code, intensity, std_dev in zip(
+                    self.mass_isotopomer_code[start:end].tolist(),
+                    self.measured_intensity[start:end].tolist(),
+                    self.measured_std_dev[start:end].tolist(),
+                )
+            ],
+        )
+
+    def __iter__(self) -> Iterator[MIDMeasurement]:
+        """Iterate over the measurements as MIDMeasurement objects."""
+        return (self[i] for i in range(len(self)))
+
+    def __eq__(self, other):
+        """Check equality with another store or a list of measurements."""
+        if isinstance(other, MIDMeasurementArray):
+            return len(self) == len(other) and all(
+                np.array_equal(a, b)
+                for a, b in zip(self.decoded_columns(), other.decoded_columns())
+            )
+        if isinstance(other, (list, tuple)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    @model_validator(mode="after")
+    def check_shapes(self) -> "MIDMeasurementArray":
+        """Check that the arrays fit together and intensities are positive."""
+        n_measurement = len(self.offsets) - 1
+        n_component = len(self.measured_intensity)
+        assert n_measurement >= 0, "offsets must not be empty."
+        assert (
+            self.offsets[0] == 0 and self.offsets[-1] == n_component
+        ), "offsets must start at 0 and end at the number of components."
+        assert np.all(np.diff(self.offsets) >= 0), "offsets must not decrease."
+        for name in ["experiment_code", "compound_code", "fragment_code"]:
+            assert (
+                len(getattr(self, name)) == n_measurement
+            ), f"{name} must have one entry per measurement."
+        for name in [
+            "mass_isotopomer_code",
+            "measured_std_dev",
+            "normalized_intensity",
+        ]:
+            assert (
+                len(getattr(self, name)) == n_component
+            ), f"{name} must have one entry per component."
+        assert np.all(
+            self.measured_intensity > 0
+        ), "measured_intensity must be positive."
+        assert np.all(
+            self.measured_std_dev > 0
+        ), "measured_std_dev must be positive."
+        return self
+
+    @property
+    def sizes(self) -> np.ndarray:
+        """Get the number of components of each measurement."""
+        return np.diff(self.offsets)
+
+    @property
+    def component_measurement(self) -> np.ndarray:
+        """Get the position of each component's measurement."""
+        return np.repeat(np.arange(len(self)), self.sizes)
+
+    def decoded_columns(self) -> Tuple[np.ndarray, ...]:
+        """Get every column with codes replaced by the ids they stand for."""
+        return (
+            np.asarray(self.experiment_ids, dtype=object)[self.experiment_code],
+            np.asarray(self.compound_ids, dtype=object)[self.compound_code],
+            np.asarray(self.fragment_ids, dtype=object)[self.fragment_code],
+            self.offsets,
+            np.asarray(self.mass_isotopomer_ids, dtype=object)[
+                self.mass_isotopomer_code
+            ],
+            self.measured_intensity,
+            self.measured_std_dev,
+        )
+
+    def take(self, indices: Sequence[int]) -> "MIDMeasurementArray":
+        """Get a store with only the measurements at the given positions."""
+        indices = np.asarray(indices, dtype=np.int64)
+        sizes = self.sizes[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        components = ragged_indices(self.offsets[indices], sizes)
+        return self.model_copy(
+            update={
+                "experiment_code": self.experiment_code[indices],
+                "compound_code": self.compound_code[indices],
+                "fragment_code": self.fragment_code[indices],
+                "offsets": offsets,
+                "mass_isotopomer_code": self.mass_isotopomer_code[components],
+                "measured_intensity": self.measured_intensity[components],
+                "measured_std_dev": self.measured_std_dev[components],
+                "normalized_intensity": self.normalized_intensity[components],
+            }
+        )
+
+    @classmethod
+    def from_columns(
+        cls,
+        experiment_id: Sequence[str],
+        compound_id: Sequence[str],
+        fragment_id: Sequence[str],
+        offsets: Sequence[int],
+        mass_isotopomer_id: Sequence[str],
+        measured_intensity: Sequence[float],
+        measured_std_dev: Sequence[float],
+    ) -> "MIDMeasurementArray":
+        """
+        Make a store from one id per measurement and one value per component.
+
+        Parameters
+        ----------
+        experiment_id : Sequence[str]
+            Experiment id of each measurement.
+        compound_id : Sequence[str]
+            Compound id of each measurement.
+        fragment_id : Sequence[str]
+            Fragment id of each measurement.
+        offsets : Sequence[int]
+            Component offsets, one longer than the number of measurements.
+        mass_isotopomer_id : Sequence[str]
+            Mass isotopomer id of each component.
+        measured_intensity : Sequence[float]
+            Measured intensity of each component.
+        measured_std_dev : Sequence[float]
+            Standard deviation of each component's measured intensity.
+
+        Returns
+        -------
+        MIDMeasurementArray
+            The store.
+        """
+        experiment_code, experiment_ids = pd.factorize(
+            pd.Series(experiment_id, dtype=object)
+        )
+        compound_code, compound_ids = pd.factorize(
+            pd.Series(compound_id, dtype=object)
+        )
+        fragment_code, fragment_ids = pd.factorize(
+            pd.Series(fragment_id, dtype=object)
+        )
+        mass_isotopomer_code, mass_isotopomer_ids = pd.factorize(
+            pd.Series(mass_isotopomer_id, dtype=object)
+        )
+        offsets = np.asarray(offsets, dtype=np.int64)
+        intensity = np.asarray(measured_intensity, dtype=np.float64)
+        measurement = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+        totals = np.bincount(
+            measurement, weights=intensity, minlength=len(offsets) - 1
+        )
+        return cls(
+            experiment_ids=list(experiment_ids),
+            compound_ids=list(compound_ids),
+            fragment_ids=list(fragment_ids),
+            mass_isotopomer_ids=list(mass_isotopomer_ids),
+            experiment_code=experiment_code.astype(np.int32),
+            compound_code=compound_code.astype(np.int32),
+            fragment_code=fragment_code.astype(np.int32),
+            offsets=offsets,
+            mass_isotopomer_code=mass_isotopomer_code.astype(np.int32),
+            measured_intensity=intensity,
+            measured_std_dev=np.asarray(measured_std_dev, dtype=np.float64),
+            normalized_intensity=intensity / totals[measurement],
+        )
+
+    @classmethod
+    def from_measurements(
+        cls, measurements: Iterable[MIDMeasurement]
+    ) -> "MIDMeasurementArray":
+        """Make a store from MIDMeasurement objects."""
+        experiment_id, compound_id, fragment_id, sizes = [], [], [], []
+        mass_isotopomer_id, intensity, std_dev = [], [], []
+        for m in measurements:
+            experiment_id.append(m.experiment_id)
+            compound_id.append(m.compound_id)
+            fragment_id.append(m.fragment_id)
+            sizes.append(len(m.measured_components))
+            for c in m.measured_components:
+                mass_isotopomer_id.append(c.mass_isotopomer_id)
+                intensity.append(c.measured_intensity)
+                std_dev.append(c.measured_std_dev)
+        offsets = np.zeros(len(sizes) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        return cls.from_columns(
+            experiment_id,
+            compound_id,
+            fragment_id,
+            offsets,
+            mass_isotopomer_id,
+            intensity,
+            std_dev,
+        )
@@ -2,10 +2,13 @@
 
 import hashlib
 import warnings
-from typing import Dict, Optional
+from functools import cached_property
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Mapping, Optional, Tuple
 
 from pydantic import (
     BaseModel,
+    ConfigDict,
     Field,
     computed_field,
     field_validator,
@@ -14,7 +17,7 @@ from pydantic import (
 
 from cmfa.fluxomics_data.compound import Compound
 
-type ReactionStoichiometry = Dict[str, Dict[AtomPattern, float]]
+type ReactionStoichiometry = Mapping[str, Mapping[AtomPattern, float]]
 
 
 class AtomPattern(BaseModel):
@@ -33,8 +36,13 @@ class AtomPattern(BaseModel):
 
     Atom patterns can also be represented as tuples of integers.
 
+    Atom patterns are immutable, so their integer representation is only
+    computed once.
+
     """
 
+    model_config = ConfigDict(frozen=True)
+
     pattern_string: str = Field(alias="pattern")
 
     @field_validator("pattern_string")
@@ -47,6 +55,7 @@ class AtomPattern(BaseModel):
         return v
 
     @computed_field
+    @cached_property
     def pattern_tuple(self) -> tuple[int, ...]:
         """Convert atom pattern to integer representation.
 
@@ -81,6 +90,9 @@ class Reaction(BaseModel):
     reversible : bool
         Whether or not the reaction is reversible
 
+    Reactions are immutable, so the parsed stoichiometry and everything
+    derived from it is computed once and cached.
+
     Methods
     -------
     __repr__()
@@ -94,27 +106,76 @@ class Reaction(BaseModel):
 
     """
 
+    model_config = ConfigDict(frozen=True)
+
     id: str
     name: Optional[str] = None
     reversible: bool = True
     stoichiometry_input: Dict[str, Dict[str, float]]
 
-    @property
+    @cached_property
     def stoichiometry(self) -> ReactionStoichiometry:
-        """Get the stoichiometry in the right form."""
-        return {
-            compound: {
-                AtomPattern(pattern=pattern): coef
-                for pattern, coef in compound_stoich.items()
+        """Get the stoichiometry in the right form.
+
+        The result is read-only as it is shared by every caller.
+        """
+        return MappingProxyType(
+            {
+                compound: MappingProxyType(
+                    {
+                        AtomPattern(pattern=pattern): coef
+                        for pattern, coef in compound_stoich.items()
+                    }
+                )
+                for compound, compound_stoich in self.stoichiometry_input.items()
+            }
+        )
+
+    @cached_property
+    def atom_map(self) -> Mapping[Tuple[str, str], Tuple[int, ...]]:
+        """Get the integer atom pattern of each (compound, pattern) pair."""
+        return MappingProxyType(
+            {
+                (compound, pattern.pattern_string): pattern.pattern_tuple
+                for compound, patterns in self.stoichiometry.items()
+                for pattern in patterns
             }
-            for compound, compound_stoich in self.stoichiometry_input.items()
-        }
+        )
+
+    @cached_property
+    def compound_coefficients(self) -> Mapping[str, float]:
+        """Get the net stoichiometric coefficient of each compound."""
+        return MappingProxyType(
+            {
+                compound: sum(patterns.values())
+                for compound, patterns in self.stoichiometry_input.items()
+            }
+        )
+
+    @cached_property
+    def substrates(self) -> FrozenSet[str]:
+        """Get the compounds with a pattern that the reaction consumes."""
+        return frozenset(
+            compound
+            for compound, patterns in self.stoichiometry_input.items()
+            if any(coef < 0 for coef in patterns.values())
+        )
+
+    @cached_property
+    def products(self) -> FrozenSet[str]:
+        """Get the compounds with a pattern that the reaction produces."""
+        return frozenset(
+            compound
+            for compound, patterns in self.stoichiometry_input.items()
+            if any(coef > 0 for coef in patterns.values())
+        )
 
     def __repr__(self):
         """Return a string representation of the reaction."""
+        stoichiometry = {c: dict(p) for c, p in self.stoichiometry.items()}
         return (
             f"Reaction id={self.id}, name={self.name},"
-            f"stoichiometry={self.stoichiometry},"
+            f"stoichiometry={stoichiometry},"
             f"direction={self.reversible}, "
         )
 
@@ -137,7 +198,6 @@ class Reaction(BaseModel):
         for compound, transitions in self.stoichiometry.items():
             for transition, coeff in transitions.items():
                 if coeff < 0:  # Reactant
-                    print(sum(transition.pattern_tuple) * abs(coeff))
                     lhs_atoms += sum(transition.pattern_tuple) * abs(coeff)
                 else:  # Product
                     rhs_atoms += sum(transition.pattern_tuple) * abs(coeff)
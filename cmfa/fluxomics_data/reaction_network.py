@@ -3,20 +3,37 @@
 import warnings
 from copy import deepcopy
 from operator import gt, lt
-from typing import List, Optional, Set
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+)
 
 import pandas as pd
 from pydantic import (
     BaseModel,
     ConfigDict,
     Field,
+    PrivateAttr,
     computed_field,
     field_serializer,
     model_validator,
 )
 
+from cmfa.fluxomics_data.atom_pattern_graph import AtomPatternGraph
+from cmfa.fluxomics_data.atom_transition import AtomTransitionNetwork
 from cmfa.fluxomics_data.compound import Compound
+from cmfa.fluxomics_data.flux_space import FluxSpace
 from cmfa.fluxomics_data.reaction import Reaction
+from cmfa.fluxomics_data.stoichiometric_matrix import StoichiometricMatrix
 
 
 class ReactionNetwork(BaseModel):
@@ -33,10 +50,10 @@ class ReactionNetwork(BaseModel):
         A unique identifier for the model.
     name : Optional[str], default: None
         The name of the model, optional.
-    reactions : Set[Reaction], default: empty set
-        A set of reactions in the model. Ensures that each reaction is unique.
-    compounds : Set[Compound], default: empty set
-        A set of compounds in the model. Ensures that each compound is unique.
+    reactions : Iterable[Reaction], default: empty set
+        The reactions in the model. Ensures that each reaction is unique.
+    compounds : Iterable[Compound], default: empty set
+        The compounds in the model. Ensures that each compound is unique.
 
     Attributes
     ----------
@@ -44,19 +61,28 @@ class ReactionNetwork(BaseModel):
         Unique identifier of the reaction network.
     name : Optional[str]
         Name of the reaction network.
-    reactions : Set[Reaction]
-        Set of reactions in the network.
+    reactions : FrozenSet[Reaction]
+        Frozen set of reactions in the network.
     compounds : Set[Compound]
         Set of compounds in the network.
+
+    Quantities derived from the reactions and compounds, such as the
+    compound index, are built on first use and cached. The reactions and
+    user compounds are frozen sets, so they cannot be changed in place, and
+    the cache is invalidated when either attribute is replaced.
     """
 
     id: str
     name: str = Field("")
-    reactions: Set[Reaction] = Field(default_factory=set)
-    user_compounds: Set[Compound] = Field(
-        default_factory=set, alias="compounds"
+    reactions: FrozenSet[Reaction] = Field(default_factory=frozenset)
+    user_compounds: FrozenSet[Compound] = Field(
+        default_factory=frozenset, alias="compounds"
     )
-    model_config = ConfigDict(arbitrary_types_allowed=True)
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True, validate_assignment=True
+    )
+    _cache: Dict[str, Any] = PrivateAttr(default_factory=dict)
+    _cache_key: Optional[Tuple[Any, ...]] = PrivateAttr(default=None)
 
     def __repr__(self):
         """Return a string representation of the reaction network."""
@@ -79,88 +105,198 @@ class ReactionNetwork(BaseModel):
     @property
     def compounds(self: "ReactionNetwork") -> Set[Compound]:
         """Add the compounds field."""
+        return set(self._compound_registry[0])
+
+    @property
+    def compound_index(self) -> Mapping[str, Compound]:
+        """Get a read-only map from compound ids to compounds."""
+        return self._compound_registry[1]
+
+    def has_compound(self, compound_id: str) -> bool:
+        """Check if the network has a compound with the given id."""
+        return compound_id in self.compound_index
+
+    def get_compound(self, compound_id: str) -> Compound:
+        """Get the compound with the given id."""
+        return self.compound_index[compound_id]
+
+    def clear_cache(self) -> None:
+        """Forget all the cached quantities derived from the network."""
+        self._cache = {}
+        self._cache_key = None
+
+    def _cached(self, name: str, build: Callable[[], Any]) -> Any:
+        """Get a cached quantity, building it if the network has changed.
+
+        The key holds the frozen sets themselves, compared by identity, so
+        replacing either attribute invalidates the cache. It also includes
+        the network's own id so that copies, which start out sharing the
+        cache dictionary, get a new one of their own.
+        """
+        key = self._cache_key
+        if (
+            key is None
+            or key[0] != id(self)
+            or key[1] is not self.reactions
+            or key[2] is not self.user_compounds
+        ):
+            self._cache = {}
+            self._cache_key = (id(self), self.reactions, self.user_compounds)
+        if name not in self._cache:
+            self._cache[name] = build()
+        return self._cache[name]
+
+    @property
+    def _compound_registry(
+        self,
+    ) -> Tuple[frozenset[Compound], Mapping[str, Compound]]:
+        """Get the set of compounds and the compound index."""
+        return self._cached("compound_registry", self._build_compound_registry)
+
+    def _build_compound_registry(
+        self,
+    ) -> Tuple[frozenset[Compound], Mapping[str, Compound]]:
+        """Build the set of compounds and the compound index."""
         compounds = {Compound.model_validate(c) for c in self.user_compounds}
+        index = {c.id: c for c in compounds}
         for reaction in self.reactions:
             for compound_id in reaction.stoichiometry.keys():
-                new_compound = Compound(id=compound_id)
-                if not any(c.id == compound_id for c in compounds):
+                if compound_id not in index:
+                    new_compound = Compound(id=compound_id)
                     warnings.warn(
                         f"adding auto-generated compound {new_compound}"
                     )
                     compounds.add(new_compound)
-        return compounds
+                    index[compound_id] = new_compound
+        return frozenset(compounds), MappingProxyType(index)
 
     @model_validator(mode="after")
     def check_all_compounds(self) -> "ReactionNetwork":
         """Check if the reaction network has all the compounds."""
-        reaction_compounds = set()
-        for reaction in self.reactions:
-            # Access compound IDs
-            reaction_compounds.update(reaction.stoichiometry.keys())
-        model_compounds = {compound.id for compound in self.compounds}
-        missing = reaction_compounds - model_compounds
+        missing = {
+            compound_id
+            for reaction in self.reactions
+            for compound_id in reaction.stoichiometry.keys()
+            if compound_id not in self.compound_index
+        }
         if missing != set():
             raise ValueError(f"Missing compounds in the model: {missing}")
         return self
 
     @property
-    def reaction_adjacency_matrix(self: "ReactionNetwork") -> pd.DataFrame:
+    def atom_pattern_graph(self) -> AtomPatternGraph:
+        """Get the sparse graph of atom pattern transitions.
+
+        The nodes are (compound, atom pattern) pairs and the edges are
+        labelled with the ids of the reactions that move atoms between them,
+        with "_rev" for the reverse direction of reversible reactions.
         """
-        Convert ReactionNetwork into an adjacency matrix.
+        return self._cached(
+            "atom_pattern_graph",
+            lambda: AtomPatternGraph.from_reactions(self.reactions),
+        )
+
+    @property
+    def atom_transition_network(self) -> AtomTransitionNetwork:
+        """Get the network of atom transitions.
+
+        The nodes are (compound, atom position) pairs and each reaction
+        direction has an integer atom map saying where its product atoms
+        come from.
+        """
+        return self._cached(
+            "atom_transition_network",
+            lambda: AtomTransitionNetwork.from_reactions(self.reactions),
+        )
+
+    def stoichiometric_matrix(
+        self,
+        split_reversible: bool = False,
+        boundary_compounds: Optional[Iterable[str]] = None,
+    ) -> StoichiometricMatrix:
+        """
+        Get the sparse compound by reaction stoichiometric matrix.
+
+        The matrix is cached for each combination of arguments.
 
         Parameters
         ----------
-        reaction_network : ReactionNetwork
-            The reaction network to convert.
+        split_reversible : bool
+            Whether to add a "<reaction id>_rev" column for each reversible
+            reaction.
+        boundary_compounds : Optional[Iterable[str]]
+            The compounds that enter or leave the system. Defaults to the
+            compounds that are only produced or only consumed.
+
+        Returns
+        -------
+        StoichiometricMatrix
+            The stoichiometric matrix with its compound and reaction indexes.
+        """
+        if boundary_compounds is not None:
+            boundary_compounds = tuple(sorted(set(boundary_compounds)))
+        return self._cached(
+            f"stoichiometric_matrix_{split_reversible}_{boundary_compounds}",
+            lambda: StoichiometricMatrix.from_reactions(
+                self.reactions,
+                compound_ids=self.compound_index.keys(),
+                split_reversible=split_reversible,
+                boundary_compounds=boundary_compounds,
+            ),
+        )
+
+    def flux_space(
+        self,
+        measured_reaction_ids: Iterable[str] = (),
+        boundary_compounds: Optional[Iterable[str]] = None,
+    ) -> FluxSpace:
+        """
+        Get the free flux parametrization of the steady state fluxes.
+
+        The flux space is cached for each combination of arguments.
+
+        Parameters
+        ----------
+        measured_reaction_ids : Iterable[str]
+            The reactions to make free fluxes if possible, such as the
+            reactions of the flux measurements, in order of preference.
+        boundary_compounds : Optional[Iterable[str]]
+            The compounds that enter or leave the system. Defaults to the
+            compounds that are only produced or only consumed.
+
+        Returns
+        -------
+        FluxSpace
+            The kernel of the balanced stoichiometry and the maps from free
+            and exchange fluxes to the fluxes of every reaction direction.
+        """
+        measured_reaction_ids = tuple(dict.fromkeys(measured_reaction_ids))
+        if boundary_compounds is not None:
+            boundary_compounds = tuple(sorted(set(boundary_compounds)))
+        return self._cached(
+            f"flux_space_{measured_reaction_ids}_{boundary_compounds}",
+            lambda: FluxSpace.from_stoichiometric_matrix(
+                self.stoichiometric_matrix(
+                    boundary_compounds=boundary_compounds
+                ),
+                reversible_reaction_ids=[
+                    r.id for r in self.reactions if r.reversible
+                ],
+                measured_reaction_ids=measured_reaction_ids,
+            ),
+        )
+
+    @property
+    def reaction_adjacency_matrix(self: "ReactionNetwork") -> pd.DataFrame:
+        """
+        Convert ReactionNetwork into an adjacency matrix.
+
+        This is a dense view of atom_pattern_graph, so it is only suitable
+        for small networks.
 
         Returns
         -------
         pd.DataFrame
             The adjacency matrix representing the reaction network. The row are representing reactants, and columns are products. The value is the reaction id.
         """
-        # Extract all unique compounds
-        all_compounds = set()
-        for reaction in self.reactions:
-            for cpd in reaction.stoichiometry.keys():
-                all_compounds.add(cpd)
-        ix = pd.MultiIndex.from_tuples(
-            set(
-                [
-                    (cpd, pat.pattern_string)
-                    for r in self.reactions
-                    for cpd, tr in r.stoichiometry.items()
-                    for pat in tr.keys()
-                ]
-            )
-        ).sort_values()
-        adj = pd.DataFrame("", index=ix, columns=ix).apply(
-            lambda c: c.str.split()
-        )
-        for reaction in self.reactions:
-            rid = reaction.id
-            rid_rev = rid + "_rev"
-            stoich = reaction.stoichiometry
-            substrates = {
-                c for c, t in stoich.items() if any(s < 0 for s in t.values())
-            }
-            products = {
-                c for c, t in stoich.items() if any(s > 0 for s in t.values())
-            }
-            for sub in substrates:
-                for spat in stoich[sub].keys():
-                    for prod in products:
-                        for ppat in stoich[prod].keys():
-                            intersection = set(spat.pattern_string) & set(
-                                ppat.pattern_string
-                            )
-                            if len(intersection) > 0:
-                                adj.at[
-                                    (sub, spat.pattern_string),
-                                    (prod, ppat.pattern_string),
-                                ].append(rid)
-                                if reaction.reversible:
-                                    adj.at[
-                                        (prod, ppat.pattern_string),
-                                        (sub, spat.pattern_string),
-                                    ].append(rid_rev)
-        return pd.DataFrame(adj)
+        return self.atom_pattern_graph.to_dataframe()
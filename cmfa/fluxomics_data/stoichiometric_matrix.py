@@ -0,0 +1,165 @@
+"""stoichiometric_matrix.py includes the sparse stoichiometric matrix of a network."""
+
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from scipy import sparse
+
+from cmfa.fluxomics_data.reaction import Reaction
+
+
+class StoichiometricMatrix(BaseModel):
+    """
+    A sparse compound by reaction stoichiometric matrix.
+
+    Rows are compounds sorted by id and columns are reactions sorted by id.
+    If reversible reactions are split, the column of each reversible reaction
+    is followed by a "<reaction id>_rev" column with the opposite
+    coefficients. The entry for a compound and a reaction is the sum of the
+    compound's coefficients over its atom patterns.
+
+    Compounds are either balanced, meaning that their concentration is at
+    steady state, or boundary compounds that enter or leave the system. By
+    default the boundary compounds are those that are only produced or only
+    consumed, counting both directions of reversible reactions.
+
+    Attributes
+    ----------
+    compound_ids : List[str]
+        The compound of each row.
+    reaction_ids : List[str]
+        The reaction of each column.
+    matrix : sparse.csr_matrix
+        The stoichiometric coefficients.
+    boundary : np.ndarray
+        Whether each compound is a boundary compound.
+
+    Methods
+    -------
+    from_reactions(reactions, ...)
+        Build the stoichiometric matrix of some reactions.
+
+    select(compound_ids)
+        Get the rows of some compounds.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    compound_ids: List[str]
+    reaction_ids: List[str]
+    matrix: sparse.csr_matrix
+    boundary: np.ndarray
+
+    def __repr__(self):
+        """Return a string representation of the stoichiometric matrix."""
+        return (
+            f"<StoichiometricMatrix num_compounds={len(self.compound_ids)}, "
+            f"num_reactions={len(self.reaction_ids)}, "
+            f"num_boundary_compounds={int(self.boundary.sum())}>"
+        )
+
+    @cached_property
+    def compound_index(self) -> Dict[str, int]:
+        """Get a map from compound ids to row positions."""
+        return {c: i for i, c in enumerate(self.compound_ids)}
+
+    @cached_property
+    def reaction_index(self) -> Dict[str, int]:
+        """Get a map from reaction ids to column positions."""
+        return {r: i for i, r in enumerate(self.reaction_ids)}
+
+    @property
+    def balanced_compound_ids(self) -> List[str]:
+        """Get the ids of the balanced compounds."""
+        return [c for c, b in zip(self.compound_ids, self.boundary) if not b]
+
+    @property
+    def boundary_compound_ids(self) -> List[str]:
+        """Get the ids of the boundary compounds."""
+        return [c for c, b in zip(self.compound_ids, self.boundary) if b]
+
+    @cached_property
+    def balanced(self) -> sparse.csr_matrix:
+        """Get the rows of the balanced compounds."""
+        return self.matrix[np.flatnonzero(~self.boundary)]
+
+    def select(self, compound_ids: Iterable[str]) -> sparse.csr_matrix:
+        """Get the rows of some compounds, in the order given."""
+        rows = [self.compound_index[c] for c in compound_ids]
+        return self.matrix[rows]
+
+    @classmethod
+    def from_reactions(
+        cls,
+        reactions: Iterable[Reaction],
+        compound_ids: Optional[Iterable[str]] = None,
+        split_reversible: bool = False,
+        boundary_compounds: Optional[Iterable[str]] = None,
+    ) -> "StoichiometricMatrix":
+        """
+        Build the stoichiometric matrix of some reactions.
+
+        The cost is linear in the number of non-zero coefficients.
+
+        Parameters
+        ----------
+        reactions : Iterable[Reaction]
+            The reactions.
+        compound_ids : Optional[Iterable[str]]
+            The compounds to include as rows. Defaults to every compound in
+            the reactions.
+        split_reversible : bool
+            Whether to add a reverse column for each reversible reaction.
+        boundary_compounds : Optional[Iterable[str]]
+            The boundary compounds. Defaults to the compounds that are only
+            produced or only consumed.
+
+        Returns
+        -------
+        StoichiometricMatrix
+            The stoichiometric matrix.
+        """
+        reactions = sorted(reactions, key=lambda r: r.id)
+        if compound_ids is None:
+            compound_ids = {c for r in reactions for c in r.stoichiometry_input}
+        compound_ids = sorted(compound_ids)
+        compound_index = {c: i for i, c in enumerate(compound_ids)}
+        reaction_ids: List[str] = []
+        rows, cols, coefs = [], [], []
+        produced = np.zeros(len(compound_ids), dtype=bool)
+        consumed = np.zeros(len(compound_ids), dtype=bool)
+        for reaction in reactions:
+            col = len(reaction_ids)
+            reaction_ids.append(reaction.id)
+            if split_reversible and reaction.reversible:
+                reaction_ids.append(reaction.id + "_rev")
+            for compound, coef in reaction.compound_coefficients.items():
+                row = compound_index[compound]
+                rows.append(row)
+                cols.append(col)
+                coefs.append(coef)
+                if split_reversible and reaction.reversible:
+                    rows.append(row)
+                    cols.append(col + 1)
+                    coefs.append(-coef)
+                if coef > 0 or reaction.reversible:
+                    produced[row] |= coef != 0
+                if coef < 0 or reaction.reversible:
+                    consumed[row] |= coef != 0
+        matrix = sparse.csr_matrix(
+            (coefs, (rows, cols)),
+            shape=(len(compound_ids), len(reaction_ids)),
+            dtype=np.float64,
+        )
+        if boundary_compounds is None:
+            boundary = ~(produced & consumed)
+        else:
+            boundary = np.isin(compound_ids, list(boundary_compounds))
+        return cls(
+            compound_ids=compound_ids,
+            reaction_ids=reaction_ids,
+            matrix=matrix,
+            boundary=boundary,
+        )
@@ -0,0 +1,109 @@
+"""Provides the InferenceConfiguration class, read from an inference's config.toml.
+
+Each directory in inferences holds a config.toml that says which Stan model
+to fit to which prepared data, in which modes and with which options.
+"""
+
+import tomllib
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, PositiveInt, field_validator
+
+AVAILABLE_MODES = ("prior", "posterior", "kfold")
+
+
+class InferenceConfiguration(BaseModel):
+    """
+    The configuration of one inference.
+
+    Attributes
+    ----------
+    name : str
+        The name of the inference.
+    stan_file : str
+        The Stan model, relative to the cmfa/stan directory.
+    prepared_data_dir : str
+        The directory of the prepared data, relative to data/prepared.
+    stan_input_function : str
+        The name of the function in cmfa.stan_input that makes the Stan data.
+    modes : List[str]
+        The modes to run, out of "prior", "posterior" and "kfold".
+    dims : Dict[str, List[str]]
+        The dimensions of each Stan variable, for arviz.
+    stanc_options : Dict[str, Any]
+        Options for the Stan compiler.
+    cpp_options : Dict[str, Any]
+        Options for the C++ compiler.
+    sample_kwargs : Dict[str, Any]
+        Keyword arguments for CmdStanModel.sample in every mode.
+    mode_options : Dict[str, Dict[str, Any]]
+        Options for particular modes, such as n_folds for kfold. Any other
+        options are keyword arguments for CmdStanModel.sample in that mode.
+    threads_per_chain : Optional[PositiveInt]
+        The number of threads each chain uses. If set, the model is compiled
+        with STAN_THREADS.
+    grainsize : PositiveInt
+        The grainsize of threaded models that use reduce_sum, i.e. the
+        suggested number of measurements in each partial sum.
+
+    Methods
+    -------
+    from_toml(path)
+        Read the configuration in a config.toml file.
+
+    get_cpp_options()
+        Get the C++ compiler options, including STAN_THREADS if needed.
+
+    get_sample_kwargs(mode)
+        Get the keyword arguments for CmdStanModel.sample in a mode.
+    """
+
+    name: str
+    stan_file: str
+    prepared_data_dir: str
+    stan_input_function: str
+    modes: List[str]
+    dims: Dict[str, List[str]] = Field(default_factory=dict)
+    stanc_options: Dict[str, Any] = Field(default_factory=dict)
+    cpp_options: Dict[str, Any] = Field(default_factory=dict)
+    sample_kwargs: Dict[str, Any] = Field(default_factory=dict)
+    mode_options: Dict[str, Dict[str, Any]] = Field(default_factory=dict)
+    threads_per_chain: Optional[PositiveInt] = None
+    grainsize: PositiveInt = 1
+
+    @field_validator("modes")
+    def check_modes(cls, v: List[str]) -> List[str]:
+        """Check that the modes are available."""
+        for mode in v:
+            assert (
+                mode in AVAILABLE_MODES
+            ), f"Mode {mode} is not one of {AVAILABLE_MODES}."
+        return v
+
+    @classmethod
+    def from_toml(cls, path: Path) -> "InferenceConfiguration":
+        """Read the configuration in a config.toml file."""
+        with open(path, "rb") as f:
+            return cls.model_validate(tomllib.load(f))
+
+    def get_cpp_options(self) -> Dict[str, Any]:
+        """Get the C++ compiler options, including STAN_THREADS if needed."""
+        cpp_options = dict(self.cpp_options)
+        if self.threads_per_chain is not None:
+            cpp_options["STAN_THREADS"] = True
+        return cpp_options
+
+    def get_sample_kwargs(self, mode: str) -> Dict[str, Any]:
+        """Get the keyword arguments for CmdStanModel.sample in a mode."""
+        sample_kwargs = dict(self.sample_kwargs)
+        if self.threads_per_chain is not None:
+            sample_kwargs["threads_per_chain"] = self.threads_per_chain
+        sample_kwargs.update(
+            {
+                k: v
+                for k, v in self.mode_options.get(mode, {}).items()
+                if k != "n_folds"
+            }
+        )
+        return sample_kwargs
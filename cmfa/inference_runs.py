@@ -0,0 +1,310 @@
+"""Plan the sampling runs of the inferences in the inferences directory.
+
+Each directory in inferences with a config.toml is an inference. Every mode
+of every inference is split into runs, one for each of the prior and the
+posterior and one per fold for kfold. Each run has a fingerprint of its Stan
+model, data and options, so runs whose outputs are up to date can be
+skipped.
+
+Runs that share a Stan model but not its compiler options must not share an
+executable, so each set of options gets its own copy of the model in the
+build directory, which is compiled to its own executable.
+
+Sampling the runs is left to cmfa/sample.py, so this module does not need
+cmdstanpy or arviz.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from cmfa import stan_input
+from cmfa.fluxomics_data.fluxomics_dataset import FluxomicsDataset
+from cmfa.fluxomics_data.mid_measurement import MIDMeasurementArray
+from cmfa.inference_configuration import InferenceConfiguration
+
+HERE = Path(__file__).parent
+INFERENCES_DIR = HERE / ".." / "inferences"
+STAN_DIR = HERE / "stan"
+BUILD_DIR = STAN_DIR / "build"
+FINGERPRINT_FILE = "fingerprint.txt"
+DEFAULT_CHAINS = 4
+DEFAULT_N_FOLDS = 5
+# the Stan input fields of the held-out measurements, which get a _test suffix
+HELD_OUT_FIELDS = (
+    "N",
+    "N_measurement",
+    "y_sizes",
+    "y_start",
+    "y_end",
+    "stacked_y",
+)
+
+
+class Run(BaseModel):
+    """
+    One sampling run of an inference.
+
+    Attributes
+    ----------
+    name : str
+        The inference name and the mode, and the fold for kfold runs.
+    mode : str
+        The mode, i.e. "prior", "posterior" or "kfold".
+    stan_file : Path
+        The Stan model.
+    stanc_options : Dict[str, Any]
+        Options for the Stan compiler.
+    cpp_options : Dict[str, Any]
+        Options for the C++ compiler.
+    output_dir : Path
+        Where the run writes its outputs.
+    data : Dict[str, Any]
+        The Stan input.
+    sample_kwargs : Dict[str, Any]
+        Keyword arguments for CmdStanModel.sample.
+    dims : Dict[str, List[str]]
+        The dimensions of each Stan variable, for arviz.
+    fingerprint : str
+        A hash of everything that the run's outputs depend on.
+    exe_file : Optional[Path]
+        The compiled model, once it is compiled.
+    """
+
+    name: str
+    mode: str
+    stan_file: Path
+    stanc_options: Dict[str, Any]
+    cpp_options: Dict[str, Any]
+    output_dir: Path
+    data: Dict[str, Any]
+    sample_kwargs: Dict[str, Any]
+    dims: Dict[str, List[str]]
+    fingerprint: str
+    exe_file: Optional[Path] = None
+
+    @property
+    def cores(self) -> int:
+        """Get the number of cores that the run keeps busy."""
+        chains = self.sample_kwargs.get("chains", DEFAULT_CHAINS)
+        return chains * self.sample_kwargs.get("threads_per_chain", 1)
+
+    @property
+    def compile_key(self) -> Tuple[str, str, str]:
+        """Get the model and compiler options that the executable depends on."""
+        return (
+            str(self.stan_file),
+            json.dumps(self.stanc_options, sort_keys=True),
+            json.dumps(self.cpp_options, sort_keys=True),
+        )
+
+    def is_done(self) -> bool:
+        """Check if the run's outputs are up to date."""
+        path = self.output_dir / FINGERPRINT_FILE
+        return path.exists() and path.read_text() == self.fingerprint
+
+
+def build_stan_file(run: Run, build_dir: Path = BUILD_DIR) -> Path:
+    """Copy a run's Stan model to where its compiler options are built.
+
+    The copy is in a directory named after the model and a hash of its
+    compile key, so compiling it makes an executable that only runs with the
+    same options share. The copy is only rewritten if the model has changed,
+    so that an up to date executable is not recompiled.
+    """
+    stan_file = Path(run.stan_file)
+    key = hashlib.sha256(json.dumps(run.compile_key).encode()).hexdigest()
+    path = Path(build_dir) / f"{stan_file.stem}_{key[:12]}" / stan_file.name
+    code = stan_file.read_bytes()
+    if not path.exists() or path.read_bytes() != code:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(code)
+    return path
+
+
+def discover_inferences(
+    inferences_dir: Path = INFERENCES_DIR,
+) -> Dict[Path, InferenceConfiguration]:
+    """Get the configuration of every inference directory, sorted by path."""
+    return {
+        path.parent: InferenceConfiguration.from_toml(path)
+        for path in sorted(Path(inferences_dir).glob("*/config.toml"))
+    }
+
+
+def held_out_input(
+    held_out: Optional[Dict[str, Any]] = None,
+    y_pred: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """Get the Stan input fields of some held-out measurements.
+
+    The fields of HELD_OUT_FIELDS are given a _test suffix, and y_pred_test
+    is the training measurement that predicts each held-out measurement, as
+    from predicting_measurements, or none of them if it is not given.
+    Without held-out measurements, the fields describe an empty stack.
+    """
+    if held_out is None:
+        held_out = {"N": 0, "N_measurement": 0} | {
+            field: [] for field in HELD_OUT_FIELDS[2:]
+        }
+    if y_pred is None:
+        y_pred = [0] * held_out["N_measurement"]
+    return {f"{field}_test": held_out[field] for field in HELD_OUT_FIELDS} | {
+        "y_pred_test": y_pred
+    }
+
+
+def predicting_measurements(
+    training: MIDMeasurementArray, held_out: MIDMeasurementArray
+) -> List[int]:
+    """Get the training measurement that predicts each held-out measurement.
+
+    A held-out measurement is predicted by the first training measurement
+    of the same compound and fragment with the same mass isotopomers, in
+    the same order, so that the fitted compositions line up. The positions
+    are 1-based, as in Stan, and 0 means that no training measurement
+    matches, in which case the models predict a uniform composition.
+    """
+
+    def keys(mids: MIDMeasurementArray) -> List[Tuple[str, ...]]:
+        _, compounds, fragments, offsets, isotopomers, *_ = (
+            mids.decoded_columns()
+        )
+        return [
+            (compounds[i], fragments[i])
+            + tuple(isotopomers[offsets[i] : offsets[i + 1]])
+            for i in range(len(mids))
+        ]
+
+    first = {}
+    for position, key in enumerate(keys(training), start=1):
+        first.setdefault(key, position)
+    return [first.get(key, 0) for key in keys(held_out)]
+
+
+def _fingerprint(
+    config: InferenceConfiguration,
+    stan_file: Path,
+    data: Dict[str, Any],
+    sample_kwargs: Dict[str, Any],
+) -> str:
+    """Hash a run's Stan model, data, options and compiler options."""
+    digest = hashlib.sha256(Path(stan_file).read_bytes())
+    for part in [
+        data,
+        sample_kwargs,
+        config.stanc_options,
+        config.get_cpp_options(),
+        config.dims,
+    ]:
+        digest.update(json.dumps(part, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def plan_runs(
+    inference_dir: Path,
+    config: InferenceConfiguration,
+    dataset: FluxomicsDataset,
+    cache_dir: Optional[Path] = None,
+) -> List[Run]:
+    """
+    Get the runs of an inference's modes.
+
+    The prior and posterior runs use the whole dataset, with the likelihood
+    flag of the Stan input off and the yhat_prior flag on for the prior, and
+    no held-out measurements. A kfold run is made for each fold, fitting
+    every measurement not in that fold and passing the fold's measurements
+    as the held-out stack, whose log likelihood the model computes from the
+    fitted training measurements given by predicting_measurements. Measurements are assigned to folds in
+    turn, so every fold has at least one measurement as long as there are
+    at least as many measurements as folds.
+
+    Parameters
+    ----------
+    inference_dir : Path
+        The inference directory, where the outputs go.
+    config : InferenceConfiguration
+        The inference's configuration.
+    dataset : FluxomicsDataset
+        The prepared dataset.
+    cache_dir : Optional[Path]
+        Where to cache Stan inputs.
+
+    Returns
+    -------
+    List[Run]
+        The runs.
+    """
+    make_stan_input = getattr(stan_input, config.stan_input_function)
+    stan_file = STAN_DIR / config.stan_file
+    extra = {"grainsize": config.grainsize}
+    parts = []
+    for mode in config.modes:
+        if mode == "kfold":
+            n_folds = config.mode_options.get("kfold", {}).get(
+                "n_folds", DEFAULT_N_FOLDS
+            )
+            columnar = dataset.to_columnar()
+            mids = columnar.mid_measurements
+            if not 2 <= n_folds <= len(mids):
+                raise ValueError(
+                    f"Cannot split {len(mids)} MID measurements into "
+                    f"{n_folds} folds; n_folds must be between 2 and the "
+                    "number of measurements."
+                )
+            fold_of = np.arange(len(mids)) % n_folds
+            for fold in range(n_folds):
+                training_mids = mids.take(np.flatnonzero(fold_of != fold))
+                held_out_mids = mids.take(np.flatnonzero(fold_of == fold))
+                training = columnar.model_copy(
+                    update={"mid_measurements": training_mids}
+                )
+                held_out = columnar.model_copy(
+                    update={"mid_measurements": held_out_mids}
+                )
+                data = make_stan_input(training, cache_dir=cache_dir)
+                data |= held_out_input(
+                    make_stan_input(held_out, cache_dir=cache_dir),
+                    predicting_measurements(training_mids, held_out_mids),
+                )
+                parts.append(
+                    (
+                        mode,
+                        f"kfold/fold_{fold}",
+                        data | {"likelihood": 1, "yhat_prior": 0},
+                    )
+                )
+        else:
+            # without the likelihood, the flat prior would be improper
+            is_prior = int(mode == "prior")
+            data = make_stan_input(dataset, cache_dir=cache_dir)
+            data |= held_out_input() | {
+                "likelihood": 1 - is_prior,
+                "yhat_prior": is_prior,
+            }
+            parts.append((mode, mode, data))
+    runs = []
+    for mode, subdir, data in parts:
+        data = data | extra
+        sample_kwargs = config.get_sample_kwargs(mode)
+        runs.append(
+            Run(
+                name=f"{config.name}/{subdir}",
+                mode=mode,
+                stan_file=stan_file,
+                stanc_options=config.stanc_options,
+                cpp_options=config.get_cpp_options(),
+                output_dir=Path(inference_dir) / subdir,
+                data=data,
+                sample_kwargs=sample_kwargs,
+                dims=config.dims,
+                fingerprint=_fingerprint(
+                    config, stan_file, data, sample_kwargs
+                ),
+            )
+        )
+    return runs
@@ -0,0 +1,311 @@
+"""Correction of mass isotopomer distributions for natural isotope abundance.
+
+A mass spectrometer sees the mass shift of a whole fragment, so heavy
+isotopes that occur naturally in any of the fragment's atoms add to the
+shifts that come from the tracer. For a fragment with n labellable atoms,
+the measured distribution is C @ x, where x is the distribution of the
+number of labelled atoms. Column k of the correction matrix C is the
+natural mass shift distribution of the rest of the fragment, shifted by k.
+The rest includes the n - k labellable atoms that are not labelled, which
+carry heavy isotopes at natural abundance like any other atom.
+
+Correction matrices only depend on the fragment's formula and sizes, and
+datasets share few distinct fragments, so they are cached.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from cmfa.convolution import convolve
+from cmfa.fluxomics_data.compound import Compound
+from cmfa.fluxomics_data.mid_measurement import (
+    MIDMeasurementArray,
+    ragged_indices,
+)
+
+# Natural abundance of each element's isotopes by nominal mass shift
+ISOTOPE_ABUNDANCES: Dict[str, np.ndarray] = {
+    "C": np.array([0.9893, 0.0107]),
+    "H": np.array([0.999885, 0.000115]),
+    "N": np.array([0.99636, 0.00364]),
+    "O": np.array([0.99757, 0.00038, 0.00205]),
+    "P": np.array([1.0]),
+    "S": np.array([0.9499, 0.0075, 0.0425, 0.0, 0.0001]),
+    "Si": np.array([0.92223, 0.04685, 0.03092]),
+}
+
+_FORMULA_TERM = re.compile(r"([A-Z][a-z]?)(\d*)")
+_MASS_ISOTOPOMER = re.compile(r"M?\+?(\d+)")
+
+
+def parse_formula(formula: str) -> Dict[str, int]:
+    """Get the number of atoms of each element in a formula such as "C6H12O6".
+
+    Elements may appear more than once, as in "CH3COOH".
+    """
+    counts: Dict[str, int] = {}
+    position = 0
+    for match in _FORMULA_TERM.finditer(formula):
+        if match.start() != position:
+            break
+        element, count = match.groups()
+        counts[element] = counts.get(element, 0) + int(count or 1)
+        position = match.end()
+    if position != len(formula) or not formula:
+        raise ValueError(f"Cannot parse the formula {formula!r}.")
+    return counts
+
+
+def _element_distribution(element: str, count: int, length: int) -> np.ndarray:
+    """Get the mass shift distribution of some atoms of an element.
+
+    The distribution is raised to the count by repeated squaring and
+    truncated to a length along the way.
+    """
+    if element not in ISOTOPE_ABUNDANCES:
+        raise ValueError(f"No isotope abundances for element {element}.")
+    out = np.zeros(length)
+    out[0] = 1.0
+    power = ISOTOPE_ABUNDANCES[element][:length]
+    while count:
+        if count & 1:
+            out = convolve(out, power)[:length]
+        power = convolve(power, power)[:length]
+        count >>= 1
+    return out
+
+
+@lru_cache(maxsize=None)
+def correction_matrix(
+    formula: str, num_atoms: int, num_isotopomers: int, element: str = "C"
+) -> np.ndarray:
+    """
+    Get the natural abundance correction matrix of a fragment.
+
+    The matrix is cached by its arguments and read-only.
+
+    Parameters
+    ----------
+    formula : str
+        The fragment's formula, including the labellable atoms.
+    num_atoms : int
+        The number of labellable atoms. Those that are labelled are heavy,
+        and the others have natural abundance.
+    num_isotopomers : int
+        The number of measured mass isotopomers.
+    element : str
+        The element of the labellable atoms.
+
+    Returns
+    -------
+    np.ndarray
+        A measured by labelled mass isotopomers matrix.
+    """
+    counts = parse_formula(formula)
+    if counts.get(element, 0) < num_atoms:
+        raise ValueError(
+            f"The formula {formula} has fewer than {num_atoms} atoms of "
+            f"{element}."
+        )
+    counts[element] -= num_atoms
+    natural = np.zeros(num_isotopomers)
+    natural[0] = 1.0
+    for e, count in sorted(counts.items()):
+        natural = convolve(
+            natural, _element_distribution(e, count, num_isotopomers)
+        )[:num_isotopomers]
+    matrix = np.zeros((num_isotopomers, num_atoms + 1))
+    for k in range(min(num_atoms + 1, num_isotopomers)):
+        # the num_atoms - k unlabelled labellable atoms have natural isotopes
+        column = convolve(
+            natural,
+            _element_distribution(element, num_atoms - k, num_isotopomers - k),
+        )
+        matrix[k:, k] = column[: num_isotopomers - k]
+    matrix.flags.writeable = False
+    return matrix
+
+
+def _groups(*columns: Sequence) -> List[Tuple[Tuple, np.ndarray]]:
+    """Get the positions of the rows with each combination of values."""
+    groups: Dict[Tuple, List[int]] = {}
+    for i, key in enumerate(zip(*columns)):
+        groups.setdefault(key, []).append(i)
+    return [(key, np.asarray(rows)) for key, rows in groups.items()]
+
+
+def _correct(matrix: np.ndarray, mids: np.ndarray) -> np.ndarray:
+    """Solve for the labelling of MIDs along the last axis and renormalize.
+
+    If more mass isotopomers are measured than there are labelling states,
+    the labelling is the least squares solution.
+    """
+    height, width = matrix.shape
+    flat = mids.reshape(-1, height).T
+    if height == width:
+        corrected = np.linalg.solve(matrix, flat).T
+    else:
+        corrected = np.linalg.lstsq(matrix, flat, rcond=None)[0].T
+    corrected = corrected.reshape(mids.shape[:-1] + (width,))
+    return corrected / corrected.sum(axis=-1, keepdims=True)
+
+
+def _mass_shift(mass_isotopomer_id: str) -> int:
+    """Get the mass shift of a mass isotopomer id such as "2", "M2" or "M+2"."""
+    match = _MASS_ISOTOPOMER.fullmatch(mass_isotopomer_id)
+    if match is None:
+        raise ValueError(
+            f"Cannot parse the mass isotopomer id {mass_isotopomer_id!r}."
+        )
+    return int(match.group(1))
+
+
+def formulas_by_fragment(compounds: Iterable[Compound]) -> Dict[str, str]:
+    """Get the formula of each fragment, or compound if it has no fragment."""
+    return {
+        c.fragment_id or c.id: c.formula
+        for c in compounds
+        if c.formula is not None
+    }
+
+
+def apply_natural_abundance(
+    mids: np.ndarray, formulas: Sequence[str], sizes: Sequence[int]
+) -> np.ndarray:
+    """
+    Add natural abundance to simulated MIDs, so they compare with raw ones.
+
+    Parameters
+    ----------
+    mids : np.ndarray
+        MIDs with EMUs along the second to last axis, padded with zeros,
+        such as the output of cmfa.emu.emu_simulate_batch.
+    formulas : Sequence[str]
+        The formula of each EMU's fragment.
+    sizes : Sequence[int]
+        The number of atoms of each EMU.
+
+    Returns
+    -------
+    np.ndarray
+        The MIDs with natural abundance, with the same shape.
+    """
+    out = np.zeros_like(mids)
+    for (formula, size), rows in _groups(formulas, sizes):
+        matrix = correction_matrix(formula, size, size + 1)
+        out[..., rows, : size + 1] = mids[..., rows, : size + 1] @ matrix.T
+    return out
+
+
+def correct_natural_abundance(
+    mids: np.ndarray, formulas: Sequence[str], sizes: Sequence[int]
+) -> np.ndarray:
+    """
+    Remove natural abundance from MIDs, renormalizing them to sum to 1.
+
+    The MIDs of each fragment are corrected together in one solve.
+
+    Parameters
+    ----------
+    mids : np.ndarray
+        MIDs with EMUs along the second to last axis, padded with zeros.
+    formulas : Sequence[str]
+        The formula of each EMU's fragment.
+    sizes : Sequence[int]
+        The number of atoms of each EMU.
+
+    Returns
+    -------
+    np.ndarray
+        The corrected MIDs, with the same shape.
+    """
+    out = np.zeros_like(mids)
+    for (formula, size), rows in _groups(formulas, sizes):
+        out[..., rows, : size + 1] = _correct(
+            correction_matrix(formula, size, size + 1),
+            mids[..., rows, : size + 1],
+        )
+    return out
+
+
+def correct_measurements(
+    measurements: MIDMeasurementArray,
+    fragment_formulas: Mapping[str, str],
+    compound_atoms: Mapping[str, int],
+) -> np.ndarray:
+    """
+    Correct measured MIDs for natural abundance.
+
+    The components of each measurement are ordered by the mass shift in
+    their mass isotopomer ids, such as "2", "M2" or "M+2", and must be
+    M+0, M+1, ... without gaps. A measurement may have more components than
+    its compound has labellable atoms, as for derivatised fragments, in
+    which case the labelling is fitted by least squares and the corrected
+    intensity of the extra components is 0. Measurements of the same
+    fragment, compound size and number of components are corrected together
+    in one solve.
+
+    Parameters
+    ----------
+    measurements : MIDMeasurementArray
+        The measurements.
+    fragment_formulas : Mapping[str, str]
+        The formula of each fragment id, as given by formulas_by_fragment.
+    compound_atoms : Mapping[str, int]
+        The number of labellable atoms of each compound id, such as the
+        compound_sizes of a reaction network's atom transition network.
+
+    Returns
+    -------
+    np.ndarray
+        The corrected normalized intensity of each component, in the order
+        of the measurements' components.
+    """
+    shift_of_code = np.array(
+        [_mass_shift(i) for i in measurements.mass_isotopomer_ids],
+        dtype=np.int64,
+    )
+    shifts = shift_of_code[measurements.mass_isotopomer_code]
+    sizes = measurements.sizes
+    # order[offsets[i] + k] is the position of measurement i's M+k
+    order = np.lexsort((shifts, measurements.component_measurement))
+    expected = np.arange(len(shifts)) - np.repeat(
+        measurements.offsets[:-1], sizes
+    )
+    if not np.array_equal(shifts[order], expected):
+        bad = np.unique(
+            measurements.component_measurement[order[shifts[order] != expected]]
+        )
+        raise ValueError(
+            f"MID measurements {bad.tolist()} do not have exactly the mass "
+            "isotopomers M+0, M+1, ... up to their size."
+        )
+    formulas = [
+        fragment_formulas[measurements.fragment_ids[code]]
+        for code in measurements.fragment_code.tolist()
+    ]
+    num_atoms = [
+        compound_atoms[measurements.compound_ids[code]]
+        for code in measurements.compound_code.tolist()
+    ]
+    out = np.zeros_like(measurements.normalized_intensity)
+    for (formula, atoms, size), rows in _groups(
+        formulas, num_atoms, sizes.tolist()
+    ):
+        if size < atoms + 1:
+            raise ValueError(
+                f"MID measurements {rows.tolist()} have {size} mass "
+                f"isotopomers, fewer than the {atoms + 1} needed to correct "
+                f"{atoms} labellable atoms."
+            )
+        components = order[
+            ragged_indices(measurements.offsets[rows], np.full(len(rows), size))
+        ].reshape(len(rows), size)
+        out[components[:, : atoms + 1]] = _correct(
+            correction_matrix(formula, atoms, size),
+            measurements.normalized_intensity[components],
+        )
+    return out
@@ -0,0 +1,71 @@
+"""Prepare the raw datasets for the inferences.
+
+Each subdirectory of data/raw with the four raw tables of a dataset is
+loaded with cmfa.data_preparation.load_dataset_from_csv and written as JSON
+to data/prepared/<subdirectory>/dataset.json, which is where cmfa/sample.py
+looks for the dataset named by an inference's prepared_data_dir.
+"""
+
+import logging
+from pathlib import Path
+from typing import Dict
+
+from cmfa.data_preparation import (
+    export_fluxomics_dataset_to_json,
+    load_dataset_from_csv,
+)
+
+HERE = Path(__file__).parent
+RAW_DIR = HERE / ".." / "data" / "raw"
+PREPARED_DIR = HERE / ".." / "data" / "prepared"
+PREPARED_DATASET_FILE = "dataset.json"
+# the raw tables of a dataset, as arguments of load_dataset_from_csv
+RAW_FILES = {
+    "tracer_file": "tracers.csv",
+    "flux_measurement_file": "flux.csv",
+    "mid_measurement_file": "ms_measurements.csv",
+    "reaction_file": "reactions.csv",
+}
+
+
+def discover_raw_datasets(raw_dir: Path = RAW_DIR) -> Dict[str, Path]:
+    """Get the directories with every raw table, by name, sorted by name."""
+    return {
+        path.name: path
+        for path in sorted(Path(raw_dir).iterdir())
+        if path.is_dir()
+        and all((path / name).exists() for name in RAW_FILES.values())
+    }
+
+
+def prepare_dataset(raw_dataset_dir: Path, prepared_dataset_dir: Path) -> Path:
+    """Prepare one raw dataset and return the path of its dataset.json."""
+    dataset = load_dataset_from_csv(
+        **{
+            argument: Path(raw_dataset_dir) / name
+            for argument, name in RAW_FILES.items()
+        }
+    )
+    prepared_dataset_dir = Path(prepared_dataset_dir)
+    prepared_dataset_dir.mkdir(parents=True, exist_ok=True)
+    path = prepared_dataset_dir / PREPARED_DATASET_FILE
+    export_fluxomics_dataset_to_json(dataset, path)
+    return path
+
+
+def main(raw_dir: Path = RAW_DIR, prepared_dir: Path = PREPARED_DIR):
+    """Prepare every raw dataset."""
+    raw_datasets = discover_raw_datasets(raw_dir)
+    if not raw_datasets:
+        logging.warning(
+            f"No raw datasets in {raw_dir}; each needs a directory with "
+            f"{', '.join(RAW_FILES.values())}."
+        )
+    for name, raw_dataset_dir in raw_datasets.items():
+        path = prepare_dataset(raw_dataset_dir, Path(prepared_dir) / name)
+        logging.info(f"Prepared {name} in {path}.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
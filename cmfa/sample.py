@@ -0,0 +1,111 @@
+"""Run all the inferences in the inferences directory.
+
+Each inference's dataset is read from the dataset.json that
+cmfa/prepare_data.py writes for its prepared_data_dir. The runs of every
+inference are planned by cmfa.inference_runs and sampled in parallel on a
+pool of processes sized so that their chains and threads fill the machine's
+cores.
+
+Each run writes its outputs to its own directory as soon as it finishes,
+followed by its fingerprint. Runs whose fingerprint has not changed are
+skipped, so rerunning after adding or changing an inference only samples
+what is new.
+"""
+
+import json
+import logging
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import arviz as az
+from cmdstanpy import CmdStanModel
+
+from cmfa.data_preparation import import_fluxomics_dataset_from_json
+from cmfa.inference_runs import (
+    FINGERPRINT_FILE,
+    Run,
+    build_stan_file,
+    discover_inferences,
+    plan_runs,
+)
+from cmfa.prepare_data import PREPARED_DATASET_FILE, PREPARED_DIR
+
+STAN_INPUT_CACHE_DIR = "stan_input_cache"
+
+
+def sample_run(run: Run) -> str:
+    """Sample a run and write its outputs, finishing with its fingerprint."""
+    if run.output_dir.exists():
+        shutil.rmtree(run.output_dir)
+    run.output_dir.mkdir(parents=True)
+    data_file = run.output_dir / "input.json"
+    data_file.write_text(json.dumps(run.data))
+    model = CmdStanModel(exe_file=run.exe_file)
+    mcmc = model.sample(
+        data=str(data_file),
+        output_dir=run.output_dir / "csv",
+        **run.sample_kwargs,
+    )
+    if run.mode == "prior":
+        idata = az.from_cmdstanpy(prior=mcmc, dims=run.dims)
+    elif run.mode == "kfold":
+        idata = az.from_cmdstanpy(
+            posterior=mcmc, log_likelihood="log_lik", dims=run.dims
+        )
+    else:
+        idata = az.from_cmdstanpy(posterior=mcmc, dims=run.dims)
+    idata.to_netcdf(run.output_dir / "idata.nc")
+    (run.output_dir / FINGERPRINT_FILE).write_text(run.fingerprint)
+    return run.name
+
+
+def main():
+    """Run every inference's modes that are not up to date."""
+    runs: List[Run] = []
+    exe_files: Dict[Tuple[str, str, str], Path] = {}
+    for inference_dir, config in discover_inferences().items():
+        prepared_dir = PREPARED_DIR / config.prepared_data_dir
+        dataset = import_fluxomics_dataset_from_json(
+            prepared_dir / PREPARED_DATASET_FILE
+        )
+        for run in plan_runs(
+            inference_dir,
+            config,
+            dataset,
+            cache_dir=prepared_dir / STAN_INPUT_CACHE_DIR,
+        ):
+            if run.is_done():
+                logging.info(f"Skipping {run.name}, which is up to date.")
+                continue
+            # compile each model and set of options once, here, so workers
+            # never compile
+            if run.compile_key not in exe_files:
+                model = CmdStanModel(
+                    stan_file=build_stan_file(run),
+                    stanc_options=run.stanc_options,
+                    cpp_options=run.cpp_options,
+                )
+                exe_files[run.compile_key] = Path(model.exe_file)
+            run.exe_file = exe_files[run.compile_key]
+            runs.append(run)
+    if not runs:
+        logging.info("All runs are up to date.")
+        return
+    cores_per_run = max(run.cores for run in runs)
+    max_workers = max(1, (os.cpu_count() or 1) // cores_per_run)
+    logging.info(f"Sampling {len(runs)} runs on {max_workers} processes.")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(sample_run, run): run for run in runs}
+        for future in as_completed(futures):
+            try:
+                logging.info(f"Finished {future.result()}.")
+            except Exception:
+                logging.exception(f"Run {futures[future].name} failed.")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
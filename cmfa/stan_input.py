@@ -0,0 +1,129 @@
+"""Provides functions get_stan_input_x.
+
+These functions should take in a FluxomicsDataset and return a dictionary
+that can be used as data for a Stan model, as named by the
+stan_input_function of an inference's config.toml.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from cmfa.fluxomics_data.fluxomics_dataset import FluxomicsDataset
+from cmfa.fluxomics_data.mid_measurement import MIDMeasurementArray
+
+# change this when the output of get_stan_input changes, to invalidate caches
+STAN_INPUT_VERSION = 1
+
+
+def dataset_digest(dataset: FluxomicsDataset) -> str:
+    """Get a sha256 hash of the content of a dataset's MID measurements.
+
+    The hash is taken over the id tables and the raw bytes of the columnar
+    arrays, so it is fast even for large datasets.
+    """
+    return _mids_digest(dataset.to_columnar().mid_measurements)
+
+
+def _mids_digest(mids: MIDMeasurementArray) -> str:
+    """Get the hash of dataset_digest from a columnar store."""
+    digest = hashlib.sha256(f"stan_input_v{STAN_INPUT_VERSION}".encode())
+    for name in type(mids).model_fields:
+        value = getattr(mids, name)
+        digest.update(name.encode())
+        if isinstance(value, np.ndarray):
+            array = np.ascontiguousarray(value)
+            digest.update(array.dtype.str.encode())
+            digest.update(array.tobytes())
+        else:
+            digest.update(json.dumps(value).encode())
+    return digest.hexdigest()
+
+
+def _get_stan_input(mids: MIDMeasurementArray) -> Dict[str, Any]:
+    """Build the Stan input of a columnar store of MID measurements."""
+    sizes = mids.sizes
+    y_end = np.cumsum(sizes)
+    totals = np.bincount(
+        mids.component_measurement,
+        weights=mids.measured_intensity,
+        minlength=len(mids),
+    )
+    for problem, bad in [
+        ("no components", sizes == 0),
+        ("a total intensity of 0", (sizes > 0) & ~(totals > 0)),
+    ]:
+        if bad.any():
+            raise ValueError(
+                f"MID measurements {np.flatnonzero(bad).tolist()} have "
+                f"{problem}, so they cannot be given to Stan."
+            )
+    return {
+        "N": int(len(mids.normalized_intensity)),
+        "N_measurement": len(mids),
+        "N_experiment": len(mids.experiment_ids),
+        "N_fragment": len(mids.fragment_ids),
+        "y_sizes": sizes.tolist(),
+        "y_start": (y_end - sizes + 1).tolist(),
+        "y_end": y_end.tolist(),
+        "stacked_y": mids.normalized_intensity.tolist(),
+        "stacked_y_error": (
+            mids.measured_std_dev / totals[mids.component_measurement]
+        ).tolist(),
+        "experiment": (mids.experiment_code + 1).tolist(),
+        "fragment": (mids.fragment_code + 1).tolist(),
+    }
+
+
+def get_stan_input(
+    dataset: FluxomicsDataset, cache_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    Get the Stan input of the compositional models from a dataset.
+
+    The MIDs of all the measurements are stacked into one vector, with the
+    size and the 1-based first and last positions of each measurement. The
+    measurement errors are on the scale of the normalized intensities.
+    Experiments and fragments are given as 1-based indexes into the
+    dataset's unique experiment and fragment ids, in order of appearance.
+
+    Every measurement must have at least one component and a positive
+    total measured intensity, or a ValueError is raised.
+
+    If a cache directory is given, the input is stored there as JSON under
+    a hash of the MID measurements, and later calls with the same
+    measurements read it back instead of building it again. The cached
+    file can be passed straight to cmdstanpy as data.
+
+    Parameters
+    ----------
+    dataset : FluxomicsDataset
+        The dataset.
+    cache_dir : Optional[Path]
+        The directory for cached inputs.
+
+    Returns
+    -------
+    Dict[str, Any]
+        The Stan input.
+    """
+    mids = dataset.to_columnar().mid_measurements
+    if cache_dir is None:
+        return _get_stan_input(mids)
+    cache_dir = Path(cache_dir)
+    path = cache_dir / f"stan_input_{_mids_digest(mids)}.json"
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    stan_input = _get_stan_input(mids)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # write to a temporary file first, so concurrent runs never see half of it
+    temporary = path.with_suffix(f".{os.getpid()}.tmp")
+    with open(temporary, "w", encoding="utf-8") as f:
+        json.dump(stan_input, f)
+    os.replace(temporary, path)
+    return stan_input
@@ -0,0 +1,203 @@
+"""Turning tracer experiments into the MIDs of input EMUs.
+
+An experiment's medium holds each tracer with its enrichment, i.e. the
+fraction of the tracer's compound that is that tracer, and the rest of the
+compound is unlabelled. Each labelled atom position of a tracer carries the
+label with probability equal to the tracer's purity, independently of the
+others, so the number of labelled atoms that an EMU of a tracer picks up
+follows a binomial distribution.
+
+Natural abundance is not included here, so the MIDs only describe the
+tracer labelling. cmfa.natural_abundance adds the natural isotopes of every
+atom, including the unlabelled labellable atoms, to simulated MIDs.
+"""
+
+from functools import cached_property
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from pydantic import BaseModel, PrivateAttr
+from scipy.stats import binom
+
+from cmfa.fluxomics_data.emu_map import EMU
+from cmfa.fluxomics_data.fluxomics_dataset import FluxomicsDataset
+from cmfa.fluxomics_data.tracer import Tracer, TracerExperiment
+
+type InputKey = Tuple[str, str, Tuple[int, ...]]
+
+
+class TracerInput(BaseModel):
+    """
+    The MIDs of input EMUs in each tracer experiment.
+
+    MIDs are computed for all experiments at once and cached by experiment,
+    compound and atoms, so simulating many flux vectors or experiments never
+    recomputes the labelling of a substrate. The tracers and experiments
+    should therefore not be changed after the MIDs are first computed.
+
+    Attributes
+    ----------
+    tracers : List[Tracer]
+        The tracers, identified by their isotope.
+    tracer_experiments : List[TracerExperiment]
+        The experiments, with the enrichment of each of their tracers.
+
+    Methods
+    -------
+    from_dataset(dataset)
+        Get the tracer input of a fluxomics dataset.
+
+    input_mid_array(emus)
+        Get the MID of some EMUs in every experiment as one array.
+
+    input_mids(emus)
+        Get the MID of some EMUs in every experiment by experiment id.
+    """
+
+    tracers: List[Tracer]
+    tracer_experiments: List[TracerExperiment]
+
+    _cache: Dict[InputKey, np.ndarray] = PrivateAttr(default_factory=dict)
+
+    def __repr__(self):
+        """Return a string representation of the tracer input."""
+        return (
+            f"<TracerInput num_tracers={len(self.tracers)}, "
+            f"num_tracer_experiments={len(self.tracer_experiments)}>"
+        )
+
+    @classmethod
+    def from_dataset(cls, dataset: FluxomicsDataset) -> "TracerInput":
+        """Get the tracer input of a fluxomics dataset."""
+        return cls(
+            tracers=dataset.tracers,
+            tracer_experiments=dataset.tracer_experiments,
+        )
+
+    @cached_property
+    def experiment_ids(self) -> List[str]:
+        """Get the id of each experiment."""
+        return [e.experiment_id for e in self.tracer_experiments]
+
+    @cached_property
+    def _enrichments(self) -> Dict[str, Tuple[List[Tracer], np.ndarray]]:
+        """Get each labelled compound's tracers and their enrichments.
+
+        The enrichments are an experiments by tracers array.
+        """
+        tracer_index = {t.isotope: t for t in self.tracers}
+        by_compound: Dict[str, List[Tracer]] = {}
+        for tracer in self.tracers:
+            by_compound.setdefault(tracer.compound, []).append(tracer)
+        enrichments = {
+            compound: np.zeros((len(self.tracer_experiments), len(tracers)))
+            for compound, tracers in by_compound.items()
+        }
+        for row, experiment in enumerate(self.tracer_experiments):
+            for isotope, enrichment in experiment.tracer_enrichments.items():
+                if isotope not in tracer_index:
+                    raise ValueError(
+                        f"Tracer {isotope} of experiment "
+                        f"{experiment.experiment_id} is not a known tracer."
+                    )
+                tracer = tracer_index[isotope]
+                tracers = by_compound[tracer.compound]
+                enrichments[tracer.compound][
+                    row, tracers.index(tracer)
+                ] += enrichment
+        for compound, array in enrichments.items():
+            total = array.sum(axis=1)
+            if np.any(total > 1 + 1e-9):
+                raise ValueError(
+                    f"The enrichments of compound {compound} add up to more "
+                    f"than 1 in experiments "
+                    f"{np.asarray(self.experiment_ids)[total > 1 + 1e-9]}."
+                )
+        return {
+            compound: (by_compound[compound], enrichments[compound])
+            for compound in by_compound
+        }
+
+    def _compute(self, emu: EMU) -> np.ndarray:
+        """Compute an EMU's MID in every experiment."""
+        width = emu.size + 1
+        unlabelled = np.zeros(width)
+        unlabelled[0] = 1.0
+        if emu.compound_id not in self._enrichments:
+            return np.tile(unlabelled, (len(self.tracer_experiments), 1))
+        tracers, enrichments = self._enrichments[emu.compound_id]
+        num_labelled = np.array(
+            [
+                len(t.labelled_atom_positions.intersection(emu.atoms))
+                for t in tracers
+            ]
+        )
+        purity = np.array([t.purity for t in tracers])
+        tracer_mids = binom.pmf(
+            np.arange(width), num_labelled[:, None], purity[:, None]
+        )
+        return (
+            enrichments @ tracer_mids
+            + (1 - enrichments.sum(axis=1))[:, None] * unlabelled
+        )
+
+    def input_mid_array(self, emus: Iterable[EMU]) -> np.ndarray:
+        """
+        Get the MID of some EMUs in every experiment as one array.
+
+        Parameters
+        ----------
+        emus : Iterable[EMU]
+            The EMUs, such as an EMU map's input EMUs.
+
+        Returns
+        -------
+        np.ndarray
+            An experiments by EMUs by mass isotopomers array, in the order of
+            experiment_ids and padded with zeros to the largest EMU size.
+        """
+        emus = list(emus)
+        width = max((e.size for e in emus), default=0) + 1
+        out = np.zeros((len(self.tracer_experiments), len(emus), width))
+        for column, emu in enumerate(emus):
+            keys = [
+                (e, emu.compound_id, emu.atoms) for e in self.experiment_ids
+            ]
+            if any(key not in self._cache for key in keys):
+                for key, mid in zip(keys, self._compute(emu)):
+                    # cached MIDs are shared, so they are made read-only
+                    mid.flags.writeable = False
+                    self._cache[key] = mid
+            out[:, column, : emu.size + 1] = np.reshape(
+                [self._cache[key] for key in keys], (-1, emu.size + 1)
+            )
+        return out
+
+    def input_mids(
+        self, emus: Iterable[EMU]
+    ) -> Dict[str, Dict[EMU, np.ndarray]]:
+        """
+        Get the MID of some EMUs in every experiment by experiment id.
+
+        Each experiment's mapping can be passed as the input_mids of
+        cmfa.emu.emu_simulate.
+
+        Parameters
+        ----------
+        emus : Iterable[EMU]
+            The EMUs, such as an EMU map's input EMUs.
+
+        Returns
+        -------
+        Dict[str, Dict[EMU, np.ndarray]]
+            The MID of each EMU in each experiment.
+        """
+        emus = list(emus)
+        self.input_mid_array(emus)
+        return {
+            experiment_id: {
+                emu: self._cache[(experiment_id, emu.compound_id, emu.atoms)]
+                for emu in emus
+            }
+            for experiment_id in self.experiment_ids
+        }
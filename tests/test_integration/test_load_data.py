@@ -3,7 +3,10 @@
 from pathlib import Path
 
 from cmfa.data_preparation import (
+    export_fluxomics_dataset_to_binary,
+    import_fluxomics_dataset_from_binary,
     import_fluxomics_dataset_from_json,
+    import_fluxomics_dataset_sections,
     load_dataset_from_csv,
 )
 
@@ -26,3 +29,35 @@ def test_load_dataset_from_csv():
     )
     ds_from_json = import_fluxomics_dataset_from_json(MODEL_FILE)
     assert ds_from_csv == ds_from_json
+
+
+def test_load_columnar_dataset_from_csv():
+    """Test that columnar measurement stores hold the same dataset."""
+    ds_columnar = load_dataset_from_csv(
+        tracer_file=TRACER_FILE,
+        flux_measurement_file=FLUX_MEASUREMENT_FILE,
+        mid_measurement_file=MID_MEASUREMENT_FILE,
+        reaction_file=REACTION_FILE,
+        columnar=True,
+    )
+    ds_from_json = import_fluxomics_dataset_from_json(MODEL_FILE)
+    assert ds_columnar == ds_from_json
+
+
+def test_binary_dataset_round_trip(tmp_path):
+    """Test that a dataset survives a round trip through the binary format."""
+    ds_from_json = import_fluxomics_dataset_from_json(MODEL_FILE)
+    binary_file = tmp_path / "model.bin"
+    export_fluxomics_dataset_to_binary(ds_from_json, binary_file)
+    assert import_fluxomics_dataset_from_binary(binary_file) == ds_from_json
+
+
+def test_import_fluxomics_dataset_sections():
+    """Test loading some sections of a dataset for one experiment."""
+    lazy_ds = import_fluxomics_dataset_sections(
+        MODEL_FILE, sections=["mid_measurements"], experiment_ids=["exp2"]
+    )
+    assert [m.experiment_id for m in lazy_ds.mid_measurements] == ["exp2"]
+    assert "reaction_network" not in vars(lazy_ds)
+    ds_from_json = import_fluxomics_dataset_from_json(MODEL_FILE)
+    assert lazy_ds.reaction_network == ds_from_json.reaction_network
@@ -0,0 +1,36 @@
+"""Test preparing raw data for the inferences."""
+
+import shutil
+
+from cmfa.data_preparation import import_fluxomics_dataset_from_json
+from cmfa.inference_configuration import InferenceConfiguration
+from cmfa.inference_runs import plan_runs
+from cmfa.prepare_data import PREPARED_DATASET_FILE, RAW_FILES, main
+
+from .test_load_data import DATA_DIR, MODEL_FILE
+
+INFERENCE_DIR = DATA_DIR / ".." / ".." / "inferences" / "first_inference"
+
+
+def test_prepare_data_and_plan_runs(tmp_path):
+    """Test going from raw tables to the runs of the example inference."""
+    config = InferenceConfiguration.from_toml(INFERENCE_DIR / "config.toml")
+    raw_dir, prepared_dir = tmp_path / "raw", tmp_path / "prepared"
+    raw_dataset_dir = raw_dir / config.prepared_data_dir
+    raw_dataset_dir.mkdir(parents=True)
+    for name in RAW_FILES.values():
+        shutil.copy(DATA_DIR / name, raw_dataset_dir / name)
+    # directories without every raw table are not datasets
+    (raw_dir / "incomplete").mkdir()
+    main(raw_dir, prepared_dir)
+    assert [p.name for p in prepared_dir.iterdir()] == [
+        config.prepared_data_dir
+    ]
+    dataset = import_fluxomics_dataset_from_json(
+        prepared_dir / config.prepared_data_dir / PREPARED_DATASET_FILE
+    )
+    assert dataset == import_fluxomics_dataset_from_json(MODEL_FILE)
+    runs = plan_runs(tmp_path / "inference", config, dataset)
+    assert [r.mode for r in runs] == config.modes
+    for run in runs:
+        assert run.data["N_measurement"] == len(dataset.mid_measurements)
@@ -0,0 +1,31 @@
+"""Integration tests that compile the Stan models."""
+
+import shutil
+from pathlib import Path
+
+import pytest
+
+cmdstanpy = pytest.importorskip("cmdstanpy")
+
+STAN_DIR = Path(__file__).parent / ".." / ".." / "cmfa" / "stan"
+
+
+@pytest.mark.parametrize(
+    "stan_file, cpp_options",
+    [
+        ("ragged_comp_demo.stan", {}),
+        ("ragged_comp_demo_threaded.stan", {"STAN_THREADS": True}),
+    ],
+)
+def test_stan_model_compiles(tmp_path, stan_file, cpp_options):
+    """Test that a model compiles, in a copy so no executable is reused."""
+    try:
+        cmdstanpy.cmdstan_path()
+    except ValueError:
+        pytest.skip("CmdStan is not installed.")
+    copy = tmp_path / stan_file
+    shutil.copyfile(STAN_DIR / stan_file, copy)
+    model = cmdstanpy.CmdStanModel(
+        stan_file=copy, cpp_options=cpp_options, compile="force"
+    )
+    assert Path(model.exe_file).exists()
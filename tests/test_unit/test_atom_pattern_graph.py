@@ -0,0 +1,26 @@
+"""Unit tests for the sparse atom pattern graph."""
+
+from cmfa.fluxomics_data.reaction_network import ReactionNetwork
+
+from .test_reaction_network import EXAMPLE_NETWORK_INPUT
+
+
+def test_atom_pattern_graph():
+    """Test the edges of the example network's atom pattern graph."""
+    graph = ReactionNetwork.model_validate(
+        EXAMPLE_NETWORK_INPUT
+    ).atom_pattern_graph
+    assert set(graph.edges_between(("D", "abc"), ("B", "abc"))) == {
+        "v2_rev",
+        "v3",
+    }
+    assert set(graph.edges_from(("B", "abc"))) == {
+        (("A", "abc"), "v1_rev"),
+        (("D", "abc"), "v2"),
+        (("D", "abc"), "v3_rev"),
+        (("C", "ab"), "v4"),
+        (("E", "c"), "v4"),
+        (("D", "bcd"), "v5"),
+        (("E", "a"), "v5"),
+    }
+    assert graph.to_csr().sum() == len(graph.target)
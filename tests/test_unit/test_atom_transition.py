@@ -0,0 +1,63 @@
+"""Unit tests for the atom transition network."""
+
+from cmfa.fluxomics_data.atom_transition import ReactionAtomMap
+from cmfa.fluxomics_data.reaction import Reaction
+from cmfa.fluxomics_data.reaction_network import ReactionNetwork
+
+from .test_reaction_network import EXAMPLE_NETWORK_INPUT
+
+
+def test_reaction_atom_map():
+    """Test the atom maps of a reaction that splits and joins compounds."""
+    reaction = Reaction(
+        id="v5",
+        stoichiometry_input={
+            "B": {"abc": -1},
+            "C": {"de": -1},
+            "D": {"bcd": 1},
+            "E": {"a": 1},
+            "F": {"e": 1},
+        },
+    )
+    forward = ReactionAtomMap.from_reaction(reaction)
+    assert forward.reactant_ids == ["B", "C"]
+    assert forward.product_ids == ["D", "E", "F"]
+    assert forward.reactant_index.tolist() == [[0, 0, 1, 0, 1]]
+    assert forward.reactant_position.tolist() == [[1, 2, 0, 0, 1]]
+    reverse = ReactionAtomMap.from_reaction(reaction, reverse=True)
+    assert reverse.reaction_id == "v5_rev"
+    assert reverse.product_ids == ["B", "C"]
+    assert reverse.reactant_ids == ["D", "E", "F"]
+    assert reverse.reactant_index.tolist() == [[1, 0, 0, 0, 2]]
+
+
+def test_symmetric_reactant():
+    """Test that the orientations of a symmetric reactant are variants."""
+    reaction = Reaction(
+        id="v",
+        stoichiometry_input={
+            "A": {"abc": -0.5, "cba": -0.5},
+            "B": {"ab": 1},
+            "C": {"c": 1},
+        },
+    )
+    atom_map = ReactionAtomMap.from_reaction(reaction)
+    assert atom_map.reactant_coefficients.tolist() == [1.0]
+    assert atom_map.variant_weights.tolist() == [0.5, 0.5]
+    assert atom_map.reactant_position.tolist() == [[0, 1, 2], [2, 1, 0]]
+
+
+def test_atom_transition_network():
+    """Test the edges of the example network's atom transition network."""
+    network = ReactionNetwork.model_validate(EXAMPLE_NETWORK_INPUT)
+    atn = network.atom_transition_network
+    assert atn is network.atom_transition_network
+    assert atn.compound_sizes["B"] == 3
+    assert set(atn.edges_from(("B", 1))) == {
+        (("A", 1), "v1_rev", 1.0),
+        (("D", 1), "v2", 1.0),
+        (("D", 1), "v3_rev", 1.0),
+        (("C", 1), "v4", 1.0),
+        (("E", 1), "v5", 1.0),
+    }
+    assert atn.atom_map_index["v5"].product_ids == ["D", "E", "F"]
@@ -0,0 +1,38 @@
+"""Unit tests for the batched MID convolution."""
+
+import numpy as np
+import pytest
+
+from cmfa.convolution import convolve, convolve_indexed
+
+
+@pytest.mark.parametrize("method", ["auto", "direct", "fft"])
+@pytest.mark.parametrize("lengths", [(3, 2), (2, 7), (12, 15)])
+def test_convolve(method, lengths):
+    """Test batched convolution against numpy's one at a time."""
+    rng = np.random.default_rng(0)
+    a = rng.random((4, 3, lengths[0]))
+    b = rng.random((3, lengths[1]))
+    out = convolve(a, b, method)
+    assert out.shape == (4, 3, sum(lengths) - 1)
+    for i in range(4):
+        for j in range(3):
+            np.testing.assert_allclose(out[i, j], np.convolve(a[i, j], b[j]))
+
+
+def test_convolve_indexed():
+    """Test convolving groups of EMUs given by store positions."""
+    rng = np.random.default_rng(1)
+    stores = {1: rng.random((2, 4, 2)), 2: rng.random((2, 3, 3))}
+    slots = [np.array([0, 3]), np.array([2, 2]), np.array([1, 0])]
+    out = convolve_indexed(stores, [1, 2, 1], slots)
+    assert out.shape == (2, 2, 5)
+    for draw in range(2):
+        for i in range(2):
+            expected = np.convolve(
+                np.convolve(stores[1][draw, slots[0][i]], stores[2][draw, 2]),
+                stores[1][draw, slots[2][i]],
+            )
+            np.testing.assert_allclose(out[draw, i], expected)
+    with pytest.raises(ValueError):
+        convolve(stores[1], stores[1], "bad")
@@ -0,0 +1,97 @@
+"""Unit tests for the data preparation functions."""
+
+import pandas as pd
+import pytest
+
+from cmfa.data_preparation import (
+    _skip_json_value,
+    iter_mid_measurements,
+    parse_mid_measurements,
+    parse_reaction_equation,
+    parse_reaction_equations,
+)
+
+EXAMPLE_MID_TABLE = pd.DataFrame(
+    {
+        "experiment_id": ["e1", "e2", "e1", "e2", "e1"],
+        "met_id": ["F", "F", "F", "F", "G"],
+        "ms_id": ["F1", "F1", "F1", "F1", "G1"],
+        "mass_isotope": [0, 0, 1, 1, 0],
+        "intensity": [0.2, 0.4, 0.8, 0.6, 1.0],
+        "intensity_std_error": [0.01, 0.01, 0.01, 0.01, 0.01],
+    }
+)
+
+
+def test_parse_mid_measurements_interleaved():
+    """Test that interleaved rows are grouped in order of first appearance."""
+    mids = parse_mid_measurements(EXAMPLE_MID_TABLE)
+    assert [(m.experiment_id, m.compound_id) for m in mids] == [
+        ("e1", "F"),
+        ("e2", "F"),
+        ("e1", "G"),
+    ]
+    assert [c.mass_isotopomer_id for c in mids[0].measured_components] == [
+        "0",
+        "1",
+    ]
+    assert mids[1].measured_components[1].normalized_intensity == 0.6
+
+
+def test_iter_mid_measurements(tmp_path):
+    """Test that streaming in small chunks matches parsing the whole table."""
+    expected = parse_mid_measurements(EXAMPLE_MID_TABLE)
+    unsorted_file = tmp_path / "unsorted.csv"
+    EXAMPLE_MID_TABLE.to_csv(unsorted_file, index=False)
+    sorted_file = tmp_path / "sorted.csv"
+    EXAMPLE_MID_TABLE.iloc[[0, 2, 1, 3, 4]].to_csv(sorted_file, index=False)
+    streamed = iter_mid_measurements(
+        unsorted_file, chunksize=2, presorted=False
+    )
+    assert list(streamed) == expected
+    assert list(iter_mid_measurements(sorted_file, chunksize=1)) == expected
+    with pytest.raises(ValueError):
+        list(iter_mid_measurements(unsorted_file, chunksize=2))
+
+
+@pytest.mark.parametrize("presorted", [True, False])
+def test_iter_mid_measurements_missing_key(tmp_path, presorted):
+    """Test that rows without a complete key are rejected in both modes."""
+    table = EXAMPLE_MID_TABLE.copy()
+    table.loc[3, "ms_id"] = None
+    path = tmp_path / "missing.csv"
+    table.to_csv(path, index=False)
+    with pytest.raises(ValueError, match=r"rows \[4\]"):
+        list(iter_mid_measurements(path, chunksize=2, presorted=presorted))
+
+
+def test_skip_json_value():
+    """Test skipping JSON values with brackets and quotes inside strings."""
+    buffer = b' {"a": ["]", "\\"}", {"b": [1, 2]}], "c": -1.5e3} , true'
+    end = _skip_json_value(buffer, 0)
+    assert buffer[end:] == b" , true"
+    assert _skip_json_value(buffer, end + 3) == len(buffer)
+    with pytest.raises(ValueError):
+        _skip_json_value(b"[1, [2]", 0)
+
+
+def test_parse_reaction_equation():
+    """Test parsing a reaction equation with a repeated product compound."""
+    stoichiometry, reversible = parse_reaction_equation(
+        "B (abc) + C (de) -> D (bcd) + E (a) + E (e)"
+    )
+    assert not reversible
+    assert stoichiometry == {
+        "B": {"abc": -1.0},
+        "C": {"de": -1.0},
+        "D": {"bcd": 1.0},
+        "E": {"a": 1.0, "e": 1.0},
+    }
+
+
+def test_parse_reaction_equations_error():
+    """Test that a malformed equation is reported with its row and offset."""
+    with pytest.raises(ValueError, match="Row 1: .* at character 7"):
+        parse_reaction_equations(
+            ["A (ab) -> B (ab)", "A (ab) B (ab) -> C (ab)"]
+        )
@@ -0,0 +1,302 @@
+"""Unit tests for the EMU decomposition."""
+
+import numpy as np
+
+from cmfa.emu import (
+    create_emu_reaction,
+    decompose_network,
+    emu_simulate,
+    emu_simulate_batch,
+    emu_simulate_with_jacobian,
+)
+from cmfa.fluxomics_data.atom_transition import ReactionAtomMap
+from cmfa.fluxomics_data.emu_map import EMU
+from cmfa.fluxomics_data.reaction import Reaction
+from cmfa.fluxomics_data.reaction_network import ReactionNetwork
+
+# The example network from Antoniewicz et al. (2007)
+EXAMPLE_EMU_NETWORK = ReactionNetwork(
+    id="EMU example",
+    compounds=set(),
+    reactions={
+        Reaction(
+            id="v1",
+            reversible=False,
+            stoichiometry_input={"A": {"abc": -1}, "B": {"abc": 1}},
+        ),
+        Reaction(
+            id="v2",
+            stoichiometry_input={"B": {"abc": -1}, "D": {"abc": 1}},
+        ),
+        Reaction(
+            id="v3",
+            reversible=False,
+            stoichiometry_input={
+                "B": {"abc": -1},
+                "C": {"bc": 1},
+                "E": {"a": 1},
+            },
+        ),
+        Reaction(
+            id="v4",
+            reversible=False,
+            stoichiometry_input={
+                "B": {"abc": -1},
+                "C": {"de": -1},
+                "D": {"bcd": 1},
+                "E": {"a": 1, "e": 1},
+            },
+        ),
+        Reaction(
+            id="v5",
+            reversible=False,
+            stoichiometry_input={"D": {"abc": -1}, "F": {"abc": 1}},
+        ),
+    },
+)
+
+# A ring of reversible reactions that shuffle atoms, so each size level has
+# a strongly connected block of several EMUs
+RING_NETWORK = ReactionNetwork(
+    id="ring",
+    compounds=set(),
+    reactions={
+        Reaction(
+            id="v1",
+            reversible=False,
+            stoichiometry_input={"A": {"abc": -1}, "B": {"abc": 1}},
+        ),
+        Reaction(
+            id="v2",
+            stoichiometry_input={"B": {"abc": -1}, "C": {"cab": 1}},
+        ),
+        Reaction(
+            id="v3",
+            stoichiometry_input={"C": {"abc": -1}, "D": {"bca": 1}},
+        ),
+        Reaction(
+            id="v4",
+            stoichiometry_input={"D": {"abc": -1}, "B": {"acb": 1}},
+        ),
+        Reaction(
+            id="v5",
+            reversible=False,
+            stoichiometry_input={
+                "D": {"abc": -1},
+                "E": {"d": -1},
+                "F": {"abcd": 1},
+            },
+        ),
+    },
+)
+
+
+def reaction_set(emu_map, size):
+    """Get the EMU reactions of a size as comparable tuples."""
+    return {
+        (r.reaction_id, repr(r.product), tuple(map(repr, r.reactants)))
+        for r in emu_map.levels[size]
+    }
+
+
+def test_decompose_network():
+    """Test decomposing the example network from a measured EMU of F."""
+    emu_map = decompose_network(
+        [EMU(compound_id="F", atoms=(1, 2, 3))], EXAMPLE_EMU_NETWORK
+    )
+    assert emu_map.sizes == [1, 2, 3]
+    assert reaction_set(emu_map, 2) == {
+        ("v1", "B[2,3]", ("A[2,3]",)),
+        ("v2_rev", "B[2,3]", ("D[2,3]",)),
+        ("v2", "D[2,3]", ("B[2,3]",)),
+        ("v4", "D[2,3]", ("B[3]", "C[1]")),
+    }
+    assert ("v4", "D[1,2,3]", ("B[2,3]", "C[1]")) in reaction_set(emu_map, 3)
+    assert ("v3", "C[1]", ("B[2]",)) in reaction_set(emu_map, 1)
+    assert {repr(e) for e in emu_map.input_emus} == {
+        "A[2]",
+        "A[3]",
+        "A[2,3]",
+        "A[1,2,3]",
+    }
+
+
+def test_create_emu_reaction_symmetric():
+    """Test that the orientations of a symmetric compound are merged."""
+    reaction = Reaction(
+        id="v",
+        stoichiometry_input={
+            "A": {"abcd": -0.5, "dcba": -0.5},
+            "B": {"abcd": 1},
+        },
+    )
+    emu_reactions = create_emu_reaction(
+        ReactionAtomMap.from_reaction(reaction),
+        EMU(compound_id="B", atoms=(2, 3)),
+    )
+    assert len(emu_reactions) == 1
+    assert emu_reactions[0].coefficient == 1.0
+    assert emu_reactions[0].reactants == (EMU(compound_id="A", atoms=(2, 3)),)
+
+
+def test_emu_blocks():
+    """Test that blocks are strongly connected and in solve order."""
+    emu_map = decompose_network(
+        [EMU(compound_id="F", atoms=(1, 2, 3))], EXAMPLE_EMU_NETWORK
+    )
+    blocks = emu_map.blocks
+    assert [repr(block.emus) for block in blocks if block.emu_size == 2] == [
+        "[B[2,3], D[2,3]]"
+    ]
+    assert [b.emus[0].compound_id for b in blocks if b.emu_size == 3] == [
+        "B",
+        "F",
+    ]
+    for position, block in enumerate(blocks):
+        assert all(upstream < position for upstream in block.upstream_blocks)
+        for i in block.reaction_indices:
+            assert (
+                emu_map.block_of[emu_map.emu_reactions[i].product] == position
+            )
+    # replacing the EMU reactions invalidates everything derived from them
+    emu_map.emu_reactions = [
+        r for r in emu_map.emu_reactions if r.emu_size == 3
+    ]
+    assert emu_map.sizes == [3]
+    assert {b.emu_size for b in emu_map.blocks} == {3}
+
+
+def test_emu_simulate():
+    """Test simulated MIDs against closed forms for a mixing network."""
+    network = ReactionNetwork(
+        id="mixing",
+        compounds=set(),
+        reactions={
+            Reaction(
+                id="r1",
+                reversible=False,
+                stoichiometry_input={"A": {"ab": -1}, "B": {"ab": 1}},
+            ),
+            Reaction(
+                id="r2",
+                reversible=False,
+                stoichiometry_input={"C": {"ab": -1}, "B": {"ba": 1}},
+            ),
+            Reaction(
+                id="r3",
+                reversible=False,
+                stoichiometry_input={
+                    "B": {"ab": -1},
+                    "E": {"c": -1},
+                    "G": {"abc": 1},
+                },
+            ),
+            Reaction(
+                id="r4",
+                reversible=False,
+                stoichiometry_input={"H": {"abc": -1}, "G": {"abc": 1}},
+            ),
+        },
+    )
+    b1 = EMU(compound_id="B", atoms=(1,))
+    g = EMU(compound_id="G", atoms=(1, 2, 3))
+    emu_map = decompose_network([b1, g], network)
+    input_mids = {
+        EMU(compound_id="A", atoms=(1,)): [0.9, 0.1],
+        EMU(compound_id="C", atoms=(2,)): [0.5, 0.5],
+        EMU(compound_id="A", atoms=(1, 2)): [0.8, 0.1, 0.1],
+        EMU(compound_id="C", atoms=(1, 2)): [0.5, 0.0, 0.5],
+        EMU(compound_id="E", atoms=(1,)): [0.6, 0.4],
+        EMU(compound_id="H", atoms=(1, 2, 3)): [0.0, 0.0, 0.0, 1.0],
+    }
+    fluxes = {"r1": 3.0, "r2": 1.0, "r3": 4.0, "r4": 1.0}
+    mids = emu_simulate(fluxes, emu_map, input_mids)
+    b12 = (3.0 * np.array([0.8, 0.1, 0.1]) + np.array([0.5, 0.0, 0.5])) / 4.0
+    np.testing.assert_allclose(mids[0], [0.8, 0.2, 0.0, 0.0])
+    g123 = (4.0 * np.convolve(b12, [0.6, 0.4]) + [0.0, 0.0, 0.0, 1.0]) / 5.0
+    np.testing.assert_allclose(mids[1], g123)
+    array_fluxes = [fluxes[f] for f in emu_map.flux_ids]
+    np.testing.assert_allclose(
+        emu_simulate(array_fluxes, emu_map, input_mids), mids
+    )
+
+
+def test_emu_simulate_batch():
+    """Test that batched simulation matches one flux vector at a time."""
+    emu_map = decompose_network(
+        [
+            EMU(compound_id="F", atoms=(1, 2, 3)),
+            EMU(compound_id="E", atoms=(1,)),
+        ],
+        EXAMPLE_EMU_NETWORK,
+    )
+    rng = np.random.default_rng(0)
+    input_mids = {
+        emu: rng.dirichlet(np.ones(emu.size + 1)) for emu in emu_map.input_emus
+    }
+    fluxes = rng.uniform(1, 10, size=(5, len(emu_map.flux_ids)))
+    mids = emu_simulate_batch(fluxes, emu_map, input_mids, chunk_size=2)
+    assert mids.shape == (5, 2, 4)
+    for draw_fluxes, draw_mids in zip(fluxes, mids):
+        np.testing.assert_allclose(
+            emu_simulate(draw_fluxes, emu_map, input_mids), draw_mids
+        )
+
+
+def test_emu_simulate_with_jacobian():
+    """Test flux derivatives of simulated MIDs against finite differences."""
+    emu_map = decompose_network(
+        [
+            EMU(compound_id="F", atoms=(1, 2, 3)),
+            EMU(compound_id="E", atoms=(1,)),
+        ],
+        EXAMPLE_EMU_NETWORK,
+    )
+    rng = np.random.default_rng(1)
+    input_mids = {
+        emu: rng.dirichlet(np.ones(emu.size + 1)) for emu in emu_map.input_emus
+    }
+    fluxes = rng.uniform(1, 10, size=len(emu_map.flux_ids))
+    mids, jacobian = emu_simulate_with_jacobian(fluxes, emu_map, input_mids)
+    np.testing.assert_allclose(mids, emu_simulate(fluxes, emu_map, input_mids))
+    assert jacobian.shape == mids.shape + (len(emu_map.flux_ids),)
+    step = 1e-6
+    for j in range(len(fluxes)):
+        up, down = fluxes.copy(), fluxes.copy()
+        up[j] += step
+        down[j] -= step
+        finite_difference = (
+            emu_simulate(up, emu_map, input_mids)
+            - emu_simulate(down, emu_map, input_mids)
+        ) / (2 * step)
+        np.testing.assert_allclose(
+            jacobian[..., j], finite_difference, atol=1e-8
+        )
+
+
+def test_emu_simulate_sparse(monkeypatch):
+    """Test that sparse level solves match dense ones."""
+    emu_map = decompose_network(
+        [
+            EMU(compound_id="F", atoms=(1, 2, 3, 4)),
+            EMU(compound_id="F", atoms=(1, 2)),
+        ],
+        RING_NETWORK,
+    )
+    assert max(len(block.emus) for block in emu_map.blocks) > 2
+    rng = np.random.default_rng(2)
+    input_mids = {
+        emu: rng.dirichlet(np.ones(emu.size + 1)) for emu in emu_map.input_emus
+    }
+    fluxes = rng.uniform(1, 10, size=(3, len(emu_map.flux_ids)))
+    dense = emu_simulate_batch(fluxes, emu_map, input_mids)
+    dense_jacobian = emu_simulate_with_jacobian(fluxes[0], emu_map, input_mids)[
+        1
+    ]
+    monkeypatch.setattr("cmfa.emu.SPARSE_LEVEL_SIZE", 1)
+    np.testing.assert_allclose(
+        emu_simulate_batch(fluxes, emu_map, input_mids), dense, atol=1e-12
+    )
+    mids, jacobian = emu_simulate_with_jacobian(fluxes[0], emu_map, input_mids)
+    np.testing.assert_allclose(mids, dense[0], atol=1e-12)
+    np.testing.assert_allclose(jacobian, dense_jacobian, atol=1e-12)
@@ -1,6 +1,9 @@
 """Unit tests for model of flux measurements."""
 
-from cmfa.fluxomics_data.flux_measurement import FluxMeasurement
+from cmfa.fluxomics_data.flux_measurement import (
+    FluxMeasurement,
+    FluxMeasurementArray,
+)
 
 EXAMPLE_FLUX_MEASUREMENT_INPUT = {
     "reaction_id": "v6",
@@ -14,3 +17,14 @@ EXAMPLE_FLUX_MEASUREMENT_INPUT = {
 def test_flux_measurement():
     """Test good case of loading a flux measurement."""
     FluxMeasurement.model_validate(EXAMPLE_FLUX_MEASUREMENT_INPUT)
+
+
+def test_flux_measurement_array():
+    """Test that a columnar store matches the measurements it was made from."""
+    measurements = [
+        FluxMeasurement.model_validate(EXAMPLE_FLUX_MEASUREMENT_INPUT),
+        FluxMeasurement(experiment_id="e1", reaction_id="v1", replicate=2),
+    ]
+    flux_array = FluxMeasurementArray.from_measurements(measurements)
+    assert flux_array == measurements
+    assert flux_array[1].measured_flux is None
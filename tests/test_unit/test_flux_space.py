@@ -0,0 +1,43 @@
+"""Unit tests for the free flux parametrization."""
+
+import numpy as np
+import pytest
+
+from .test_emu import EXAMPLE_EMU_NETWORK
+
+
+def test_flux_space():
+    """Test the kernel, the measured free fluxes and the flux maps."""
+    space = EXAMPLE_EMU_NETWORK.flux_space(measured_reaction_ids=["v5"])
+    assert space is EXAMPLE_EMU_NETWORK.flux_space(["v5"])
+    assert "v5" in space.free_reaction_ids
+    assert space.exchange_reaction_ids == ["v2"]
+    s = EXAMPLE_EMU_NETWORK.stoichiometric_matrix()
+    np.testing.assert_allclose(s.balanced @ space.kernel, 0.0, atol=1e-12)
+    free_fluxes = np.array([[1.0, 2.0], [2.0, 1.0]])
+    net = space.net_fluxes(free_fluxes)
+    np.testing.assert_allclose(space.free_fluxes(net), free_fluxes)
+    split = space.split_fluxes(free_fluxes, [[0.5], [0.5]])
+    split_matrix = EXAMPLE_EMU_NETWORK.stoichiometric_matrix(
+        split_reversible=True
+    )
+    assert space.split_reaction_ids == split_matrix.reaction_ids
+    np.testing.assert_allclose(split @ split_matrix.balanced.T, 0.0, atol=1e-12)
+    v2 = net[:, space.reaction_ids.index("v2")]
+    selected = space.split_fluxes(free_fluxes, [[0.5], [0.5]], ["v2", "v2_rev"])
+    np.testing.assert_allclose(selected[:, 0] - selected[:, 1], v2)
+    np.testing.assert_allclose(np.minimum(*selected.T), 0.5)
+    np.testing.assert_allclose(
+        space.split_fluxes(free_fluxes[0], [0.5]), split[0]
+    )
+    with pytest.raises(ValueError):
+        EXAMPLE_EMU_NETWORK.flux_space(["not_a_reaction"])
+
+
+def test_flux_space_measured_preference():
+    """Test that the preferred of two dependent measured reactions is free."""
+    # v3 and v4 carry the same net flux, since they make and use C
+    for measured in (["v3", "v4"], ["v4", "v3"]):
+        space = EXAMPLE_EMU_NETWORK.flux_space(measured_reaction_ids=measured)
+        assert measured[0] in space.free_reaction_ids
+        assert measured[1] not in space.free_reaction_ids
@@ -21,3 +21,11 @@ EXAMPLE_FLUXOMICS_DATASET_INPUT = {
 def test_fluxomics_dataset():
     """Test good case of loading a fluxomics dataset."""
     FluxomicsDataset.model_validate(EXAMPLE_FLUXOMICS_DATASET_INPUT)
+
+
+def test_fluxomics_dataset_flux_space():
+    """Test that the dataset's flux space prefers the measured reactions."""
+    dataset = FluxomicsDataset.model_validate(EXAMPLE_FLUXOMICS_DATASET_INPUT)
+    space = dataset.flux_space()
+    assert space is dataset.reaction_network.flux_space(["v6"])
+    assert space is dataset.to_columnar().flux_space()
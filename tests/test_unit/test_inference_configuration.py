@@ -0,0 +1,29 @@
+"""Unit tests for inference configurations."""
+
+from pathlib import Path
+
+import pytest
+from pydantic import ValidationError
+
+from cmfa.inference_configuration import InferenceConfiguration
+
+HERE = Path(__file__).parent
+INFERENCES_DIR = HERE / ".." / ".." / "inferences"
+
+
+def test_inference_configuration():
+    """Test reading the example config.toml and the threading options."""
+    config = InferenceConfiguration.from_toml(
+        INFERENCES_DIR / "first_inference" / "config.toml"
+    )
+    assert config.get_cpp_options()["STAN_THREADS"]
+    sample_kwargs = config.get_sample_kwargs("kfold")
+    assert sample_kwargs["threads_per_chain"] == config.threads_per_chain
+    assert sample_kwargs["chains"] == 1
+    assert "n_folds" not in sample_kwargs
+    unthreaded = config.model_copy(update={"threads_per_chain": None})
+    assert "STAN_THREADS" not in unthreaded.get_cpp_options()
+    with pytest.raises(ValidationError):
+        InferenceConfiguration.model_validate(
+            config.model_dump() | {"modes": ["nonsense"]}
+        )
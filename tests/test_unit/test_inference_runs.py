@@ -0,0 +1,123 @@
+"""Unit tests for planning inference runs."""
+
+import numpy as np
+import pytest
+
+from cmfa.fluxomics_data.mid_measurement import MIDMeasurementArray
+from cmfa.inference_configuration import InferenceConfiguration
+from cmfa.inference_runs import (
+    DEFAULT_CHAINS,
+    FINGERPRINT_FILE,
+    build_stan_file,
+    plan_runs,
+    predicting_measurements,
+)
+
+from .test_inference_configuration import INFERENCES_DIR
+from .test_stan_input import make_dataset
+
+OFFSETS = [0, 3, 5, 9]
+INTENSITY = [1, 2, 1, 3, 1, 1, 1, 1, 1]
+
+
+def get_config(n_folds):
+    """Get the example configuration with every mode and some folds."""
+    config = InferenceConfiguration.from_toml(
+        INFERENCES_DIR / "first_inference" / "config.toml"
+    )
+    return config.model_copy(
+        update={
+            "modes": ["prior", "posterior", "kfold"],
+            "mode_options": {"kfold": {"n_folds": n_folds}},
+        }
+    )
+
+
+def test_plan_runs(tmp_path):
+    """Test the runs of each mode and skipping runs that are up to date."""
+    config = get_config(n_folds=2)
+    dataset = make_dataset(OFFSETS, INTENSITY)
+    runs = plan_runs(tmp_path, config, dataset)
+    assert [r.mode for r in runs] == ["prior", "posterior", "kfold", "kfold"]
+    assert runs[0].data["likelihood"] == 0
+    assert runs[0].data["yhat_prior"] == 1
+    assert runs[1].data["likelihood"] == 1
+    assert runs[1].data["yhat_prior"] == 0
+    assert runs[1].data["y_pred_test"] == []
+    assert runs[1].data["N_measurement_test"] == 0
+    assert runs[0].fingerprint != runs[1].fingerprint
+    assert runs[1].cores == config.threads_per_chain * DEFAULT_CHAINS
+    assert not runs[1].is_done()
+    runs[1].output_dir.mkdir(parents=True)
+    (runs[1].output_dir / FINGERPRINT_FILE).write_text(runs[1].fingerprint)
+    assert runs[1].is_done()
+    again = plan_runs(tmp_path, config, dataset)
+    assert again[1].fingerprint == runs[1].fingerprint
+
+
+def test_plan_runs_kfold(tmp_path):
+    """Test that every fold holds out some measurements and fits the rest."""
+    dataset = make_dataset(OFFSETS, INTENSITY)
+    _, posterior, *folds = plan_runs(tmp_path, get_config(n_folds=3), dataset)
+    full = posterior.data
+    assert [r.output_dir.name for r in folds] == ["fold_0", "fold_1", "fold_2"]
+    held_out = []
+    for fold, run in enumerate(folds):
+        data = run.data
+        assert data["N_measurement_test"] == 1
+        assert data["N_measurement"] == 2
+        assert data["N"] + data["N_test"] == full["N"]
+        start = full["y_start"][fold] - 1
+        np.testing.assert_allclose(
+            data["stacked_y_test"],
+            full["stacked_y"][start : full["y_end"][fold]],
+        )
+        assert data["y_start_test"] == [1]
+        assert data["y_end_test"] == [full["y_sizes"][fold]]
+        # every measurement has its own mass isotopomers, so none match
+        assert data["y_pred_test"] == [0]
+        held_out.extend(data["stacked_y_test"])
+    np.testing.assert_allclose(held_out, full["stacked_y"])
+    with pytest.raises(ValueError, match="into 4 folds"):
+        plan_runs(tmp_path, get_config(n_folds=4), dataset)
+
+
+def test_predicting_measurements():
+    """Test matching held-out measurements to fitted training measurements."""
+    mids = MIDMeasurementArray.from_columns(
+        experiment_id=["e1", "e1", "e2", "e3", "e2"],
+        compound_id=["A", "B", "A", "A", "B"],
+        fragment_id=["a", "b", "a", "a", "b"],
+        offsets=[0, 2, 4, 6, 9, 11],
+        mass_isotopomer_id=["0", "1", "0", "1", "0", "1", "0", "1", "2"]
+        + ["1", "0"],
+        measured_intensity=np.ones(11),
+        measured_std_dev=np.full(11, 0.2),
+    )
+    training, held_out = mids.take([0, 1]), mids.take([2, 3, 4])
+    # A/a matches, but not with an extra isotopomer or one out of order
+    assert predicting_measurements(training, held_out) == [1, 0, 0]
+    assert predicting_measurements(held_out, training) == [1, 0]
+
+
+def test_build_stan_file(tmp_path):
+    """Test that runs only share an executable if their options match."""
+    dataset = make_dataset(OFFSETS, INTENSITY)
+    config = get_config(n_folds=2)
+    other = config.model_copy(update={"cpp_options": {"O1": True}})
+    prior, posterior, *_ = plan_runs(tmp_path, config, dataset)
+    other_prior, *_ = plan_runs(tmp_path, other, dataset)
+    assert other_prior.stan_file == prior.stan_file
+    assert prior.compile_key == posterior.compile_key
+    assert other_prior.compile_key != prior.compile_key
+    build_dir = tmp_path / "build"
+    path = build_stan_file(prior, build_dir)
+    assert build_stan_file(posterior, build_dir) == path
+    other_path = build_stan_file(other_prior, build_dir)
+    assert other_path.parent != path.parent
+    assert other_path.name == path.name == prior.stan_file.name
+    assert other_path.read_bytes() == prior.stan_file.read_bytes()
+    # an unchanged copy is not rewritten, so its executable stays up to date
+    mtime = path.stat().st_mtime_ns
+    build_stan_file(prior, build_dir)
+    assert path.stat().st_mtime_ns == mtime
@@ -1,6 +1,11 @@
 """Unit tests for models of fluxomics measurements."""
 
-from cmfa.fluxomics_data.mid_measurement import MIDMeasurement
+import numpy as np
+
+from cmfa.fluxomics_data.mid_measurement import (
+    MIDMeasurement,
+    MIDMeasurementArray,
+)
 
 EXAMPLE_MID_MEASUREMENT_INPUT = {
     "experiment_id": "e1",
@@ -14,3 +19,36 @@ EXAMPLE_MID_MEASUREMENT_INPUT = {
 def test_mid_measurement():
     """Test good case of loading a mid measurement."""
     MIDMeasurement.model_validate(EXAMPLE_MID_MEASUREMENT_INPUT)
+
+
+def test_mid_measurement_array():
+    """Test that a columnar store matches the measurements it was made from."""
+    mids = [
+        MIDMeasurement.model_validate(
+            {
+                "experiment_id": experiment_id,
+                "compound_id": "F",
+                "fragment_id": "F1",
+                "measured_components": [
+                    {
+                        "mass_isotopomer_id": str(i),
+                        "measured_intensity": intensity,
+                        "measured_std_dev": 0.01,
+                    }
+                    for i, intensity in enumerate(intensities)
+                ],
+            }
+        )
+        for experiment_id, intensities in [
+            ("e1", [0.2, 0.8]),
+            ("e2", [0.1, 0.3, 0.6]),
+        ]
+    ]
+    mid_array = MIDMeasurementArray.from_measurements(mids)
+    assert mid_array == mids
+    assert len(mid_array) == 2
+    assert list(mid_array.sizes) == [2, 3]
+    assert np.allclose(
+        mid_array.normalized_intensity, [0.2, 0.8, 0.1, 0.3, 0.6]
+    )
+    assert mid_array.take([1]) == mids[1:]
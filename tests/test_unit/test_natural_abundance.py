@@ -0,0 +1,111 @@
+"""Unit tests for the natural abundance correction."""
+
+import numpy as np
+import pytest
+
+from cmfa.fluxomics_data.mid_measurement import MIDMeasurementArray
+from cmfa.natural_abundance import (
+    apply_natural_abundance,
+    correct_measurements,
+    correct_natural_abundance,
+    correction_matrix,
+    parse_formula,
+)
+
+
+def test_parse_formula():
+    """Test parsing formulas with repeated elements and bad formulas."""
+    assert parse_formula("CH3COOH") == {"C": 2, "H": 4, "O": 2}
+    assert parse_formula("C6H12O6Si2") == {"C": 6, "H": 12, "O": 6, "Si": 2}
+    with pytest.raises(ValueError):
+        parse_formula("c6h12")
+
+
+def test_correction_matrix():
+    """Test a small correction matrix and its caching."""
+    matrix = correction_matrix("C2", 1, 3)
+    assert matrix is correction_matrix("C2", 1, 3)
+    # unlabelled, the labellable carbon has natural 13C like the other one
+    np.testing.assert_allclose(
+        matrix,
+        [
+            [0.9893**2, 0.0],
+            [2 * 0.9893 * 0.0107, 0.9893],
+            [0.0107**2, 0.0107],
+        ],
+    )
+    with pytest.raises(ValueError):
+        correction_matrix("C2H6O", 3, 4)
+
+
+def test_correct_natural_abundance_unlabelled():
+    """Test that an unlabelled fragment's natural MID corrects to M+0."""
+    natural = [1.0]
+    for isotopes, count in [
+        ([0.9893, 0.0107], 3),
+        ([0.999885, 0.000115], 8),
+        ([0.99757, 0.00038, 0.00205], 3),
+    ]:
+        for _ in range(count):
+            natural = np.convolve(natural, isotopes)
+    raw = np.asarray(natural[:4])
+    np.testing.assert_allclose(raw, [0.9603, 0.0331, 0.0063, 0.0002], atol=1e-4)
+    np.testing.assert_allclose(
+        correction_matrix("C3H8O3", 3, 4) @ [1.0, 0.0, 0.0, 0.0], raw
+    )
+    corrected = correct_natural_abundance(raw[None], ["C3H8O3"], [3])
+    np.testing.assert_allclose(corrected[0], [1.0, 0.0, 0.0, 0.0], atol=1e-12)
+
+
+def test_natural_abundance_round_trip():
+    """Test that correcting undoes applying natural abundance."""
+    rng = np.random.default_rng(0)
+    sizes = [3, 2, 3]
+    formulas = ["C3H5O3", "C2H4NO2Si", "C3H5O3"]
+    mids = np.zeros((4, 3, 4))
+    for i, size in enumerate(sizes):
+        mids[:, i, : size + 1] = rng.dirichlet(np.ones(size + 1), size=4)
+    raw = apply_natural_abundance(mids, formulas, sizes)
+    assert not np.allclose(raw, mids)
+    np.testing.assert_allclose(
+        correct_natural_abundance(raw, formulas, sizes), mids, atol=1e-12
+    )
+    measurements = MIDMeasurementArray.from_columns(
+        experiment_id=["e1", "e1"],
+        compound_id=["A", "B"],
+        fragment_id=["a", "b"],
+        offsets=[0, 4, 7],
+        mass_isotopomer_id=["M0", "M1", "M2", "M3", "M0", "M1", "M2"],
+        measured_intensity=np.concatenate([raw[0, 0], raw[0, 1, :3]]),
+        measured_std_dev=np.full(7, 0.01),
+    )
+    corrected = correct_measurements(
+        measurements, {"a": "C3H5O3", "b": "C2H4NO2Si"}, {"A": 3, "B": 2}
+    )
+    np.testing.assert_allclose(
+        corrected, np.concatenate([mids[0, 0], mids[0, 1, :3]]), atol=1e-12
+    )
+
+
+def test_correct_measurements_unordered_and_derivatised():
+    """Test correcting shuffled components and extra mass isotopomers."""
+    labelling = np.array([0.5, 0.2, 0.3])
+    # a derivatised fragment with 2 labellable atoms measured up to M+4
+    formula = "C5H12O2Si"
+    raw = correction_matrix(formula, 2, 5) @ labelling
+    order = [3, 0, 4, 2, 1]
+    measurements = MIDMeasurementArray.from_columns(
+        experiment_id=["e1"],
+        compound_id=["A"],
+        fragment_id=["a"],
+        offsets=[0, 5],
+        mass_isotopomer_id=[f"M+{i}" for i in order],
+        measured_intensity=raw[order],
+        measured_std_dev=np.full(5, 0.01),
+    )
+    corrected = correct_measurements(measurements, {"a": formula}, {"A": 2})
+    np.testing.assert_allclose(
+        corrected, np.append(labelling, [0.0, 0.0])[order], atol=1e-12
+    )
+    with pytest.raises(ValueError):
+        correct_measurements(measurements, {"a": formula}, {"A": 5})
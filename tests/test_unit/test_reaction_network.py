@@ -63,3 +63,38 @@ def test_example_network():
     assert set(
         rn.reaction_adjacency_matrix.loc[("D", "abc"), ("B", "abc")]
     ) == {"v2_rev", "v3"}
+
+
+def test_reaction_cached_stoichiometry():
+    """Test that a reaction's derived stoichiometry is cached and read-only."""
+    reaction = Reaction(
+        id="v4",
+        stoichiometry_input={"B": {"abc": -1}, "C": {"ab": 1}, "E": {"c": 1}},
+    )
+    assert reaction.stoichiometry is reaction.stoichiometry
+    assert reaction.substrates == {"B"}
+    assert reaction.products == {"C", "E"}
+    assert reaction.atom_map[("C", "ab")] == (1, 2)
+    assert reaction.compound_coefficients["B"] == -1
+    with pytest.raises(TypeError):
+        reaction.stoichiometry["B"] = {}
+
+
+def test_compound_index():
+    """Test that the compound index follows changes to the reactions."""
+    rn = ReactionNetwork.model_validate(EXAMPLE_NETWORK_INPUT)
+    assert rn.has_compound("A")
+    assert rn.get_compound("B").name == "compound B"
+    assert len(rn.compounds) == 6
+    rn.reactions = {
+        Reaction(id="v7", stoichiometry_input={"B": {"ab": -1}, "G": {"ab": 1}})
+    }
+    assert rn.has_compound("G")
+    assert not rn.has_compound("A")
+    with pytest.raises(AttributeError):
+        rn.reactions.add(Reaction(id="v8", stoichiometry_input={}))
+    rn.reactions = {
+        Reaction(id="v8", stoichiometry_input={"B": {"ab": -1}, "H": {"ab": 1}})
+    }
+    assert rn.has_compound("H")
+    assert not rn.has_compound("G")
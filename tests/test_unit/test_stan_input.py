@@ -0,0 +1,76 @@
+"""Unit tests for the Stan input builder."""
+
+import numpy as np
+import pytest
+
+from cmfa.fluxomics_data.fluxomics_dataset import FluxomicsDataset
+from cmfa.fluxomics_data.mid_measurement import MIDMeasurementArray
+from cmfa.stan_input import dataset_digest, get_stan_input
+
+from .test_fluxomics_dataset import EXAMPLE_FLUXOMICS_DATASET_INPUT
+
+
+def make_dataset(offsets, intensity):
+    """Make a dataset with three MID measurements of two fragments."""
+    n_component = offsets[-1]
+    mids = MIDMeasurementArray.from_columns(
+        experiment_id=["e1", "e2", "e1"],
+        compound_id=["A", "A", "B"],
+        fragment_id=["a", "a", "b"],
+        offsets=offsets,
+        mass_isotopomer_id=[str(i) for i in range(n_component)],
+        measured_intensity=intensity,
+        measured_std_dev=np.full(n_component, 0.2),
+    )
+    return FluxomicsDataset.model_validate(
+        EXAMPLE_FLUXOMICS_DATASET_INPUT | {"mid_measurements": mids}
+    )
+
+
+def test_get_stan_input(tmp_path):
+    """Test the stacked MIDs, offsets, errors and indexes, and the cache."""
+    dataset = make_dataset([0, 3, 5, 9], [1, 2, 1, 3, 1, 1, 1, 1, 1])
+    stan_input = get_stan_input(dataset)
+    assert stan_input["N"] == 9
+    assert stan_input["N_measurement"] == 3
+    assert stan_input["N_experiment"] == 2
+    assert stan_input["N_fragment"] == 2
+    assert stan_input["y_sizes"] == [3, 2, 4]
+    assert stan_input["y_start"] == [1, 4, 6]
+    assert stan_input["y_end"] == [3, 5, 9]
+    np.testing.assert_allclose(
+        stan_input["stacked_y"],
+        [0.25, 0.5, 0.25, 0.75, 0.25, 0.25, 0.25, 0.25, 0.25],
+    )
+    np.testing.assert_allclose(
+        stan_input["stacked_y_error"],
+        [0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05, 0.05],
+    )
+    assert stan_input["experiment"] == [1, 2, 1]
+    assert stan_input["fragment"] == [1, 1, 2]
+    assert dataset_digest(dataset) == dataset_digest(dataset.to_columnar())
+    cached = get_stan_input(dataset, cache_dir=tmp_path)
+    assert cached == stan_input
+    (path,) = tmp_path.iterdir()
+    assert path.name == f"stan_input_{dataset_digest(dataset)}.json"
+    assert get_stan_input(dataset, cache_dir=tmp_path) == stan_input
+
+
+def test_get_stan_input_invalid(tmp_path):
+    """Test that empty or zero intensity measurements are rejected."""
+    empty = make_dataset([0, 3, 3, 5], [1, 2, 1, 1, 1])
+    with pytest.raises(ValueError, match=r"measurements \[1\] have no"):
+        get_stan_input(empty, cache_dir=tmp_path)
+    dataset = make_dataset([0, 3, 5, 7], [1, 2, 1, 1, 1, 1, 1])
+    mids = dataset.mid_measurements
+    # the store's validator rejects such intensities, but copies skip it
+    zero = dataset.model_copy(
+        update={
+            "mid_measurements": mids.model_copy(
+                update={"measured_intensity": np.array([1, 2, 1, 0, 0, 1, 1.0])}
+            )
+        }
+    )
+    with pytest.raises(ValueError, match=r"measurements \[1\] have a total"):
+        get_stan_input(zero, cache_dir=tmp_path)
+    assert not any(tmp_path.iterdir())
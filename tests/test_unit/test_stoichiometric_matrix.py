@@ -0,0 +1,29 @@
+"""Unit tests for the sparse stoichiometric matrix."""
+
+from cmfa.fluxomics_data.reaction_network import ReactionNetwork
+
+from .test_reaction_network import EXAMPLE_NETWORK_INPUT
+
+
+def test_stoichiometric_matrix():
+    """Test the example network's stoichiometric matrix and boundary."""
+    network = ReactionNetwork.model_validate(EXAMPLE_NETWORK_INPUT)
+    s = network.stoichiometric_matrix()
+    assert s is network.stoichiometric_matrix()
+    assert s.compound_ids == sorted(network.compound_index)
+    assert s.reaction_ids == sorted(r.id for r in network.reactions)
+    dense = s.matrix.toarray()
+    for reaction in network.reactions:
+        for compound, coef in reaction.compound_coefficients.items():
+            i, j = s.compound_index[compound], s.reaction_index[reaction.id]
+            assert dense[i, j] == coef
+    assert s.balanced.shape == (len(s.balanced_compound_ids), s.matrix.shape[1])
+    split = network.stoichiometric_matrix(split_reversible=True)
+    for reaction_id in split.reaction_ids:
+        if reaction_id.endswith("_rev"):
+            fwd = split.reaction_index[reaction_id.removesuffix("_rev")]
+            rev = split.reaction_index[reaction_id]
+            assert rev == fwd + 1
+            assert (split.matrix[:, rev] != -split.matrix[:, fwd]).nnz == 0
+    fixed = network.stoichiometric_matrix(boundary_compounds=["A"])
+    assert fixed.boundary_compound_ids == ["A"]
@@ -0,0 +1,48 @@
+"""Unit tests for the MIDs of input EMUs."""
+
+import numpy as np
+
+from cmfa.fluxomics_data.emu_map import EMU
+from cmfa.fluxomics_data.tracer import Tracer, TracerExperiment
+from cmfa.tracer_input import TracerInput
+
+
+def test_tracer_input():
+    """Test input MIDs of a tracer mixture against hand calculations."""
+    tracer_input = TracerInput(
+        tracers=[
+            Tracer(
+                isotope="[1,2-13C]A",
+                compound="A",
+                labelled_atom_positions={1, 2},
+                purity=0.9,
+            ),
+            Tracer(
+                isotope="[3-13C]A",
+                compound="A",
+                labelled_atom_positions={3},
+            ),
+        ],
+        tracer_experiments=[
+            TracerExperiment(
+                experiment_id="e1",
+                tracer_enrichments={"[1,2-13C]A": 0.5, "[3-13C]A": 0.25},
+            ),
+            TracerExperiment(experiment_id="e2"),
+        ],
+    )
+    a12 = EMU(compound_id="A", atoms=(1, 2))
+    a3 = EMU(compound_id="A", atoms=(3,))
+    b1 = EMU(compound_id="B", atoms=(1,))
+    mids = tracer_input.input_mid_array([a12, a3, b1])
+    assert mids.shape == (2, 3, 3)
+    np.testing.assert_allclose(
+        mids[0, 0], 0.5 * np.array([0.01, 0.18, 0.81]) + [0.5, 0.0, 0.0]
+    )
+    np.testing.assert_allclose(mids[0, 1], [0.75, 0.25, 0.0])
+    np.testing.assert_allclose(mids[0, 2], [1.0, 0.0, 0.0])
+    np.testing.assert_allclose(mids[1, :, 0], 1.0)
+    by_experiment = tracer_input.input_mids([a12, a3])
+    assert by_experiment["e1"][a12] is by_experiment["e1"][a12]
+    np.testing.assert_allclose(by_experiment["e1"][a3], [0.75, 0.25])
+    assert set(by_experiment) == {"e1", "e2"}